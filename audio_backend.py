@@ -0,0 +1,716 @@
+"""
+Audio backends used by the control server and other out-of-GUI tooling.
+
+Every backend exposes the same small set of operations, keyed by endpoint ID
+(None selects the default render endpoint):
+
+    list_devices(flow="all")        -> [{"id", "name", "flow", "default"}, ...]
+    get_volume(device=None)         -> {"device", "level", "muted"}
+    set_volume(level, device=None, context=None) -> {"device", "level", "muted"}
+    step_volume(direction, device=None, context=None)
+    set_mute(muted=None, device=None, context=None)   (None toggles)
+    get_volume_db(device=None)      -> {"device", "db", "min_db", "max_db", "increment"}
+    set_volume_db(db, device=None, context=None)      -> {"device", "level", "muted"}
+    get_position(device=None)       -> {"device", "position", "db"}
+    set_position(position, device=None, context=None) -> {"device", "level", "muted", "position"}
+    get_channels(device=None)       -> {"device", "channels": [level, ...]}
+    set_channels(levels, device=None, context=None)   -> {"device", "level", "muted"}
+    set_default(device)
+    communications_device(flow="render") -> endpoint ID of the eCommunications default
+    list_sessions(device=None)      -> [{"device", "pid", "process", "level", "muted", "active"}, ...]
+    set_session_volume(process, level, device=None, context=None) -> [session, ...]
+    metrics()                       -> backend-specific counters
+
+ComAudioBackend also has open_loopback(device=None), which returns a
+loopback capture source for loudness.CapturePipeline.
+
+Listeners receive {"event": "volume", "device", "level", "muted", "source"},
+{"event": "default", "device", "flow"},
+{"event": "device", "change": "added"|"removed"|"changed", "device", ...}
+(added is also sent when an endpoint is re-enabled or re-plugged under the
+same ID; changed when a property such as its name changed) and
+{"event": "session", "change": "added"|"removed"|"active"|"inactive"|"volume",
+ "device", "pid", "process", "level", "muted", "active", "source"} dicts.
+Sessions (per-application streams) are those of render endpoints; process
+names compare case-insensitively.
+
+Positions are perceptual 0..100 slider positions, mapped to endpoint dB
+through the device's calibration table (see calibration.py); `calibration`
+is the CalibrationStore holding them.
+
+Channel levels are scalars per channel; the master level is the loudest
+channel, so the ratios between them are the balance.
+
+`context` names the controller making a write (a volume group, a remote
+client); it defaults to the backend's own `context_name`. Volume events
+carry it back as "source", so a controller can ignore its own echoes.
+
+ComAudioBackend drives the real Core Audio helpers of the volume package. Its
+COM calls run on com_guard worker threads, so one instance can be shared by
+the GUI and every other feature of a process. SimulatedAudioBackend
+keeps the same state in memory so the tooling can run and be load-tested on
+Linux.
+"""
+import threading
+import time
+
+from calibration import CalibrationStore, default_store
+from change_coalescer import ADDED, CHANGED, EndpointChangeCoalescer
+
+# These mirror the EDataFlow values in volume.core; the simulated backend
+# does not import the COM helpers at all.
+FLOW_NAMES = {0: "render", 1: "capture"}
+FLOW_VALUES = {"render": 0, "capture": 1, "all": 2}
+
+
+class BackendError(Exception):
+    """Raised for invalid requests against a backend (unknown device, bad value)."""
+
+
+def clamp_level(level):
+    try:
+        level = float(level)
+    except (TypeError, ValueError):
+        raise BackendError(f"Invalid volume level: {level!r}")
+    return min(1.0, max(0.0, level))
+
+
+def parse_db(db):
+    try:
+        return float(db)
+    except (TypeError, ValueError):
+        raise BackendError(f"Invalid volume in dB: {db!r}")
+
+
+def parse_position(position):
+    try:
+        return min(100.0, max(0.0, float(position)))
+    except (TypeError, ValueError):
+        raise BackendError(f"Invalid volume position: {position!r}")
+
+
+def parse_channels(levels):
+    try:
+        return [clamp_level(level) for level in levels]
+    except TypeError:
+        raise BackendError(f"Invalid channel levels: {levels!r}")
+
+
+def parse_process(process):
+    if not isinstance(process, str):
+        raise BackendError(f"Invalid process name: {process!r}")
+    return process.lower()
+
+
+def parse_flow(flow):
+    if flow not in FLOW_VALUES:
+        raise BackendError(f"Unknown data flow: {flow!r}")
+    return FLOW_VALUES[flow]
+
+
+class _ListenerMixin:
+    """Change-event fan-out shared by the backends."""
+
+    def add_listener(self, callback):
+        """Registers callback(event_dict), called on the backend's thread after each change."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _emit(self, event):
+        for callback in list(self._listeners):
+            try:
+                callback(event)
+            except Exception as e:
+                print("Backend listener failed:", e)
+
+
+class _PositionMixin:
+    """Perceptual positions through the backend's CalibrationStore, shared by the backends."""
+
+    def _table(self, device):
+        device_id = self.get_volume(device)["device"]
+        table = self.calibration.get(device_id)
+        if table is None:
+            state = self.get_volume_db(device_id)
+            table = self.calibration.table(device_id, (state["min_db"], state["max_db"], state["increment"]))
+        return device_id, table
+
+    def get_position(self, device=None):
+        device_id, table = self._table(device)
+        db = self.get_volume_db(device_id)["db"]
+        return {"device": device_id, "position": table.to_position(db), "db": db}
+
+    def set_position(self, position, device=None, context=None):
+        position = round(parse_position(position))
+        device_id, table = self._table(device)
+        return dict(self.set_volume_db(table.to_db(position), device_id, context), position=position)
+
+
+# ============================================================
+# Simulated Backend (in-memory, any platform)
+# ============================================================
+class SimulatedDevice:
+    """
+    `db_range` is (min_db, max_db, increment); levels map linearly onto it.
+    `balance` holds each channel's level relative to the master level.
+    """
+    __slots__ = ("device_id", "name", "data_flow", "level", "muted", "db_range", "balance")
+
+    def __init__(self, device_id, name, data_flow=0, level=0.5, muted=False, db_range=(-65.25, 0.0, 0.75),
+                 channels=2):
+        self.device_id = device_id
+        self.name = name
+        self.data_flow = data_flow
+        self.level = level
+        self.muted = muted
+        self.db_range = db_range
+        self.balance = [1.0] * channels
+
+
+class SimulatedSession:
+    __slots__ = ("device_id", "pid", "process", "level", "muted", "active")
+
+    def __init__(self, device_id, pid, process, level=1.0, muted=False, active=True):
+        self.device_id = device_id
+        self.pid = pid
+        self.process = process
+        self.level = level
+        self.muted = muted
+        self.active = active
+
+    def as_dict(self):
+        return {"device": self.device_id, "pid": self.pid, "process": self.process, "level": self.level,
+                "muted": self.muted, "active": self.active}
+
+
+class SimulatedAudioBackend(_PositionMixin, _ListenerMixin):
+    """
+    In-memory stand-in for ComAudioBackend. `latency` (seconds) is slept on
+    every call to model driver round-trips; `step_size` matches the usual
+    50-step hardware volume range. Calibration is kept in memory unless a
+    CalibrationStore is passed.
+    """
+    def __init__(self, devices=None, latency=0.0, step_size=0.02, context_name="simulated", calibration=None):
+        self._listeners = []
+        self.calibration = calibration if calibration is not None else CalibrationStore()
+        self.context_name = context_name
+        self.latency = latency
+        self.step_size = step_size
+        self._lock = threading.Lock()
+        if devices is None:
+            devices = [
+                SimulatedDevice("{0.0.0.00000000}.{sim-speakers}", "Simulated Speakers", 0, 0.5),
+                SimulatedDevice("{0.0.0.00000000}.{sim-headphones}", "Simulated Headphones", 0, 0.3),
+                SimulatedDevice("{0.0.1.00000000}.{sim-microphone}", "Simulated Microphone", 1, 0.8),
+            ]
+        self.devices = {dev.device_id: dev for dev in devices}
+        self.defaults = {}
+        for dev in devices:
+            self.defaults.setdefault(dev.data_flow, dev.device_id)
+        self.sessions = {}   # (device ID, pid) -> SimulatedSession
+        self.communications = {}   # data flow -> device ID, when it differs from the console default
+
+    def _delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _resolve(self, device):
+        if device is None:
+            device = self.defaults.get(0)
+        dev = self.devices.get(device)
+        if dev is None:
+            raise BackendError(f"Unknown device: {device!r}")
+        return dev
+
+    def _state(self, dev):
+        return {"device": dev.device_id, "level": dev.level, "muted": dev.muted}
+
+    def _changed(self, dev, context):
+        state = self._state(dev)
+        self._emit(dict(state, event="volume", source=context or self.context_name))
+        return state
+
+    def list_devices(self, flow="all"):
+        data_flow = parse_flow(flow)
+        self._delay()
+        return [
+            {"id": dev.device_id, "name": dev.name, "flow": FLOW_NAMES[dev.data_flow],
+             "default": self.defaults.get(dev.data_flow) == dev.device_id}
+            for dev in self.devices.values()
+            if data_flow == 2 or dev.data_flow == data_flow
+        ]
+
+    def get_volume(self, device=None):
+        dev = self._resolve(device)
+        self._delay()
+        return self._state(dev)
+
+    def set_volume(self, level, device=None, context=None):
+        dev = self._resolve(device)
+        level = clamp_level(level)
+        self._delay()
+        with self._lock:
+            dev.level = level
+        return self._changed(dev, context)
+
+    def step_volume(self, direction, device=None, context=None):
+        dev = self._resolve(device)
+        if direction not in ("up", "down"):
+            raise BackendError(f"Invalid step direction: {direction!r}")
+        self._delay()
+        delta = self.step_size if direction == "up" else -self.step_size
+        with self._lock:
+            dev.level = clamp_level(round(dev.level + delta, 6))
+        return self._changed(dev, context)
+
+    def set_mute(self, muted=None, device=None, context=None):
+        dev = self._resolve(device)
+        self._delay()
+        with self._lock:
+            dev.muted = (not dev.muted) if muted is None else bool(muted)
+        return self._changed(dev, context)
+
+    def get_volume_db(self, device=None):
+        dev = self._resolve(device)
+        self._delay()
+        min_db, max_db, increment = dev.db_range
+        return {"device": dev.device_id, "db": min_db + dev.level * (max_db - min_db),
+                "min_db": min_db, "max_db": max_db, "increment": increment}
+
+    def set_volume_db(self, db, device=None, context=None):
+        dev = self._resolve(device)
+        min_db, max_db, _ = dev.db_range
+        db = min(max_db, max(min_db, parse_db(db)))
+        self._delay()
+        with self._lock:
+            dev.level = (db - min_db) / (max_db - min_db)
+        return self._changed(dev, context)
+
+    def get_channels(self, device=None):
+        dev = self._resolve(device)
+        self._delay()
+        return {"device": dev.device_id, "channels": [dev.level * ratio for ratio in dev.balance]}
+
+    def set_channels(self, levels, device=None, context=None):
+        dev = self._resolve(device)
+        levels = parse_channels(levels)
+        if len(levels) != len(dev.balance):
+            raise BackendError(f"{dev.device_id} has {len(dev.balance)} channels, got {len(levels)} levels")
+        self._delay()
+        with self._lock:
+            dev.level = max(levels)
+            if dev.level > 0:
+                dev.balance = [level / dev.level for level in levels]
+        return self._changed(dev, context)
+
+    def set_default(self, device):
+        dev = self._resolve(device)
+        self._delay()
+        self.defaults[dev.data_flow] = dev.device_id
+        self._emit({"event": "default", "device": dev.device_id, "flow": FLOW_NAMES[dev.data_flow]})
+        return {"device": dev.device_id, "flow": FLOW_NAMES[dev.data_flow]}
+
+    def add_device(self, dev):
+        """Simulates plugging in an endpoint."""
+        self.devices[dev.device_id] = dev
+        self.defaults.setdefault(dev.data_flow, dev.device_id)
+        self._emit({"event": "device", "change": "added", "device": dev.device_id,
+                    "name": dev.name, "flow": FLOW_NAMES[dev.data_flow]})
+
+    def remove_device(self, device_id):
+        """Simulates unplugging an endpoint; the default moves to another one of its flow."""
+        dev = self.devices.pop(device_id)
+        self._emit({"event": "device", "change": "removed", "device": device_id})
+        if self.defaults.get(dev.data_flow) == device_id:
+            replacement = next((other for other in self.devices.values() if other.data_flow == dev.data_flow), None)
+            if replacement is None:
+                del self.defaults[dev.data_flow]
+            else:
+                self.set_default(replacement.device_id)
+
+    def communications_device(self, flow="render"):
+        data_flow = parse_flow(flow)
+        return self.communications.get(data_flow, self.defaults.get(data_flow))
+
+    def _session_event(self, session, change, source=None):
+        self._emit(dict(session.as_dict(), event="session", change=change, source=source))
+
+    def list_sessions(self, device=None):
+        self._delay()
+        return [session.as_dict() for session in self.sessions.values()
+                if device is None or session.device_id == device]
+
+    def set_session_volume(self, process, level, device=None, context=None):
+        level = clamp_level(level)
+        process = parse_process(process)
+        changed = []
+        for session in list(self.sessions.values()):
+            if session.process.lower() == process and (device is None or session.device_id == device):
+                self._delay()
+                session.level = level
+                self._session_event(session, "volume", context or self.context_name)
+                changed.append(session.as_dict())
+        return changed
+
+    def add_session(self, device_id, pid, process, level=1.0, active=True):
+        """Simulates an application opening a stream on an endpoint."""
+        session = self.sessions[(device_id, pid)] = SimulatedSession(device_id, pid, process, level, active=active)
+        self._session_event(session, "added")
+        return session
+
+    def set_session_active(self, device_id, pid, active):
+        """Simulates a session starting or stopping playback."""
+        session = self.sessions[(device_id, pid)]
+        if session.active != active:
+            session.active = active
+            self._session_event(session, "active" if active else "inactive")
+
+    def remove_session(self, device_id, pid):
+        self._session_event(self.sessions.pop((device_id, pid)), "removed")
+
+    def metrics(self):
+        return {}
+
+
+# ============================================================
+# Core Audio Backend (Windows, volume package helpers)
+# ============================================================
+class ComAudioBackend(_PositionMixin, _ListenerMixin):
+    """
+    Wraps the volume package helpers around a shared EndpointCache. Without an
+    `enumerator` it initializes COM on the creating thread. Every COM call
+    runs on a com_guard.ComCallGuard worker, so one backend can serve several
+    threads and features, and a hung driver yields a ComTimeoutError for its
+    device instead of blocking the caller.
+
+    Writes are stamped with a volume.EventContext per context name. Volume
+    events come from each endpoint's IAudioEndpointVolumeCallback, so changes
+    made by other applications are reported too, with source None.
+    """
+    def __init__(self, enumerator=None, guard=None, timeout=None, context_name="control-server", calibration=None):
+        import volume
+        from com_guard import ComCallGuard, GLOBAL_KEY
+        self._listeners = []
+        self.calibration = calibration if calibration is not None else default_store()
+        self.volume = volume
+        self.global_key = GLOBAL_KEY
+        self.timeout = timeout
+        self.context_name = context_name
+        self.contexts = {}
+        self.volume_clients = {}   # device ID -> VolumeNotificationClient
+        self._lock = threading.Lock()   # guards contexts, volume_clients and session_trackers
+        if enumerator is None:
+            volume.init_com()
+            enumerator = volume.create_device_enumerator()
+        self.guard = guard if guard is not None else ComCallGuard(thread_init=volume.init_com)
+        self.cache = self.guard.call(GLOBAL_KEY, volume.EndpointCache, enumerator, timeout=timeout)
+        self.state = volume.VolumeStateCache(self.cache, call=self._com, global_key=GLOBAL_KEY)
+        self.coalescer = None
+        self.endpoint_client = None
+        self.session_trackers = None   # device ID -> AudioSessionTracker, once watch_sessions() ran
+        self.session_active = {}       # session key -> active, to report state transitions
+
+    def _com(self, device_id, func, *args):
+        return self.guard.call(device_id, func, *args, timeout=self.timeout)
+
+    def _resolve(self, device):
+        if device is None:
+            device = self.state.default_device_id()
+        info = self.cache.get(device)
+        if info is None:
+            # The device may have been plugged in since the last enumeration.
+            self._com(self.global_key, self.cache.refresh)
+            info = self.cache.get(device)
+        if info is None:
+            raise BackendError(f"Unknown device: {device!r}")
+        return info
+
+    def _context(self, name):
+        name = name or self.context_name
+        with self._lock:
+            context = self.contexts.get(name)
+            if context is None:
+                context = self.contexts[name] = self.volume.new_event_context(name)
+        return context
+
+    def _audio_volume(self, info):
+        audio_volume = self._com(info.device_id, self.cache.audio_volume, info.device_id)
+        if info.device_id not in self.volume_clients:
+            # On the device's worker, so concurrent first calls register one callback between them
+            self._com(info.device_id, self._watch, info.device_id, audio_volume)
+        return audio_volume
+
+    def _watch(self, device_id, audio_volume):
+        # Runs on the device's guard worker.
+        with self._lock:
+            if device_id in self.volume_clients:
+                return
+
+        def on_change(level, muted, source):
+            self.state.update(device_id, level, muted)
+            self._emit({"event": "volume", "device": device_id, "level": level,
+                        "muted": muted, "source": source})
+
+        self.guard.set_probe(device_id, lambda: self.volume.get_mute(audio_volume))
+        client = self.volume.VolumeNotificationClient(on_change)
+        try:
+            self.volume.register_volume_notification(audio_volume, client)
+        except OSError as e:
+            # Without the callback, writes made here are still reported by _changed.
+            print(f"Volume notifications unavailable for {device_id}:", e)
+            client.close()
+            client = None
+        with self._lock:
+            self.volume_clients[device_id] = client
+        self.state.set_watched(device_id, client is not None)
+
+    def _state(self, info):
+        self._audio_volume(info)
+        level, muted = self.state.volume(info.device_id)
+        return {"device": info.device_id, "level": level, "muted": muted}
+
+    def _changed(self, info, context):
+        # Read the written value back from the device, not a notification still in flight
+        self.state.invalidate(info.device_id)
+        state = self._state(info)
+        if self.volume_clients.get(info.device_id) is None:
+            self._emit(dict(state, event="volume", source=context.owner))
+        return state
+
+    def list_devices(self, flow="all"):
+        data_flow = parse_flow(flow)
+        defaults = {f: self.state.default_device_id(f) for f in FLOW_NAMES}
+        return [
+            {"id": info.device_id, "name": info.name, "flow": FLOW_NAMES.get(info.data_flow),
+             "default": defaults.get(info.data_flow) == info.device_id,
+             "quarantined": self.guard.is_quarantined(info.device_id)}
+            for info in self.cache.devices(data_flow)
+        ]
+
+    def get_volume(self, device=None):
+        return self._state(self._resolve(device))
+
+    def watch_volume(self, device=None):
+        """Emits the endpoint's volume events from now on, whoever changes it (any other call on it does too)."""
+        self._audio_volume(self._resolve(device))
+
+    def set_volume(self, level, device=None, context=None):
+        info = self._resolve(device)
+        context = self._context(context)
+        self._com(info.device_id, self.volume.set_master_volume, self._audio_volume(info),
+                  clamp_level(level), context)
+        return self._changed(info, context)
+
+    def step_volume(self, direction, device=None, context=None):
+        info = self._resolve(device)
+        if direction == "up":
+            step = self.volume.volume_step_up
+        elif direction == "down":
+            step = self.volume.volume_step_down
+        else:
+            raise BackendError(f"Invalid step direction: {direction!r}")
+        context = self._context(context)
+        self._com(info.device_id, step, self._audio_volume(info), context)
+        return self._changed(info, context)
+
+    def set_mute(self, muted=None, device=None, context=None):
+        info = self._resolve(device)
+        context = self._context(context)
+        audio_volume = self._audio_volume(info)
+        if muted is None:
+            muted = not self.state.muted(info.device_id)
+        self._com(info.device_id, self.volume.set_mute, audio_volume, bool(muted), context)
+        return self._changed(info, context)
+
+    def get_volume_db(self, device=None):
+        info = self._resolve(device)
+        audio_volume = self._audio_volume(info)
+        min_db, max_db, increment = self._com(info.device_id, self.volume.get_volume_range, audio_volume)
+        return {"device": info.device_id,
+                "db": self.state.volume_db(info.device_id),
+                "min_db": min_db, "max_db": max_db, "increment": increment}
+
+    def set_volume_db(self, db, device=None, context=None):
+        info = self._resolve(device)
+        context = self._context(context)
+        audio_volume = self._audio_volume(info)
+        min_db, max_db, _ = self._com(info.device_id, self.volume.get_volume_range, audio_volume)
+        db = min(max_db, max(min_db, parse_db(db)))
+        self._com(info.device_id, self.volume.set_master_volume_db, audio_volume, db, context)
+        return self._changed(info, context)
+
+    def get_channels(self, device=None):
+        info = self._resolve(device)
+        channels = self._com(info.device_id, self.volume.get_channel_volumes, self._audio_volume(info))
+        return {"device": info.device_id, "channels": channels}
+
+    def set_channels(self, levels, device=None, context=None):
+        info = self._resolve(device)
+        levels = parse_channels(levels)
+        context = self._context(context)
+        audio_volume = self._audio_volume(info)
+        count = self._com(info.device_id, self.volume.get_channel_count, audio_volume)
+        if len(levels) != count:
+            raise BackendError(f"{info.device_id} has {count} channels, got {len(levels)} levels")
+        for channel, level in enumerate(levels):
+            self._com(info.device_id, self.volume.set_channel_volume, audio_volume, channel, level, context)
+        return self._changed(info, context)
+
+    def set_default(self, device):
+        info = self._resolve(device)
+        self._com(info.device_id, self.volume.switch_default_device, info.device, self._context(None))
+        flow = FLOW_NAMES.get(info.data_flow)
+        self._emit({"event": "default", "device": info.device_id, "flow": flow})
+        return {"device": info.device_id, "flow": flow}
+
+    def communications_device(self, flow="render"):
+        return self.state.default_device_id(parse_flow(flow), self.volume.ERole_eCommunications)
+
+    def open_loopback(self, device=None, buffer_seconds=0.2):
+        """Opens a volume.LoopbackCapture on a render endpoint (a loudness packet source)."""
+        info = self._resolve(device)
+        return self._com(info.device_id, self.volume.LoopbackCapture, info.device, buffer_seconds)
+
+    def list_sessions(self, device=None):
+        sessions = []
+        with self._lock:
+            trackers = list((self.session_trackers or {}).items())
+        for device_id, tracker in trackers:
+            if device is None or device_id == device:
+                sessions.extend(self._session_dict(device_id, session)
+                                for session in self._com(device_id, tracker.list))
+        return sessions
+
+    def set_session_volume(self, process, level, device=None, context=None):
+        if self.session_trackers is None:
+            raise BackendError("Sessions are not being tracked (call watch_sessions first).")
+        level = clamp_level(level)
+        process = parse_process(process)
+        context = self._context(context)
+        changed = []
+        with self._lock:
+            trackers = list(self.session_trackers.items())
+        for device_id, tracker in trackers:
+            if device is not None and device_id != device:
+                continue
+            for session in self._com(device_id, tracker.list):
+                if (session.process_name or "").lower() == process:
+                    self._com(device_id, tracker.set_volume, session.key, level, context)
+                    changed.append(dict(self._session_dict(device_id, session), level=level))
+        return changed
+
+    def _session_dict(self, device_id, session):
+        return {"device": device_id, "pid": session.pid, "process": session.process_name,
+                "level": session.level, "muted": session.muted,
+                "active": session.state == self.volume.AudioSessionStateActive}
+
+    def watch_sessions(self):
+        """
+        Tracks the audio sessions of every render endpoint (and of render
+        endpoints added later, with watch_endpoints) and emits session events.
+        Later calls do nothing.
+        """
+        with self._lock:
+            if self.session_trackers is not None:
+                return
+            self.session_trackers = {}
+        for info in self.cache.devices(self.volume.EDataFlow_eRender):
+            self._track_sessions(info)
+
+    def _track_sessions(self, info):
+        def on_change(session, kind):
+            # Called on COM threads by the tracker.
+            self._on_session_change(info.device_id, session, kind)
+        try:
+            tracker = self._com(info.device_id, self.volume.AudioSessionTracker, info.device, on_change)
+        except OSError as e:
+            print(f"Audio sessions unavailable for {info.device_id}:", e)
+            return
+        with self._lock:
+            self.session_trackers[info.device_id] = tracker
+
+    def _on_session_change(self, device_id, session, kind):
+        event = dict(self._session_dict(device_id, session), event="session", source=session.source)
+        if kind == "added":
+            self.session_active[session.key] = event["active"]
+            change = "added"
+        elif kind == "removed":
+            self.session_active.pop(session.key, None)
+            change = "removed"
+        elif self.session_active.get(session.key) != event["active"]:
+            self.session_active[session.key] = event["active"]
+            change = "active" if event["active"] else "inactive"
+        else:
+            change = "volume"
+        event["change"] = change
+        self._emit(event)
+
+    def watch_endpoints(self):
+        """
+        Registers for endpoint notifications, after which device add/remove
+        and default-device changes are emitted as events too. Later calls do
+        nothing.
+        """
+        with self._lock:
+            if self.coalescer is not None:
+                return
+            self.coalescer = EndpointChangeCoalescer(self._on_endpoint_changes)
+        self.endpoint_client = self.volume.EndpointNotificationClient(self.coalescer.submit)
+        self._com(self.global_key, self.volume.register_endpoint_notification,
+                  self.cache.enumerator, self.endpoint_client)
+        self.cache.track_defaults = True
+
+    def _on_endpoint_changes(self, changes):
+        # Called on the coalescer thread with one debounced batch.
+        before = set(self.cache.endpoints)
+        self._com(self.global_key, self.cache.apply_changes, changes)
+        self.state.apply_changes(changes)
+        for device_id, outcome in changes.devices.items():
+            info = self.cache.get(device_id)
+            if info is not None and (device_id not in before or outcome == ADDED):
+                # A (re-)added endpoint is a new device instance: the interfaces and
+                # callbacks registered on the old one no longer report anything.
+                watched = device_id in self.volume_clients
+                self._unwatch(device_id)
+                if watched:
+                    try:
+                        self._audio_volume(info)
+                    except OSError as e:
+                        print(f"Could not watch re-added endpoint {device_id}:", e)
+                if self.session_trackers is not None and info.data_flow == self.volume.EDataFlow_eRender:
+                    self._track_sessions(info)
+                self._emit({"event": "device", "change": "added", "device": device_id,
+                            "name": info.name, "flow": FLOW_NAMES.get(info.data_flow)})
+            elif info is None and device_id in before:
+                self._unwatch(device_id)
+                self._emit({"event": "device", "change": "removed", "device": device_id})
+            elif info is not None and outcome == CHANGED:
+                self._emit({"event": "device", "change": "changed", "device": device_id,
+                            "name": info.name, "flow": FLOW_NAMES.get(info.data_flow)})
+        for (data_flow, role), device_id in changes.defaults.items():
+            if role == self.volume.ERole_eConsole and device_id is not None:
+                self._emit({"event": "default", "device": device_id, "flow": FLOW_NAMES.get(data_flow)})
+
+    def _unwatch(self, device_id):
+        """Drops the volume callback and session tracker of an endpoint that went away or was re-added."""
+        with self._lock:
+            client = self.volume_clients.pop(device_id, None)
+            tracker = (self.session_trackers or {}).pop(device_id, None)
+        if client is not None:
+            client.close()
+        self.state.set_watched(device_id, False)
+        self.state.invalidate(device_id)
+        if tracker is not None:
+            try:
+                self._com(device_id, tracker.close)
+            except OSError as e:
+                print(f"Could not close the session tracker of {device_id}:", e)
+
+    def metrics(self):
+        with self._lock:
+            clients = list(self.volume_clients.items())
+        return {"guard": self.guard.metrics(), "state": self.state.metrics(),
+                "notifications": {device_id: client.stats for device_id, client in clients if client}}
@@ -0,0 +1,280 @@
+"""
+Append-only audit journal of volume, mute and default-device changes.
+
+Recording: volume.set_audit_journal(AuditJournal(path)) (or `python -m
+volume --audit FILE`) makes set_master_volume(_db), set_channel_volume, set_mute,
+the step helpers and switch_default_device append one record per successful change: when, which
+endpoint, what changed, and who did it (OS user, process and the event
+context owner, e.g. "gui" or "control-server"). record() only packs a
+fixed-width struct into a list; a background thread writes the batch every
+`flush_interval` seconds and fsyncs every `fsync_interval`, so journaling
+never adds file I/O to the caller's thread.
+
+Querying: AuditReader memory-maps the journal. Records are fixed-width and
+appended in time order, so a time range is found by binary search and only
+the matching slice is decoded.
+
+    python audit_journal.py query audit.vcaj --since 2024-05-01T08:00 --device "{0.0.0.00000000}.{...}"
+    python audit_journal.py synth audit.vcaj --records 1000000
+
+File layout (little endian):
+    header  b"VCAJ" u16 version, u16 record size, 8 reserved bytes
+    record  f64 unix time, u8 op, u8 flags, u16 reserved, u32 pid,
+            f32 old value, f32 new value (NaN when unknown),
+            24s actor, 16s user, 64s endpoint ID (UTF-8, NUL padded)
+"""
+import bisect
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from volume.core import (OP_SET_CHANNEL_VOLUME, OP_SET_DEFAULT, OP_SET_MUTE, OP_SET_VOLUME, OP_SET_VOLUME_DB,
+                         OP_STEP_DOWN, OP_STEP_UP, UNKNOWN)
+
+MAGIC = b"VCAJ"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHH8x")
+_RECORD = struct.Struct("<dBBHIff24s16s64s")
+
+OP_NAMES = {OP_SET_VOLUME: "set_volume", OP_SET_MUTE: "set_mute", OP_STEP_UP: "step_up",
+            OP_STEP_DOWN: "step_down", OP_SET_DEFAULT: "set_default", OP_SET_VOLUME_DB: "set_volume_db",
+            OP_SET_CHANNEL_VOLUME: "set_channel_volume"}
+
+AuditRecord = namedtuple("AuditRecord", "time op pid old new actor user device")
+
+
+def _text(value, size):
+    # Cut at a character boundary so the field always decodes
+    return (value or "").encode("utf-8")[:size].decode("utf-8", "ignore").encode("utf-8")
+
+
+class AuditJournal:
+    """Batched, append-only writer. Safe to call record() from any thread."""
+
+    def __init__(self, path, flush_interval=0.5, fsync_interval=5.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        import getpass
+        self.user = _text(getpass.getuser(), 16)
+        self.pid = os.getpid()
+        self.stats = {"records": 0, "batches": 0, "fsyncs": 0}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._file, self._last_time = _open_for_append(path)
+        self._thread = threading.Thread(target=self._run, name="audit-journal", daemon=True)
+        self._thread.start()
+
+    def record(self, op, device_id, new=UNKNOWN, old=UNKNOWN, actor=None):
+        actor, device_id = _text(actor, 24), _text(device_id, 64)
+        with self._lock:
+            # Timestamps must not go backwards (clock steps, racing threads): query() bisects them
+            self._last_time = max(time.time(), self._last_time)
+            self._pending.append(_RECORD.pack(self._last_time, op, 0, 0, self.pid, old, new,
+                                              actor, self.user, device_id))
+
+    def _write_pending(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._file.write(b"".join(batch))
+            self._file.flush()
+            self.stats["records"] += len(batch)
+            self.stats["batches"] += 1
+        return bool(batch)
+
+    def _fsync(self):
+        os.fsync(self._file.fileno())
+        self.stats["fsyncs"] += 1
+
+    def _run(self):
+        last_sync = time.monotonic()
+        dirty = False
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            dirty |= self._write_pending()
+            if dirty and time.monotonic() - last_sync >= self.fsync_interval:
+                self._fsync()
+                last_sync = time.monotonic()
+                dirty = False
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self._write_pending()
+        self._fsync()
+        self._file.close()
+
+
+def _open_for_append(path):
+    """
+    Opens (or creates) a journal for appending and returns (file, timestamp
+    of its last record or 0). A partial record left by a crash is cut off
+    first, so the records appended after it stay aligned.
+    """
+    f = open(path, "a+b")
+    try:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            f.write(_HEADER.pack(MAGIC, VERSION, _RECORD.size))
+            f.flush()
+            return f, 0.0
+        f.seek(0)
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size or _HEADER.unpack(header) != (MAGIC, VERSION, _RECORD.size):
+            raise ValueError(f"{path} is not a version {VERSION} audit journal")
+        count = (size - _HEADER.size) // _RECORD.size
+        end = _HEADER.size + count * _RECORD.size
+        if end != size:
+            print(f"Dropping {size - end} bytes of a partial record at the end of {path}")
+            f.truncate(end)
+        if not count:
+            return f, 0.0
+        f.seek(end - _RECORD.size)
+        return f, struct.unpack("<d", f.read(8))[0]
+    except BaseException:
+        f.close()
+        raise
+
+
+class AuditReader:
+    """Memory-mapped, read-only view of a journal file."""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < _HEADER.size:
+            raise ValueError(f"{path} is not an audit journal")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != _RECORD.size:
+            raise ValueError(f"{path} is not a version {VERSION} audit journal")
+        # A crash can leave a partial record at the end; it is ignored here and cut off
+        # when the journal is next opened for writing.
+        self.count = (size - _HEADER.size) // _RECORD.size
+        self.times = _TimeColumn(self._map, self.count)
+
+    def __len__(self):
+        return self.count
+
+    def _decode(self, index):
+        t, op, _, _, pid, old, new, actor, user, device = _RECORD.unpack_from(
+            self._map, _HEADER.size + index * _RECORD.size)
+        # Journals written before fields were cut at character boundaries may end mid-character
+        return AuditRecord(t, OP_NAMES.get(op, str(op)), pid, old, new,
+                           actor.rstrip(b"\0").decode("utf-8", "ignore"), user.rstrip(b"\0").decode("utf-8", "ignore"),
+                           device.rstrip(b"\0").decode("utf-8", "ignore"))
+
+    def query(self, since=None, until=None, device=None, op=None):
+        """Yields AuditRecords with since <= time < until, optionally for one endpoint ID and op name."""
+        first = 0 if since is None else bisect.bisect_left(self.times, since)
+        last = self.count if until is None else bisect.bisect_left(self.times, until)
+        device_field = _text(device, 64).ljust(64, b"\0") if device is not None else None
+        device_offset = _RECORD.size - 64
+        for index in range(first, last):
+            if device_field is not None:
+                start = _HEADER.size + index * _RECORD.size + device_offset
+                if self._map[start:start + 64] != device_field:
+                    continue
+            record = self._decode(index)
+            if op is None or record.op == op:
+                yield record
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class _TimeColumn:
+    """Sequence view of the record timestamps, for bisect."""
+
+    def __init__(self, buffer, count):
+        self.buffer = buffer
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return struct.unpack_from("<d", self.buffer, _HEADER.size + index * _RECORD.size)[0]
+
+
+def _parse_time(text):
+    import datetime
+    if text is None:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.datetime.fromisoformat(text).timestamp()
+
+
+def _format_value(value):
+    return "-" if math.isnan(value) else f"{value:.3f}"
+
+
+def write_synthetic_journal(path, records, devices=8, span=86400.0):
+    """Writes `records` evenly spaced records over `span` seconds ending now (for benchmarking queries)."""
+    device_ids = [f"{{0.0.0.00000000}}.{{synthetic-{i}}}" for i in range(devices)]
+    start = time.time() - span
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, _RECORD.size))
+        chunk = []
+        for i in range(records):
+            chunk.append(_RECORD.pack(start + span * i / records, OP_SET_VOLUME, 0, 0, 1000,
+                                      UNKNOWN, (i % 100) / 100.0, b"synthetic", b"audit",
+                                      device_ids[i % devices].encode()))
+            if len(chunk) == 10000:
+                f.write(b"".join(chunk))
+                chunk = []
+        f.write(b"".join(chunk))
+    return device_ids
+
+
+def main():
+    # CLI-only imports, kept out of `import audit_journal` (the GUI imports it when journaling is enabled)
+    import argparse
+    import datetime
+    parser = argparse.ArgumentParser(description="Audit journal of volume changes")
+    commands = parser.add_subparsers(dest="command", required=True)
+    query = commands.add_parser("query", help="list records by time range and device")
+    query.add_argument("journal")
+    query.add_argument("--since", help="ISO date/time or unix seconds")
+    query.add_argument("--until", help="ISO date/time or unix seconds")
+    query.add_argument("--device", help="endpoint ID")
+    query.add_argument("--op", choices=sorted(OP_NAMES.values()))
+    query.add_argument("--count", action="store_true", help="print only the number of matches")
+    synth = commands.add_parser("synth", help="write a synthetic journal")
+    synth.add_argument("journal")
+    synth.add_argument("--records", type=int, default=1000000)
+    args = parser.parse_args()
+
+    if args.command == "synth":
+        write_synthetic_journal(args.journal, args.records)
+        print(f"Wrote {args.records} records to {args.journal}")
+        return
+
+    reader = AuditReader(args.journal)
+    start = time.perf_counter()
+    matches = 0
+    for record in reader.query(_parse_time(args.since), _parse_time(args.until), args.device, args.op):
+        matches += 1
+        if not args.count:
+            when = datetime.datetime.fromtimestamp(record.time).isoformat(timespec="milliseconds")
+            print(f"{when} {record.user}/{record.actor}[{record.pid}] {record.op} {record.device} "
+                  f"{_format_value(record.old)} -> {_format_value(record.new)}")
+    elapsed = time.perf_counter() - start
+    print(f"{matches} of {len(reader)} records matched in {elapsed * 1000:.1f} ms")
+    reader.close()
+
+
+if __name__ == "__main__":
+    main()
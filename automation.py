@@ -0,0 +1,360 @@
+"""
+Rule-based automation: volume actions triggered by time, device and session
+events.
+
+Rules are read from JSON:
+
+    {"rules": [
+      {"name": "night cap", "at": "22:00", "days": ["mon", "tue", "wed", "thu", "fri"],
+       "actions": [{"cap": 0.2, "flow": "render"}]},
+      {"name": "headset", "when": {"device": "added", "name": "Headset"},
+       "actions": [{"default": true}, {"set": 0.6}]},
+      {"name": "meeting", "when": {"session": "active", "process": "Teams.exe"},
+       "actions": [{"session_volume": 0.2, "process": "Spotify.exe"}]}
+    ]}
+
+Triggers are a local time of day ("at" HH:MM[:SS], optionally limited to
+"days"), a device event ("added", "removed" or "default", optionally for one
+endpoint "id" or friendly "name") or a session event ("added", "removed",
+"active" or "inactive", optionally for one "process").
+
+Actions are "set" (0..1), "set_db", "position" (a calibrated 0..100 slider
+position, see calibration.py), "cap" (lower to at most this level),
+"mute" (true/false), "default" (make the endpoint the default) and
+"session_volume" (with "process"). An action applies to its "device" (ID),
+"name", every endpoint of a "flow", or else to the endpoint that triggered
+the rule (the default render endpoint for time rules).
+
+Time rules sit in one heap ordered by their next firing time and the engine
+thread sleeps until the earliest one; event rules are indexed by trigger and
+filter, so an event costs a few dict lookups however many rules are loaded.
+Everything that fires together becomes one batch: the last level written to
+an endpoint wins, caps keep the lowest, and the endpoints are written
+concurrently through the backend under the engine's own context name.
+"""
+import concurrent.futures
+import heapq
+import itertools
+import json
+import threading
+import time
+
+from audio_backend import FLOW_VALUES, clamp_level
+
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DEVICE_CHANGES = ("added", "removed", "default")
+SESSION_CHANGES = ("added", "removed", "active", "inactive")
+ACTIONS = ("set", "set_db", "position", "cap", "mute", "default", "session_volume")
+
+# Upper bound on one scheduler sleep, so wall-clock jumps (DST, resume from
+# sleep) delay a time rule by at most this much.
+MAX_SLEEP = 60.0
+
+
+class Action:
+    __slots__ = ("kind", "value", "device", "name", "flow", "process")
+
+    def __init__(self, config):
+        kinds = [kind for kind in ACTIONS if kind in config]
+        if len(kinds) != 1:
+            raise ValueError(f"Action needs exactly one of {', '.join(ACTIONS)}: {config!r}")
+        self.kind = kinds[0]
+        self.value = config[self.kind]
+        self.device = config.get("device")
+        self.name = config.get("name", "").lower() or None
+        self.flow = config.get("flow")
+        self.process = config.get("process")
+        if self.flow is not None and self.flow not in FLOW_VALUES:
+            raise ValueError(f"Unknown data flow: {self.flow!r}")
+        if self.kind == "session_volume" and not self.process:
+            raise ValueError("session_volume needs a process")
+
+
+class Rule:
+    """One parsed rule. `trigger` is ("time", None) or ("device"|"session", change)."""
+
+    def __init__(self, config):
+        self.name = config.get("name", "")
+        self.actions = [Action(action) for action in config.get("actions", ())]
+        if not self.actions:
+            raise ValueError(f"Rule {self.name!r} has no actions")
+        self.at = None
+        self.days = None
+        self.filter = None
+        if "at" in config:
+            parts = [int(part) for part in config["at"].split(":")]
+            if not 2 <= len(parts) <= 3:
+                raise ValueError(f"Rule {self.name!r}: 'at' must be HH:MM or HH:MM:SS")
+            self.at = tuple(parts + [0] * (3 - len(parts)))
+            self.days = frozenset(DAYS.index(day.lower()[:3]) for day in config.get("days", DAYS))
+            self.trigger = ("time", None)
+            return
+        when = config.get("when", {})
+        if "device" in when:
+            category, changes = "device", DEVICE_CHANGES
+            if "id" in when:
+                self.filter = ("id", when["id"])
+            elif "name" in when:
+                self.filter = ("name", when["name"].lower())
+        elif "session" in when:
+            category, changes = "session", SESSION_CHANGES
+            if "process" in when:
+                self.filter = ("process", when["process"].lower())
+        else:
+            raise ValueError(f"Rule {self.name!r} needs 'at' or a 'when' device/session trigger")
+        if when[category] not in changes:
+            raise ValueError(f"Rule {self.name!r}: unknown {category} change {when[category]!r}")
+        self.trigger = (category, when[category])
+
+    def __repr__(self):
+        return f"Rule({self.name!r}, {self.trigger!r})"
+
+    def next_time(self, now):
+        """The first local time after `now` matching `at` on one of `days`."""
+        t = time.localtime(now)
+        hour, minute, second = self.at
+        for offset in range(8):
+            # mktime normalizes a day of month past the end of the month.
+            candidate = time.mktime((t.tm_year, t.tm_mon, t.tm_mday + offset, hour, minute, second, 0, 0, -1))
+            if candidate > now and time.localtime(candidate).tm_wday in self.days:
+                return candidate
+        return None
+
+
+def load_rules(path):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    return [Rule(entry) for entry in config.get("rules", [])]
+
+
+class TimerHeap:
+    """Deadlines in a binary heap: O(log n) to add or pop, O(1) to peek."""
+
+    def __init__(self):
+        self._heap = []
+        self._order = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, when, item):
+        heapq.heappush(self._heap, (when, next(self._order), item))
+
+    def next_deadline(self):
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Removes and returns the items whose deadline is <= now, earliest first."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+
+class RuleEngine:
+    """
+    Runs `rules` against `backend`. For device and session triggers the
+    backend must emit those events (ComAudioBackend.watch_endpoints() and
+    watch_sessions()). Call start() to begin and close() to stop.
+    """
+    def __init__(self, backend, rules, context_name="automation", max_workers=8, clock=time.time):
+        self.backend = backend
+        self.rules = list(rules)
+        self.context_name = context_name
+        self.clock = clock
+        self.index = {}   # (category, change, filter) -> [Rule]
+        self.timers = TimerHeap()
+        for rule in self.rules:
+            if rule.trigger[0] != "time":
+                self.index.setdefault(rule.trigger + (rule.filter,), []).append(rule)
+        self.devices = {}   # endpoint ID -> (lowercase name, flow); changed under _cond
+        self.stats = {"events": 0, "fired": 0, "batches": 0, "writes": 0, "skipped_writes": 0, "errors": 0}
+        self._pending = []   # (rule, trigger event)
+        self._cond = threading.Condition()
+        self._closed = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="rule-write")
+        self._thread = threading.Thread(target=self._run, name="automation", daemon=True)
+
+    def start(self):
+        with self._cond:
+            for device in self.backend.list_devices():
+                self.devices[device["id"]] = (device["name"].lower(), device["flow"])
+        now = self.clock()
+        for rule in self.rules:
+            if rule.trigger[0] == "time":
+                when = rule.next_time(now)
+                if when is not None:
+                    self.timers.push(when, rule)
+        self.backend.add_listener(self.on_event)
+        self._thread.start()
+        return self
+
+    # -------------------------------
+    # Event intake (backend threads)
+    # -------------------------------
+    def match(self, event):
+        """Returns the rules triggered by one backend event."""
+        category = event.get("event")
+        if category not in ("device", "session"):
+            return []
+        change = event.get("change")
+        if category == "device":
+            known = self.devices.get(event["device"])
+            name = event.get("name", "").lower() or (known[0] if known else None)
+            filters = (None, ("id", event["device"]), ("name", name))
+        else:
+            filters = (None, ("process", (event.get("process") or "").lower()))
+        matched = []
+        for key in filters:
+            matched.extend(self.index.get((category, change, key), ()))
+        return matched
+
+    def on_event(self, event):
+        category = event.get("event")
+        if category == "default":
+            # Default changes arrive as their own event kind; rules see them as device events.
+            event = dict(event, event="device", change="default")
+        elif category == "device":
+            if event["change"] in ("added", "changed"):
+                with self._cond:
+                    self.devices[event["device"]] = (event.get("name", "").lower(), event.get("flow"))
+        elif category != "session":
+            return
+        self.stats["events"] += 1
+        matched = self.match(event)
+        if event.get("change") == "removed" and event["event"] == "device":
+            with self._cond:
+                self.devices.pop(event["device"], None)
+        if not matched:
+            return
+        with self._cond:
+            self._pending.extend((rule, event) for rule in matched)
+            self._cond.notify()
+
+    # -------------------------------
+    # Scheduling (engine thread)
+    # -------------------------------
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    now = self.clock()
+                    deadline = self.timers.next_deadline()
+                    if self._pending or (deadline is not None and deadline <= now):
+                        break
+                    self._cond.wait(MAX_SLEEP if deadline is None else min(MAX_SLEEP, deadline - now))
+                fired, self._pending = self._pending, []
+                for rule in self.timers.pop_due(now):
+                    fired.append((rule, None))
+                    when = rule.next_time(now)
+                    if when is not None:
+                        self.timers.push(when, rule)
+            try:
+                self.run_batch(fired)
+            except Exception as e:
+                # A bad batch must not stop the rules that come after it
+                self.stats["errors"] += 1
+                print("Automation batch failed:", repr(e))
+
+    # -------------------------------
+    # Actions
+    # -------------------------------
+    def _targets(self, action, event):
+        if action.device is not None:
+            return [action.device]
+        if action.name is not None or action.flow is not None:
+            # The backend's notification thread adds and removes devices while we run
+            with self._cond:
+                devices = list(self.devices.items())
+        if action.name is not None:
+            return [device_id for device_id, (name, _) in devices if name == action.name]
+        if action.flow is not None:
+            return [device_id for device_id, (_, flow) in devices
+                    if action.flow == "all" or flow == action.flow]
+        if event is not None:
+            # The endpoint that changed, or the one the triggering session plays on.
+            return [event["device"]]
+        return [None]
+
+    def run_batch(self, fired):
+        """Merges the actions of the fired (rule, event) pairs and writes them."""
+        if not fired:
+            return
+        self.stats["batches"] += 1
+        self.stats["fired"] += len(fired)
+        plans = {}      # endpoint ID -> {"level": ("set"|"set_db"|"position", value), "cap": value, "mute": bool}
+        defaults = []   # endpoint IDs to make default, in order
+        sessions = {}   # (process, endpoint ID) -> level
+        for rule, event in fired:
+            for action in rule.actions:
+                if action.kind == "session_volume":
+                    sessions[(action.process.lower(), action.device)] = clamp_level(action.value)
+                    continue
+                for device_id in self._targets(action, event):
+                    if action.kind == "default":
+                        if action.value and device_id not in defaults:
+                            defaults.append(device_id)
+                        continue
+                    plan = plans.setdefault(device_id, {})
+                    if action.kind == "cap":
+                        plan["cap"] = min(plan.get("cap", 1.0), clamp_level(action.value))
+                    elif action.kind == "mute":
+                        plan["mute"] = bool(action.value)
+                    else:
+                        plan["level"] = (action.kind, action.value)
+        for device_id in defaults:
+            self._guarded(self.backend.set_default, device_id)
+        writes = [self._executor.submit(self._apply, device_id, plan) for device_id, plan in plans.items()]
+        writes += [self._executor.submit(self._guarded, self.backend.set_session_volume, process, level,
+                                         device, context=self.context_name)
+                   for (process, device), level in sessions.items()]
+        concurrent.futures.wait(writes)
+
+    def _guarded(self, func, *args, **kwargs):
+        try:
+            result = func(*args, **kwargs)
+            self.stats["writes"] += 1
+            return result
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Automation action {func.__name__} failed:", e)
+
+    def _apply(self, device_id, plan):
+        level = plan.get("level")
+        if level is not None:
+            kind, value = level
+            if kind == "set_db":
+                self._guarded(self.backend.set_volume_db, value, device_id, context=self.context_name)
+            elif kind == "position":
+                # One lookup in the device's calibration table.
+                self._guarded(self.backend.set_position, value, device_id, context=self.context_name)
+            else:
+                value = clamp_level(value)
+                if "cap" in plan:
+                    value = min(value, plan["cap"])
+                self._guarded(self.backend.set_volume, value, device_id, context=self.context_name)
+        if "cap" in plan and (level is None or level[0] != "set"):
+            # Served from the backend's state cache, not a fresh COM read.
+            try:
+                current = self.backend.get_volume(device_id)["level"]
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Automation could not read {device_id}:", e)
+            else:
+                if current > plan["cap"]:
+                    self._guarded(self.backend.set_volume, plan["cap"], device_id, context=self.context_name)
+                else:
+                    self.stats["skipped_writes"] += 1
+        if "mute" in plan:
+            self._guarded(self.backend.set_mute, plan["mute"], device_id, context=self.context_name)
+
+    def close(self):
+        self.backend.remove_listener(self.on_event)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._executor.shutdown()
@@ -0,0 +1,105 @@
+"""
+Calibration tables: lookup cost and loudness agreement across devices.
+
+Three simulated endpoints with different dB ranges and different acoustic
+responses (a model of what an SPL meter would read at each endpoint dB
+setting) are calibrated from a few modelled measurements and a shared
+full-scale level. Reports:
+
+  - compile time per profile, and the time to load the tables back from
+    the calibration file;
+  - the cost of one position -> dB and one dB -> position lookup, against
+    evaluating the curve for every event;
+  - the level each device produces at slider positions 25/50/75/100,
+    calibrated versus the plain linear scalar mapping.
+
+    python benchmarks/calibration_lookup.py --lookups 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calibration
+from audio_backend import SimulatedAudioBackend, SimulatedDevice
+
+# device ID -> (name, volume range, acoustic model: endpoint dB -> measured dB SPL)
+DEVICES = {
+    "{sim-speakers}": ("Desk speakers", (-65.25, 0.0, 0.75), lambda db: 92.0 + db),
+    "{sim-headphones}": ("Headphones", (-96.0, 0.0, 0.5), lambda db: 104.0 + 1.15 * db),
+    "{sim-hdmi}": ("HDMI TV", (-46.5, 0.0, 1.5), lambda db: 85.0 + 0.8 * db if db > -30 else 91.0 + db),
+}
+MEASURE_AT = (-40.0, -30.0, -20.0, -10.0, 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibration table lookup cost and cross-device loudness")
+    parser.add_argument("--lookups", type=int, default=1000000)
+    parser.add_argument("--full-scale", type=float, default=80.0, help="shared level (dB SPL) for position 100")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "calibration.json")
+    store = calibration.CalibrationStore(path)
+    for device_id, (_, volume_range, response) in DEVICES.items():
+        for db in MEASURE_AT:
+            if volume_range[0] <= db <= volume_range[1]:
+                store.measure(device_id, db, response(db))
+    store.set_full_scale(args.full_scale)
+    backend = SimulatedAudioBackend([SimulatedDevice(device_id, name, db_range=volume_range)
+                                     for device_id, (name, volume_range, _) in DEVICES.items()],
+                                    calibration=store)
+
+    start = time.perf_counter()
+    for device_id in DEVICES:
+        backend.get_position(device_id)   # compiles and saves the table
+    compile_ms = (time.perf_counter() - start) * 1000 / len(DEVICES)
+    start = time.perf_counter()
+    reloaded = calibration.CalibrationStore(path)
+    for device_id, (_, volume_range, _) in DEVICES.items():
+        reloaded.table(device_id, volume_range)
+    load_ms = (time.perf_counter() - start) * 1000
+    print(f"compile {compile_ms:.2f} ms per device, reload {len(DEVICES)} tables from the file in {load_ms:.2f} ms "
+          f"({reloaded.stats['loaded']} loaded, {reloaded.stats['compiled']} recompiled)")
+
+    table = store.get("{sim-headphones}")
+    profile = calibration.CalibrationProfile(DEVICES["{sim-headphones}"][1], store.devices["{sim-headphones}"]
+                                             ["measurements"], args.full_scale)
+    endpoint = [db for db, _ in profile.measurements]
+    measured = [level for _, level in profile.measurements]
+    positions = [i % 101 for i in range(args.lookups)]
+    levels = [table.to_db(position) + 0.01 for position in positions]
+    start = time.perf_counter()
+    for position in positions:
+        table.to_db(position)
+    to_db_ns = (time.perf_counter() - start) / args.lookups * 1e9
+    start = time.perf_counter()
+    for db in levels:
+        table.to_position(db)
+    to_position_ns = (time.perf_counter() - start) / args.lookups * 1e9
+    start = time.perf_counter()
+    for position in positions:
+        attenuation = calibration.perceptual_db(position)
+        if attenuation is not None:
+            calibration._interpolate(args.full_scale + attenuation, measured, endpoint)
+    curve_ns = (time.perf_counter() - start) / args.lookups * 1e9
+    print(f"position -> dB {to_db_ns:.0f} ns, dB -> position {to_position_ns:.0f} ns by table; "
+          f"position -> dB {curve_ns:.0f} ns by evaluating the curve")
+
+    print(f"{'':16}{'calibrated (dB SPL)':>32}    {'linear scalar (dB SPL)':>32}")
+    print(f"{'position':16}" + "".join(f"{p:>8}" for p in (25, 50, 75, 100)) * 2)
+    for device_id, (name, _, response) in DEVICES.items():
+        calibrated = []
+        linear = []
+        for position in (25, 50, 75, 100):
+            backend.set_position(position, device_id)
+            calibrated.append(response(backend.get_volume_db(device_id)["db"]))
+            backend.set_volume(position / 100, device_id)
+            linear.append(response(backend.get_volume_db(device_id)["db"]))
+        print(f"{name:16}" + "".join(f"{v:8.1f}" for v in calibrated) + "".join(f"{v:8.1f}" for v in linear))
+
+
+if __name__ == "__main__":
+    main()
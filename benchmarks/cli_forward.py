@@ -0,0 +1,67 @@
+"""
+End-to-end latency of a forwarded CLI command.
+
+Starts an InstanceEndpoint over the simulated backend in this process (as
+the GUI does over Core Audio), then times complete `python -m volume ...`
+invocations in fresh interpreters, plus in-process forward() round-trips.
+Runs on Linux; on Windows the same command without an instance pays for
+COM initialization and a full enumeration instead.
+
+    python benchmarks/cli_forward.py --runs 30 --command set 35
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from audio_backend import SimulatedAudioBackend
+from single_instance import InstanceEndpoint, forward, parse_command
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of CLI commands forwarded to a running instance")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=2000, help="in-process forward() round-trips")
+    parser.add_argument("--command", nargs="+", default=["get"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "instance")
+        endpoint = InstanceEndpoint(SimulatedAudioBackend, path).start()
+        env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+        env["VOLUME_INSTANCE_FILE"] = path
+        command = [sys.executable, "-m", "volume"] + args.command
+        try:
+            subprocess.run(command, cwd=ROOT, env=env, check=True, capture_output=True)
+            samples = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                subprocess.run(command, cwd=ROOT, env=env, check=True, capture_output=True)
+                samples.append(time.perf_counter() - start)
+            baseline = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, "-c", "pass"], env=env, check=True)
+                baseline.append(time.perf_counter() - start)
+            print(f"`python -m volume {' '.join(args.command)}`: median {statistics.median(samples) * 1000:.1f} ms, "
+                  f"min {min(samples) * 1000:.1f} ms over {args.runs} runs "
+                  f"(bare interpreter start: {statistics.median(baseline) * 1000:.1f} ms)")
+
+            method, params = parse_command(args.command)
+            start = time.perf_counter()
+            for _ in range(args.calls):
+                forward(method, params, path)
+            elapsed = time.perf_counter() - start
+            print(f"forward(): {elapsed / args.calls * 1e6:.0f} us per command (connect, request, response)")
+        finally:
+            endpoint.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Exercises the ducking engine against the simulated backend.
+
+A "Teams.exe" session starts, talks in bursts separated by pauses of
+`--pause` seconds (shorter than the hold time, which must not pump), and
+hangs up. Reports how many ducks and restores happened, how many ramp
+steps and writes they took, the ducked levels, and whether every endpoint
+and session came back to its exact original level.
+
+    python benchmarks/ducking_ramp.py --duck-db 15 --attack 0.3 --release 1.0 --hold 1.5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_backend import SimulatedAudioBackend, SimulatedDevice
+from ducking import DuckingEngine
+
+SPEAKERS = "{0.0.0.00000000}.{sim-speakers}"
+HEADSET = "{0.0.0.00000000}.{sim-headset}"
+
+
+def levels(backend):
+    return ({device_id: backend.get_volume(device_id)["level"] for device_id in backend.devices},
+            {(s["process"], s["device"]): s["level"] for s in backend.list_sessions()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ducking ramp, hysteresis and restore check")
+    parser.add_argument("--duck-db", type=float, default=15.0)
+    parser.add_argument("--attack", type=float, default=0.3)
+    parser.add_argument("--release", type=float, default=1.0)
+    parser.add_argument("--hold", type=float, default=1.5)
+    parser.add_argument("--bursts", type=int, default=6)
+    parser.add_argument("--pause", type=float, default=0.4, help="silence between talk bursts")
+    args = parser.parse_args()
+
+    backend = SimulatedAudioBackend()
+    backend.add_device(SimulatedDevice(HEADSET, "Simulated Headset", 0, 0.7))
+    backend.communications[0] = HEADSET
+    backend.add_session(SPEAKERS, 100, "Spotify.exe", level=0.9)
+    backend.add_session(SPEAKERS, 101, "chrome.exe", level=0.6)
+    backend.add_session(HEADSET, 200, "Teams.exe", active=False)
+    before = levels(backend)
+
+    engine = DuckingEngine(backend, args.duck_db, args.attack, args.release, args.hold,
+                           processes=["Teams.exe"]).start()
+    start = time.perf_counter()
+    for _ in range(args.bursts):
+        backend.set_session_active(HEADSET, 200, True)
+        time.sleep(max(args.attack, 0.2))
+        backend.set_session_active(HEADSET, 200, False)
+        time.sleep(args.pause)
+    backend.set_session_active(HEADSET, 200, True)
+    time.sleep(args.attack + 0.1)
+    ducked = levels(backend)
+    backend.set_session_active(HEADSET, 200, False)
+    while engine.depth > 0.0 or engine.stats["restores"] == 0:
+        time.sleep(0.02)
+    elapsed = time.perf_counter() - start
+    after = levels(backend)
+    engine.close()
+
+    print(f"{args.bursts + 1} talk bursts in {elapsed:.2f} s: {engine.stats['ducks']} duck(s), "
+          f"{engine.stats['restores']} restore(s), {engine.stats['steps']} ramp steps, "
+          f"{engine.stats['writes']} writes, {engine.stats['errors']} errors")
+    for device_id, level in before[0].items():
+        print(f"    endpoint {device_id:<34} {level:.3f} -> {ducked[0][device_id]:.3f} -> {after[0][device_id]:.3f}")
+    for key, level in before[1].items():
+        print(f"    session  {key[0]:<34} {level:.3f} -> {ducked[1][key]:.3f} -> {after[1][key]:.3f}")
+    print("exact restore:", before == after)
+
+
+if __name__ == "__main__":
+    main()
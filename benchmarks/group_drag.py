@@ -0,0 +1,68 @@
+"""
+Measures the COM writes caused by dragging one member of a linked volume group.
+
+A SimulatedAudioBackend (with `--latency` seconds per call) holds a group of
+`--members` endpoints. The leader is moved `--moves` times at `--drag-hz`,
+as a fast slider drag would, and the follower writes performed by
+VolumeGroupManager are compared with writing every follower on every move.
+
+    python benchmarks/group_drag.py --members 6 --moves 300 --rate 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_backend import SimulatedAudioBackend, SimulatedDevice
+from volume_groups import DB, SCALAR, VolumeGroup, VolumeGroupManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--members", type=int, default=6)
+    parser.add_argument("--moves", type=int, default=300)
+    parser.add_argument("--drag-hz", type=float, default=200.0)
+    parser.add_argument("--rate", type=float, default=20.0, help="max propagations per second (0: unlimited)")
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--mode", choices=(SCALAR, DB), default=SCALAR)
+    args = parser.parse_args()
+
+    devices = [SimulatedDevice(f"{{0.0.0.00000000}}.{{array-{i}}}", f"Array {i}", 0, 0.5)
+               for i in range(args.members)]
+    backend = SimulatedAudioBackend(devices, latency=args.latency)
+    step = -3.0 if args.mode == DB else -0.05
+    group = VolumeGroup("array", {dev.device_id: i * step for i, dev in enumerate(devices)}, args.mode)
+    manager = VolumeGroupManager(backend, [group], max_rate=args.rate).start()
+
+    leader = devices[0].device_id
+    start = time.perf_counter()
+    for i in range(args.moves):
+        backend.set_volume(0.3 + 0.6 * i / max(1, args.moves - 1), leader, context="gui")
+        time.sleep(1.0 / args.drag_hz)
+    drag_time = time.perf_counter() - start
+    # Wait for the trailing write of the final position.
+    time.sleep(manager.interval + 0.1)
+    manager.close()
+
+    expected = group.targets(leader, backend.get_volume_db(leader)["db"] if args.mode == DB
+                             else backend.get_volume(leader)["level"])
+    if args.mode == DB:
+        actual = {device_id: backend.get_volume_db(device_id)["db"] for device_id in expected}
+    else:
+        actual = {device_id: backend.get_volume(device_id)["level"] for device_id in expected}
+    in_step = all(abs(actual[device_id] - value) < 1e-3 for device_id, value in expected.items())
+
+    stats = manager.stats
+    naive = args.moves * (args.members - 1)
+    print(f"members={args.members} moves={args.moves} drag={drag_time:.2f}s rate={args.rate or 'unlimited'}")
+    print(f"leader events={stats['events']} propagations={stats['propagations']} "
+          f"echoes suppressed={stats['echoes']} errors={stats['errors']}")
+    print(f"follower writes={stats['writes']} (skipped {stats['skipped_writes']}) "
+          f"vs write-per-move={naive} ({naive / max(1, stats['writes']):.1f}x fewer)")
+    print(f"members in step after drag: {in_step}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Measures the cold import time of the volume package (or any modules) in fresh interpreters.
+
+Each run starts `python -X importtime -c "import <module>"` and reads the
+interpreter's per-module timings, so the numbers include everything the
+module pulls in. By default the package and each of its submodules are
+measured separately; a module that cannot be imported here (volume.gui
+without Tkinter, volume.capture without NumPy) is reported as skipped. On Windows `--materialize` also times building every
+vtable and GUID in INTERFACE_SPECS / GUID_BYTES after the import, i.e. what
+the import used to cost up front. `--budget-ms` exits non-zero when the
+median cumulative import time of any module exceeds it, for tracking the
+number in CI.
+
+    python benchmarks/import_time.py --runs 20
+    python benchmarks/import_time.py volume volume.core --budget-ms 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["volume", "volume.core", "volume.endpoints", "volume.volume", "volume.policy", "volume.state", "volume.capture",
+           "volume.gui"]
+
+# Measure imports from cached bytecode, as installed code runs; a warm-up run writes it.
+ENV = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+
+MATERIALIZE = """
+import ctypes, time
+import volume.core as volume
+start = time.perf_counter()
+for name in volume.INTERFACE_SPECS:
+    volume.interface(name)
+for name in volume.GUID_BYTES:
+    volume.guid(name)
+print("materialize_us", int((time.perf_counter() - start) * 1e6))
+"""
+
+
+def import_times(module):
+    """
+    Returns {module name: (self us, cumulative us)} for `module` and everything
+    imported while importing it, from one cold import.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=ENV, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip()}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    # A module's line follows those of the modules it imported, which are indented deeper.
+    end = max(i for i, row in enumerate(rows) if row[0] == module)
+    times = {module: rows[end][2:]}
+    for name, depth, self_us, cumulative_us in reversed(rows[:end]):
+        if depth <= rows[end][1]:
+            break
+        times[name] = (self_us, cumulative_us)
+    return times
+
+
+def materialize_time():
+    result = subprocess.run([sys.executable, "-c", MATERIALIZE], cwd=ROOT, env=ENV, capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith("materialize_us"):
+            return int(line.split()[1])
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--top", type=int, default=8, help="also list the slowest dependencies of each module")
+    parser.add_argument("--materialize", action="store_true",
+                        help="time building all vtables and GUIDs (needs ctypes.WINFUNCTYPE, i.e. Windows)")
+    parser.add_argument("--budget-ms", type=float, help="fail if a module's median cumulative import exceeds this")
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in args.modules:
+        try:
+            import_times(module)
+        except RuntimeError as e:
+            print(f"{module}: skipped, {e.args[0].splitlines()[-1]}")
+            continue
+        runs = [import_times(module) for _ in range(args.runs)]
+        cumulative = [run[module][1] for run in runs]
+        median_ms = statistics.median(cumulative) / 1000
+        print(f"{module}: median {median_ms:.2f} ms, min {min(cumulative) / 1000:.2f} ms "
+              f"over {args.runs} cold imports, {statistics.median(run[module][0] for run in runs) / 1000:.2f} ms "
+              f"in the module itself")
+        self_median = {name: statistics.median(run[name][0] for run in runs if name in run)
+                       for name in runs[0] if name != module}
+        for name, self_us in sorted(self_median.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {name:<28} {self_us / 1000:7.2f} ms self")
+        if args.budget_ms is not None and median_ms > args.budget_ms:
+            print(f"    over budget ({args.budget_ms:.2f} ms)")
+            over_budget = True
+
+    if args.materialize:
+        if not hasattr(__import__("ctypes"), "WINFUNCTYPE"):
+            print("materialize: skipped, ctypes.WINFUNCTYPE is only available on Windows")
+        else:
+            samples = [materialize_time() for _ in range(args.runs)]
+            print(f"materialize all vtables and GUIDs: median {statistics.median(samples) / 1000:.2f} ms")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Checks that PeakMeter sustains its sampling rate across many endpoints.
+
+Synthetic samplers stand in for IAudioMeterInformation (optionally sleeping
+`--call-cost` seconds per call to model the COM round-trip), so this runs on
+any platform.
+
+    python benchmarks/meter_rate.py --rate 100 --endpoints 10 --seconds 5
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meter import PeakMeter
+
+
+def make_synthetic_sampler(index, channels, call_cost):
+    peaks = [0.0] * channels
+
+    def sample():
+        if call_cost:
+            time.sleep(call_cost)
+        peak = abs(math.sin(time.perf_counter() * (index + 1)))
+        for c in range(channels):
+            peaks[c] = peak
+        return peak, peaks if channels else None
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=100.0)
+    parser.add_argument("--endpoints", type=int, default=10)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--call-cost", type=float, default=0.0,
+                        help="simulated seconds per sampler call")
+    args = parser.parse_args()
+
+    meter = PeakMeter(rate=args.rate, capacity=int(args.rate * 10))
+    rings = [meter.add_source(i, make_synthetic_sampler(i, args.channels, args.call_cost), args.channels)
+             for i in range(args.endpoints)]
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    meter.start()
+    time.sleep(args.seconds)
+    meter.stop()
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - start_cpu
+
+    achieved = meter.stats["ticks"] / elapsed
+    print(f"target={args.rate:.0f} Hz x {args.endpoints} endpoints, {args.channels} channels")
+    print(f"achieved={achieved:.1f} Hz  samples={meter.stats['samples']}  "
+          f"overruns={meter.stats['overruns']}  errors={meter.stats['errors']}")
+    print(f"cpu={cpu / elapsed * 100:.1f}% of one core")
+    print("decimated view (32 points):", [round(v, 2) for v in rings[0].decimated(32)][:8], "...")
+
+
+if __name__ == "__main__":
+    main()
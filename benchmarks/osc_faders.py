@@ -0,0 +1,87 @@
+"""
+Streams OSC fader updates over local UDP into OscInput and reports coalescing and latency.
+
+`--faders` faders, each mapped to its own simulated endpoint, send bundles
+with a timetag at `--hz` for `--seconds`. A second endpoint change made
+outside the surface checks that feedback reaches the sender. Reports
+messages versus backend writes and the end-to-end (sender timetag to write
+completion) and arrival-to-write latency.
+
+    python benchmarks/osc_faders.py --faders 8 --hz 200 --seconds 3
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_backend import SimulatedAudioBackend, SimulatedDevice
+from osc_input import Control, OscInput, encode_bundle, encode_message, parse_packet, unix_to_timetag
+
+
+async def run(args):
+    devices = [SimulatedDevice(f"{{0.0.0.00000000}}.{{fader-{i}}}", f"Fader {i}", 0, 0.5)
+               for i in range(args.faders)]
+    controls = {f"/1/fader{i + 1}": Control(f"/1/fader{i + 1}", "volume", dev.device_id)
+                for i, dev in enumerate(devices)}
+    backend = SimulatedAudioBackend(devices, latency=args.latency)
+    osc = await OscInput(lambda: backend, controls, "127.0.0.1:0", tick=args.tick).start()
+
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sender.setblocking(False)
+    target = ("127.0.0.1", osc.port)
+    interval = 1.0 / args.hz
+    sent = 0
+    start = time.perf_counter()
+    next_send = start
+    while time.perf_counter() - start < args.seconds:
+        t = time.perf_counter() - start
+        for i in range(args.faders):
+            level = 0.5 + 0.4 * math.sin(t * (i + 1))
+            message = encode_message(f"/1/fader{i + 1}", level)
+            sender.sendto(encode_bundle(unix_to_timetag(time.time()), [message]), target)
+            sent += 1
+        next_send += interval
+        await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+    await asyncio.sleep(args.tick * 5)
+
+    # A change from another controller must be fed back to the surface.
+    feedback = []
+    await asyncio.get_running_loop().run_in_executor(
+        osc.executor, lambda: backend.set_volume(0.25, devices[0].device_id, context="gui"))
+    deadline = time.perf_counter() + 1.0
+    while time.perf_counter() < deadline and not feedback:
+        try:
+            feedback.extend(parse_packet(sender.recv(4096)))
+        except BlockingIOError:
+            await asyncio.sleep(0.005)
+    osc.close()
+    sender.close()
+
+    metrics = osc.metrics()
+    print(f"faders={args.faders} rate={args.hz:.0f}Hz tick={args.tick * 1000:.0f}ms sent={sent}")
+    print(f"received={metrics['messages']} writes={metrics['writes']} "
+          f"({metrics['messages'] / max(1, metrics['writes']):.1f}x coalesced) errors={metrics['errors']}")
+    print("end-to-end latency:", json.dumps(metrics["e2e_latency"]))
+    print("arrival-to-write latency:", json.dumps(metrics["queue_latency"]))
+    print(f"feedback packets={metrics['feedback']}; for external change:",
+          [(address, [round(v, 3) for v in values]) for address, values, _ in feedback] or "none")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--faders", type=int, default=8)
+    parser.add_argument("--hz", type=float, default=200.0, help="updates per second per fader")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--tick", type=float, default=0.01)
+    parser.add_argument("--latency", type=float, default=0.0005, help="simulated per-call latency")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Load test for the JSON-RPC control server.
+
+Opens `--connections` keep-alive connections and has each send `--requests`
+requests (grouped into batches of `--batch`), keeping one line in flight per
+connection. Reports requests/sec and latency percentiles. Without
+`--address` an in-process server with the simulated backend is started, so
+this runs on Linux.
+
+    python benchmarks/rpc_loadtest.py --connections 16 --requests 2000 --batch 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_backend import SimulatedAudioBackend
+from control_server import ControlServer, parse_address
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def make_line(ids, batch, level):
+    requests = []
+    for i in range(batch):
+        request_id = next(ids)
+        if request_id % 4 == 0:
+            requests.append({"jsonrpc": "2.0", "id": request_id, "method": "set",
+                             "params": {"level": level}})
+        else:
+            requests.append({"jsonrpc": "2.0", "id": request_id, "method": "get", "params": {}})
+    payload = requests if batch > 1 else requests[0]
+    return json.dumps(payload).encode() + b"\n"
+
+
+async def run_connection(address, requests, batch, latencies):
+    kind, target = parse_address(address)
+    if kind == "tcp":
+        reader, writer = await asyncio.open_connection(*target)
+    else:
+        reader, writer = await asyncio.open_unix_connection(target)
+    ids = iter(range(1, requests + batch + 1))
+    sent = 0
+    while sent < requests:
+        count = min(batch, requests - sent)
+        line = make_line(ids, count, (sent % 100) / 100.0)
+        start = time.perf_counter()
+        writer.write(line)
+        response = json.loads(await reader.readline())
+        elapsed = time.perf_counter() - start
+        responses = response if isinstance(response, list) else [response]
+        errors = [r for r in responses if "error" in r]
+        if errors:
+            raise RuntimeError(f"Server returned errors: {errors[:3]}")
+        # Every request in a batch observes the batch round-trip.
+        latencies.extend([elapsed] * count)
+        sent += count
+    writer.close()
+
+
+async def run(args):
+    server = None
+    address = args.address
+    if address is None:
+        address = "tcp:127.0.0.1:0"
+        server = ControlServer(lambda: SimulatedAudioBackend(latency=args.latency), address)
+        await server.start()
+        port = server.server.sockets[0].getsockname()[1]
+        address = f"tcp:127.0.0.1:{port}"
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_connection(address, args.requests, args.batch, latencies)
+                           for _ in range(args.connections)))
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        await server.shutdown()
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"connections={args.connections} requests={total} batch={args.batch} "
+          f"simulated_latency={args.latency * 1000:.2f}ms")
+    print(f"throughput: {total / elapsed:,.0f} requests/sec ({elapsed:.2f}s)")
+    print(f"latency: p50={percentile(latencies, 0.50) * 1000:.3f}ms "
+          f"p99={percentile(latencies, 0.99) * 1000:.3f}ms "
+          f"max={latencies[-1] * 1000:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--address", help="existing server (tcp:HOST:PORT or unix:PATH); "
+                                          "default starts a simulated one in-process")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per connection")
+    parser.add_argument("--batch", type=int, default=1, help="requests per JSON-RPC batch")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="simulated backend latency per call, seconds")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Cost of rule evaluation as the number of rules grows.
+
+Builds rule sets of each size in `--sizes` (a third time rules, a third
+device rules and a third session rules, each filtered on a different
+endpoint name or process) and measures, per size:
+
+  - matching one backend event against the rule index (most events match
+    no rule, as in practice),
+  - pushing and popping a day's worth of time rules through the timer heap.
+
+Runs against the simulated backend, so it works on Linux.
+
+    python benchmarks/rule_scaling.py --sizes 10 100 1000 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_backend import SimulatedAudioBackend
+from automation import Rule, RuleEngine, TimerHeap
+
+
+def make_rules(count):
+    rules = []
+    for i in range(count):
+        action = {"actions": [{"set": 0.5}]}
+        if i % 3 == 0:
+            rules.append(Rule(dict(action, name=f"time-{i}", at=f"{i % 24:02d}:{i % 60:02d}:{i % 59:02d}")))
+        elif i % 3 == 1:
+            rules.append(Rule(dict(action, name=f"device-{i}", when={"device": "added", "name": f"Headset {i}"})))
+        else:
+            rules.append(Rule(dict(action, name=f"session-{i}", when={"session": "active", "process": f"app{i}.exe"})))
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule evaluation cost versus rule count")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--events", type=int, default=200000)
+    args = parser.parse_args()
+
+    events = [
+        {"event": "device", "change": "added", "device": "{usb}", "name": "Headset 1", "flow": "render"},
+        {"event": "session", "change": "active", "device": "{spk}", "pid": 1, "process": "other.exe"},
+        {"event": "session", "change": "volume", "device": "{spk}", "pid": 1, "process": "app2.exe"},
+        {"event": "device", "change": "removed", "device": "{gone}"},
+    ]
+    for size in args.sizes:
+        rules = make_rules(size)
+        engine = RuleEngine(SimulatedAudioBackend(), rules)
+        start = time.perf_counter()
+        matched = 0
+        for i in range(args.events):
+            matched += len(engine.match(events[i % len(events)]))
+        match_us = (time.perf_counter() - start) / args.events * 1e6
+
+        timers = TimerHeap()
+        time_rules = [rule for rule in rules if rule.trigger[0] == "time"]
+        now = time.time()
+        start = time.perf_counter()
+        for rule in time_rules:
+            timers.push(rule.next_time(now), rule)
+        popped = len(timers.pop_due(now + 86400))
+        heap_us = (time.perf_counter() - start) / max(1, popped) * 1e6
+        engine.close()
+        print(f"{size:>6} rules: {match_us:6.2f} us per event ({matched} matches), "
+              f"{heap_us:6.2f} us per time rule scheduled and fired")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+State board readers against direct volume reads.
+
+A StateBoardPublisher follows a simulated backend with `--devices`
+endpoints. The script reports:
+
+  - the cost of one volume event reaching the board (set_volume on the
+    simulated backend, with and without the publisher listening);
+  - the cost of a `seq` check, StateBoardReader.level() and snapshot() as
+    another process would make them, against a direct read: get_master_volume
+    on the default endpoint with --com (Windows), otherwise the simulated
+    backend's get_volume with --latency seconds per call;
+  - `--readers` processes taking snapshots while the writer republishes the
+    whole board as fast as it can, every publish giving all devices the
+    same level: reads per second, retries, and snapshots that mixed two
+    publishes (which must be 0).
+
+    python benchmarks/state_board.py --devices 16 --readers 4 --seconds 2
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from audio_backend import SimulatedAudioBackend, SimulatedDevice
+from state_board import BoardUnavailable, StateBoard, StateBoardPublisher, StateBoardReader
+
+
+def per_call_us(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def read_snapshots(name, seconds, results):
+    reader = StateBoardReader(name)
+    reads = torn = failed = 0
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            levels = {device["level"] for device in reader.snapshot()["devices"]}
+            reads += 1
+            torn += len(levels) > 1
+    except BoardUnavailable:
+        failed = 1
+    results.put((reads, torn, reader.stats["retries"], failed))
+    reader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-memory state board against direct volume reads")
+    parser.add_argument("--devices", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--latency", type=float, default=0.0005, help="simulated per-call latency of a direct read")
+    parser.add_argument("--com", action="store_true", help="time get_master_volume on the default endpoint")
+    args = parser.parse_args()
+
+    name = os.path.join(tempfile.mkdtemp(), "volume-control.board")
+    devices = [SimulatedDevice(f"{{0.0.0.00000000}}.{{sim-{i:03d}}}", f"Simulated Endpoint {i}", i % 2)
+               for i in range(args.devices)]
+    backend = SimulatedAudioBackend(devices)
+    target = devices[0].device_id
+    plain_us = per_call_us(lambda: backend.set_volume(0.5, target), args.calls)
+    publisher = StateBoardPublisher(backend, StateBoard(name)).start()
+    published_us = per_call_us(lambda: backend.set_volume(0.5, target), args.calls)
+    print(f"volume event to the board: {published_us - plain_us:.2f} us "
+          f"({publisher.board.stats['updates']} record updates)")
+
+    reader = StateBoardReader(name)
+    if args.com:
+        import volume
+        volume.init_com()
+        audio_volume = volume.activate_audio_endpoint_volume(
+            volume.get_default_endpoint(volume.create_device_enumerator()))
+        direct = ("get_master_volume", lambda: volume.get_master_volume(audio_volume))
+    else:
+        direct_backend = SimulatedAudioBackend(devices, latency=args.latency)
+        direct = (f"simulated get_volume ({args.latency * 1e6:.0f} us latency)", lambda: direct_backend.get_volume())
+    calls = args.calls if not args.latency else max(1, min(args.calls, int(1.0 / args.latency)))
+    for label, func, count in (("reader.seq", lambda: reader.seq, args.calls),
+                               ("reader.level()", reader.level, args.calls),
+                               ("reader.snapshot()", reader.snapshot, args.calls // 10),
+                               (direct[0], direct[1], calls)):
+        print(f"{label:>44}: {per_call_us(func, count):8.2f} us per read")
+    reader.close()
+
+    # Consistency under a writer that never stops
+    publisher.close()
+    board = StateBoard(name)
+    entries = [{"id": dev.device_id, "name": dev.name, "flow": "render", "level": 0.0, "muted": False}
+               for dev in devices]
+    board.publish(entries, {})
+    results = multiprocessing.Queue()
+    readers = [multiprocessing.Process(target=read_snapshots, args=(name, args.seconds, results))
+               for _ in range(args.readers)]
+    for process in readers:
+        process.start()
+    publishes = 0
+    deadline = time.perf_counter() + args.seconds
+    while time.perf_counter() < deadline:
+        publishes += 1
+        level = (publishes % 1000) / 1000
+        for entry in entries:
+            entry["level"] = level
+        board.publish(entries, {})
+    totals = [results.get() for _ in readers]
+    for process in readers:
+        process.join()
+    board.close()
+    reads = sum(r[0] for r in totals)
+    print(f"{args.readers} readers against {publishes / args.seconds:.0f} publishes/s: "
+          f"{reads / args.seconds / args.readers:.0f} snapshots/s each, "
+          f"{sum(r[2] for r in totals)} retries, {sum(r[1] for r in totals)} mixed snapshots, "
+          f"{sum(r[3] for r in totals)} readers gave up")
+
+
+if __name__ == "__main__":
+    main()
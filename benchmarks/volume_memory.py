@@ -0,0 +1,90 @@
+"""
+Volume memory: file size and load cost with many historical devices, write
+batching, and restore on reconnect.
+
+A memory file is filled with `--devices` historical endpoints. Against the
+simulated backend, the script then reports:
+
+  - the file size, and the time of the first recall (which loads the file)
+    and of later ones;
+  - how many file writes a burst of volume events costs;
+  - a headset reconnect where "Windows" applies a different level and
+    balance while it comes back: the writes the restore makes and the state
+    it ends in, then a reconnect with nothing to change.
+
+    python benchmarks/volume_memory.py --devices 4000 --events 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_backend import SimulatedAudioBackend, SimulatedDevice
+from volume_memory import VolumeMemory, VolumeMemoryStore
+
+HEADSET = "{0.0.0.00000000}.{sim-headset}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Volume memory size, batching and restore")
+    parser.add_argument("--devices", type=int, default=4000, help="historical endpoints in the file")
+    parser.add_argument("--events", type=int, default=500, help="volume events in the burst")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "volume_memory.json")
+    store = VolumeMemoryStore(path)
+    for i in range(args.devices):
+        store.record(f"{{0.0.0.00000000}}.{{{i:08x}-0000-0000-0000-000000000000}}", (i % 100) / 100, i % 7 == 0,
+                     [(i % 100) / 100, (i % 90) / 100])
+    store.flush()
+    size = os.path.getsize(path)
+
+    store = VolumeMemoryStore(path)
+    start = time.perf_counter()
+    store.recall(HEADSET)
+    first_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for _ in range(1000):
+        store.recall(HEADSET)
+    later_us = (time.perf_counter() - start) * 1000
+    kept = len(store)
+    print(f"{args.devices} devices recorded, {kept} kept: {size / 1024:.0f} KB, {size / kept:.0f} bytes per device; "
+          f"first recall (loads the file) {first_ms:.1f} ms, later recalls {later_us:.1f} us each")
+
+    headset = SimulatedDevice(HEADSET, "Simulated Headset", level=0.35)
+    backend = SimulatedAudioBackend([SimulatedDevice("{0.0.0.00000000}.{sim-speakers}", "Simulated Speakers"),
+                                     headset])
+    memory = VolumeMemory(backend, store, flush_interval=0.05).start()
+    flushes = store.stats["flushes"]
+    for i in range(args.events):
+        backend.set_volume(0.2 + 0.5 * i / args.events, HEADSET)
+    backend.set_channels([0.6, 0.45], HEADSET)
+    backend.set_mute(True, HEADSET)
+    time.sleep(0.2)
+    print(f"{args.events + 2} volume events: {store.stats['flushes'] - flushes} file write(s)")
+
+    for label, level, channels, muted in (("different state", 0.9, [0.9, 0.9], False),
+                                          ("same state", None, None, None)):
+        backend.remove_device(HEADSET)
+        writes = memory.stats["writes"]
+        if level is not None:
+            # Windows brings the endpoint back at its own level
+            headset.level, headset.balance, headset.muted = level, [c / level for c in channels], muted
+        backend.add_device(headset)
+        deadline = time.monotonic() + 2.0
+        while memory.stats["restores"] < (1 if level is not None else 2) and time.monotonic() < deadline:
+            time.sleep(0.005)
+        state = backend.get_volume(HEADSET)
+        channels = backend.get_channels(HEADSET)["channels"]
+        print(f"reconnect with {label}: {memory.stats['writes'] - writes} writes, "
+              f"level {state['level']:.2f}, channels {' / '.join(f'{c:.2f}' for c in channels)}, "
+              f"muted {state['muted']}")
+    memory.close()
+    print(f"memory: {memory.stats}; store: {store.stats}")
+
+
+if __name__ == "__main__":
+    main()
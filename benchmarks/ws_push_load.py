@@ -0,0 +1,149 @@
+"""
+Load-tests the WebSocket push channel with hundreds of local clients.
+
+Starts WebSocketPushServer on a simulated backend, connects `--clients`
+minimal WebSocket clients (of which `--slow` never read their socket),
+then changes volumes at `--rate` per second and plugs/unplugs a device.
+Reports per-client delivery latency for the healthy clients, and the drops
+and snapshot resyncs absorbed by the slow ones.
+
+    python benchmarks/ws_push_load.py --clients 300 --slow 10 --rate 2000 --seconds 5
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_backend import SimulatedAudioBackend, SimulatedDevice
+from ws_push import OPCODE_TEXT, WebSocketPushServer, read_frame
+
+
+class Client:
+    def __init__(self):
+        self.deltas = 0
+        self.snapshots = 0
+        self.latencies = []
+        self.last_seq = 0
+        self.gaps = 0
+
+    async def connect(self, port, receive_buffer=None):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if receive_buffer:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+        self.reader, self.writer = await asyncio.open_connection(sock=sock)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((f"GET / HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nUpgrade: websocket\r\n"
+                           f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                           "Sec-WebSocket-Version: 13\r\n\r\n").encode())
+        status = await self.reader.readline()
+        if b"101" not in status:
+            raise ConnectionError(status)
+        while (await self.reader.readline()) not in (b"\r\n", b""):
+            pass
+
+    async def receive(self):
+        try:
+            while True:
+                opcode, payload = await read_frame(self.reader, max_payload=1 << 24)
+                if opcode != OPCODE_TEXT:
+                    continue
+                message = json.loads(payload)
+                if message["type"] == "snapshot":
+                    self.snapshots += 1
+                else:
+                    self.deltas += 1
+                    self.latencies.append(time.time() - message["time"])
+                    if self.last_seq and message["seq"] != self.last_seq + 1:
+                        self.gaps += 1
+                self.last_seq = message["seq"]
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] * 1000 if values else 0.0
+
+
+async def run(args):
+    devices = [SimulatedDevice(f"{{0.0.0.00000000}}.{{dash-{i}}}", f"Endpoint {i}", i % 2, 0.5)
+               for i in range(args.devices)]
+    backend = SimulatedAudioBackend(devices)
+    server = await WebSocketPushServer(lambda: backend, "127.0.0.1:0", args.queue_size).start()
+
+    clients = [Client() for _ in range(args.clients)]
+    await asyncio.gather(*(client.connect(server.port, 4096 if i < args.slow else None)
+                           for i, client in enumerate(clients)))
+    slow = clients[:args.slow]
+    readers = [asyncio.ensure_future(client.receive()) for client in clients[args.slow:]]
+    for client in slow:
+        # Slow dashboards: a tiny receive window, and nobody reading it.
+        client.writer.transport.pause_reading()
+
+    rng = random.Random(1)
+    loop = asyncio.get_running_loop()
+    extra = SimulatedDevice("{0.0.0.00000000}.{dash-hotplug}", "Hot-plugged", 0, 0.7)
+    tick = 0.01
+    per_tick = max(1, round(args.rate * tick))
+
+    def change_volumes():
+        for _ in range(per_tick):
+            backend.set_volume(round(rng.random(), 3), rng.choice(devices).device_id)
+
+    changes = 0
+    ticks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.seconds:
+        # Backend writes run on the server's worker, like control requests would.
+        await loop.run_in_executor(server.executor, change_volumes)
+        changes += per_tick
+        ticks += 1
+        if ticks == 100:
+            await loop.run_in_executor(server.executor, backend.add_device, extra)
+        if ticks == 200:
+            await loop.run_in_executor(server.executor, backend.remove_device, extra.device_id)
+        await asyncio.sleep(tick)
+    await asyncio.sleep(0.5)
+
+    healthy = clients[args.slow:]
+    latencies = [value for client in healthy for value in client.latencies]
+    metrics = server.metrics()
+    print(f"clients={args.clients} slow={args.slow} changes={changes} queue={args.queue_size}")
+    print(f"server: deltas={metrics['deltas']} dropped={metrics['dropped']} resyncs={metrics['resyncs']}")
+    print(f"slow clients: not reading, {metrics['dropped']} frames dropped from their queues")
+    print(f"healthy clients: deltas/client min={min(c.deltas for c in healthy)} "
+          f"max={max(c.deltas for c in healthy)} gaps={sum(c.gaps for c in healthy)}")
+    print(f"delivery latency: p50={percentile(latencies, 0.5):.2f}ms p99={percentile(latencies, 0.99):.2f}ms "
+          f"max={percentile(latencies, 1.0):.2f}ms")
+
+    for client in clients:
+        client.writer.close()
+    for reader in readers:
+        reader.cancel()
+    # Let the server see every disconnect before the loop shuts down.
+    await asyncio.sleep(0.2)
+    server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--slow", type=int, default=10)
+    parser.add_argument("--devices", type=int, default=8)
+    parser.add_argument("--rate", type=int, default=2000, help="volume changes per second")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--queue-size", type=int, default=64)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Per-device perceptual volume calibration, compiled into lookup tables.
+
+A slider position (0..100) is meant as a loudness: every 10 dB of
+attenuation halves perceived loudness, so 50 sits 10 dB below 100 and 25
+sits 20 dB below it, down to `floor_db`, under which the curve runs straight
+to the bottom of the endpoint's range. The endpoint dB that produces that
+loudness is worked out per device:
+
+  - from GetVolumeRange alone, 100 is the endpoint's maximum and the curve
+    is applied to the endpoint's own dB scale;
+  - with measurements -- pairs of (endpoint dB, measured level in dB, e.g.
+    from an SPL meter at the listening position) -- the measured response
+    is interpolated (and extended at slope 1 past the measured span), and
+    100 maps to `full_scale` on that measured scale. Giving every device
+    the same full_scale is what makes 50 sound the same on all of them.
+
+A CalibrationProfile compiles into a CalibrationTable once: the endpoint dB
+for each of the 101 positions, plus a reverse table of the nearest position
+for every 0.05 dB of the range. Both directions are then one array index, so
+the slider, CLI commands and automation never evaluate the curve per event.
+
+CalibrationStore keeps the profiles and their compiled tables per endpoint
+ID in a JSON file. A stored table is reused as long as the device still
+reports the range it was compiled for. Run
+
+    python calibration.py measure DEVICE ENDPOINT_DB LEVEL
+    python calibration.py full-scale LEVEL
+    python calibration.py show [DEVICE]
+
+to record measurements; the next use of the device recompiles its table.
+"""
+import argparse
+import bisect
+import json
+import math
+import os
+import sys
+import threading
+from array import array
+
+POSITIONS = 100
+REVERSE_STEP_DB = 0.05
+FLOOR_DB = -50.0
+FORMAT_VERSION = 1
+
+
+def default_path():
+    path = os.environ.get("VOLUME_CALIBRATION_FILE")
+    if path:
+        return path
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.environ.get("LOCALAPPDATA") or "."
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "volume-control", "calibration.json")
+
+
+def perceptual_db(position, floor_db=FLOOR_DB):
+    """
+    Attenuation in dB below full scale for a 0..100 position: 10 dB per
+    halving of loudness, or None below the position where that reaches
+    floor_db.
+    """
+    fraction = position / POSITIONS
+    if fraction <= 0.0 or fraction < 2 ** (floor_db / 10):
+        return None
+    return 10 * math.log2(fraction)
+
+
+def _interpolate(x, xs, ys):
+    """Piecewise-linear y(x) through sorted xs, continued at slope 1 outside them."""
+    if x <= xs[0]:
+        return ys[0] + (x - xs[0])
+    if x >= xs[-1]:
+        return ys[-1] + (x - xs[-1])
+    i = bisect.bisect_right(xs, x)
+    x0, x1, y0, y1 = xs[i - 1], xs[i], ys[i - 1], ys[i]
+    return y0 + (y1 - y0) * (x - x0) / (x1 - x0) if x1 != x0 else y0
+
+
+# ============================================================
+# Profiles and Compiled Tables
+# ============================================================
+class CalibrationProfile:
+    """
+    `volume_range` is GetVolumeRange's (min_db, max_db, increment);
+    `measurements` are (endpoint dB, measured dB) pairs, which must rise
+    with the endpoint level.
+    """
+    def __init__(self, volume_range, measurements=(), full_scale=None, floor_db=FLOOR_DB):
+        self.min_db, self.max_db, self.increment = (float(v) for v in volume_range)
+        if self.max_db <= self.min_db:
+            raise ValueError(f"Invalid volume range: {volume_range!r}")
+        points = sorted((float(db), float(level)) for db, level in measurements)
+        for (db0, level0), (db1, level1) in zip(points, points[1:]):
+            if db1 == db0 or level1 <= level0:
+                raise ValueError(f"Measurements must rise with the endpoint level: {points!r}")
+        self.measurements = points
+        self.full_scale = full_scale
+        self.floor_db = floor_db
+
+    def inputs(self):
+        """What the compiled table depends on, as stored next to it."""
+        return {"range": [self.min_db, self.max_db, self.increment],
+                "measurements": [list(point) for point in self.measurements],
+                "full_scale": self.full_scale, "floor_db": self.floor_db}
+
+    def compile(self):
+        if self.measurements:
+            endpoint = [db for db, _ in self.measurements]
+            measured = [level for _, level in self.measurements]
+            top = self.full_scale if self.full_scale is not None else _interpolate(self.max_db, endpoint, measured)
+
+            def endpoint_db(level):
+                return _interpolate(level, measured, endpoint)
+        else:
+            top = self.max_db
+
+            def endpoint_db(level):
+                return level
+
+        floor_position = next(p for p in range(1, POSITIONS + 1) if perceptual_db(p, self.floor_db) is not None)
+        floor_target = min(self.max_db, max(self.min_db, endpoint_db(top + perceptual_db(floor_position,
+                                                                                          self.floor_db))))
+        values = array("d", bytes(8 * (POSITIONS + 1)))
+        for position in range(POSITIONS + 1):
+            attenuation = perceptual_db(position, self.floor_db)
+            if attenuation is None:
+                # Below the floor: straight from the bottom of the range to the floor point.
+                db = self.min_db + (floor_target - self.min_db) * position / floor_position
+            else:
+                db = endpoint_db(top + attenuation)
+            values[position] = min(self.max_db, max(self.min_db, db))
+        return CalibrationTable(values, self.min_db, self.max_db)
+
+
+class CalibrationTable:
+    """
+    Endpoint dB for each position 0..100 (`db`), and the nearest position
+    for each REVERSE_STEP_DB bucket of the range.
+    """
+    __slots__ = ("db", "min_db", "max_db", "buckets_per_db", "positions")
+
+    def __init__(self, db, min_db, max_db):
+        self.db = array("d", db)
+        self.min_db = min_db
+        self.max_db = max_db
+        self.buckets_per_db = 1 / REVERSE_STEP_DB
+        buckets = int((max_db - min_db) / REVERSE_STEP_DB) + 1
+        self.positions = array("B", bytes(buckets))
+        above = 0   # first position whose dB is >= the bucket's; table values never fall
+        for bucket in range(buckets):
+            level = min_db + bucket * REVERSE_STEP_DB
+            while above < POSITIONS and self.db[above] < level:
+                above += 1
+            # Of a clamped stretch of equal values, the lowest position is taken.
+            if above and level - self.db[above - 1] < abs(self.db[above] - level):
+                self.positions[bucket] = above - 1
+            else:
+                self.positions[bucket] = above
+
+    def to_db(self, position):
+        position = round(position)
+        if position < 0:
+            position = 0
+        elif position > POSITIONS:
+            position = POSITIONS
+        return self.db[position]
+
+    def to_position(self, db, current=None):
+        """
+        The position for an endpoint dB. If `current` (the position shown)
+        already maps to that dB it is kept, so a clamped stretch does not
+        make the slider jump.
+        """
+        if current is not None and abs(self.to_db(current) - db) < REVERSE_STEP_DB / 2:
+            return current
+        bucket = round((db - self.min_db) * self.buckets_per_db)
+        if bucket < 0:
+            bucket = 0
+        elif bucket >= len(self.positions):
+            bucket = len(self.positions) - 1
+        return self.positions[bucket]
+
+
+# ============================================================
+# Persistent Store
+# ============================================================
+class CalibrationStore:
+    """
+    Profiles and compiled tables per endpoint ID, persisted to `path` (None
+    keeps everything in memory). table() is safe to call from any thread.
+    """
+    def __init__(self, path=None, floor_db=FLOOR_DB):
+        self.path = path
+        self.floor_db = floor_db
+        self.full_scale = None
+        self.devices = {}   # endpoint ID -> {"measurements": [...], "inputs": {...}, "table": [...]}
+        self.tables = {}    # endpoint ID -> CalibrationTable, compiled or loaded this session
+        self.lock = threading.Lock()
+        self.stats = {"compiled": 0, "loaded": 0, "hits": 0}
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported calibration file version in {path}: {data.get('version')!r}")
+            self.full_scale = data.get("full_scale")
+            self.devices = data.get("devices", {})
+
+    def get(self, device_id):
+        """The table already compiled or loaded for the device, or None."""
+        return self.tables.get(device_id)
+
+    def table(self, device_id, volume_range):
+        """Returns the device's table, loading or compiling (and saving) it on first use."""
+        table = self.tables.get(device_id)
+        if table is not None:
+            self.stats["hits"] += 1
+            return table
+        with self.lock:
+            entry = self.devices.setdefault(device_id, {"measurements": []})
+            profile = CalibrationProfile(volume_range, entry["measurements"], self.full_scale, self.floor_db)
+            inputs = profile.inputs()
+            if entry.get("inputs") == inputs and len(entry.get("table", ())) == POSITIONS + 1:
+                table = CalibrationTable(entry["table"], profile.min_db, profile.max_db)
+                self.stats["loaded"] += 1
+            else:
+                table = profile.compile()
+                entry["inputs"] = inputs
+                entry["table"] = [round(db, 4) for db in table.db]
+                self.stats["compiled"] += 1
+                self._save()
+            self.tables[device_id] = table
+        return table
+
+    def measure(self, device_id, endpoint_db, level):
+        """Adds (or replaces) one measurement; the device's table is recompiled on next use."""
+        with self.lock:
+            entry = self.devices.setdefault(device_id, {"measurements": []})
+            points = {db: value for db, value in entry["measurements"]}
+            points[float(endpoint_db)] = float(level)
+            entry["measurements"] = sorted([db, value] for db, value in points.items())
+            entry.pop("table", None)
+            self.tables.pop(device_id, None)
+            self._save()
+
+    def reset(self, device_id):
+        with self.lock:
+            self.devices.pop(device_id, None)
+            self.tables.pop(device_id, None)
+            self._save()
+
+    def set_full_scale(self, level):
+        """Sets the measured level 100 maps to on every measured device."""
+        with self.lock:
+            self.full_scale = None if level is None else float(level)
+            for entry in self.devices.values():
+                entry.pop("table", None)
+            self.tables.clear()
+            self._save()
+
+    def _save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp = f"{self.path}.{os.getpid()}"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({"version": FORMAT_VERSION, "full_scale": self.full_scale, "devices": self.devices}, f,
+                      indent=1)
+        os.replace(temp, self.path)
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    """The per-user store at default_path(), loaded once per process."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = CalibrationStore(default_path())
+        return _default_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and inspect per-device volume calibration")
+    parser.add_argument("--file", default=None, help=f"calibration file (default {default_path()})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    show = commands.add_parser("show", help="print the stored profiles")
+    show.add_argument("device", nargs="?")
+    measure = commands.add_parser("measure", help="record the level measured at an endpoint dB setting")
+    measure.add_argument("device")
+    measure.add_argument("endpoint_db", type=float)
+    measure.add_argument("level", type=float)
+    full_scale = commands.add_parser("full-scale", help="the measured level 100 means on every device")
+    full_scale.add_argument("level", type=float, nargs="?")
+    reset = commands.add_parser("reset", help="forget a device's measurements")
+    reset.add_argument("device")
+    args = parser.parse_args()
+
+    store = CalibrationStore(args.file or default_path())
+    if args.command == "measure":
+        store.measure(args.device, args.endpoint_db, args.level)
+    elif args.command == "full-scale":
+        store.set_full_scale(args.level)
+    elif args.command == "reset":
+        store.reset(args.device)
+    print(f"full scale: {store.full_scale if store.full_scale is not None else 'per device'}")
+    for device_id, entry in sorted(store.devices.items()):
+        if args.command == "show" and args.device and device_id != args.device:
+            continue
+        points = ", ".join(f"{db:g} dB -> {level:g}" for db, level in entry["measurements"]) or "none"
+        table = entry.get("table")
+        curve = f"  0/25/50/75/100: {' / '.join(f'{table[p]:.1f}' for p in (0, 25, 50, 75, 100))} dB" if table else ""
+        print(f"{device_id}\n  measurements: {points}\n{curve}".rstrip())
+
+
+if __name__ == "__main__":
+    main()
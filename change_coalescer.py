@@ -0,0 +1,141 @@
+"""
+Debouncing of endpoint change notifications.
+
+IMMNotificationClient delivers device added/removed/state/property and
+default-device callbacks one by one; docking a laptop produces dozens of
+them within milliseconds. EndpointChangeCoalescer collects them, waits for
+a quiet `window` (but never longer than `max_delay` after the first event),
+reduces them to the final state per endpoint ID and per default role, and
+hands one EndpointChanges batch to `apply`. The consumer then touches each
+affected device once instead of re-enumerating per event.
+
+Events can be injected directly with submit(), which is how the burst
+benchmark (benchmarks/notification_storm.py) exercises it without Windows.
+"""
+import threading
+import time
+
+from volume.core import ADDED, CHANGED, DEVICE_STATE_ACTIVE, REMOVED
+
+
+class EndpointChanges:
+    """One consolidated batch: final outcome per endpoint plus the latest default per (flow, role)."""
+    __slots__ = ("devices", "defaults", "raw_events")
+
+    def __init__(self):
+        self.devices = {}
+        self.defaults = {}
+        self.raw_events = 0
+
+    def __bool__(self):
+        return bool(self.devices or self.defaults)
+
+    def __repr__(self):
+        return f"EndpointChanges(devices={self.devices!r}, defaults={self.defaults!r}, raw={self.raw_events})"
+
+    def merge(self, other):
+        """Folds a later batch into this one (used when the consumer applies lazily)."""
+        for device_id, outcome in other.devices.items():
+            self._set(device_id, outcome)
+        self.defaults.update(other.defaults)
+        self.raw_events += other.raw_events
+
+    def _set(self, device_id, outcome):
+        if outcome == CHANGED and self.devices.get(device_id) in (ADDED, REMOVED):
+            # A property change does not override an add/remove already pending.
+            return
+        self.devices[device_id] = outcome
+
+
+class EndpointChangeCoalescer:
+    def __init__(self, apply, window=0.1, max_delay=0.5):
+        self.apply = apply
+        self.window = window
+        self.max_delay = max_delay
+        self.stats = {"raw_events": 0, "applied_events": 0, "batches": 0}
+        self._pending = EndpointChanges()
+        self._first = None
+        self._last = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="endpoint-coalescer", daemon=True)
+        self._thread.start()
+
+    # -------------------------------
+    # Event intake (any thread, e.g. COM notification threads)
+    # -------------------------------
+    def submit(self, kind, device_id=None, state=None, flow=None, role=None):
+        """
+        kind is one of "added", "removed", "state", "property", "default".
+        "state" needs the new device state; "default" needs flow and role
+        (device_id may be None when there is no default any more).
+        """
+        with self._cond:
+            pending = self._pending
+            if kind == "default":
+                pending.defaults[(flow, role)] = device_id
+            elif kind == "state":
+                pending._set(device_id, ADDED if state & DEVICE_STATE_ACTIVE else REMOVED)
+            elif kind == "added":
+                pending._set(device_id, ADDED)
+            elif kind == "removed":
+                pending._set(device_id, REMOVED)
+            elif kind == "property":
+                pending._set(device_id, CHANGED)
+            else:
+                raise ValueError(f"Unknown endpoint event kind: {kind!r}")
+            pending.raw_events += 1
+            self.stats["raw_events"] += 1
+            now = time.monotonic()
+            if self._first is None:
+                self._first = now
+                self._cond.notify()
+            self._last = now
+
+    # -------------------------------
+    # Flushing
+    # -------------------------------
+    def _due(self):
+        return min(self._last + self.window, self._first + self.max_delay)
+
+    def _take(self):
+        batch = self._pending
+        self._pending = EndpointChanges()
+        self._first = self._last = None
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and self._first is None:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                delay = self._due() - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                batch = self._take()
+            self._deliver(batch)
+
+    def _deliver(self, batch):
+        if not batch:
+            return
+        self.stats["batches"] += 1
+        self.stats["applied_events"] += len(batch.devices) + len(batch.defaults)
+        try:
+            self.apply(batch)
+        except Exception as e:
+            print("Applying endpoint changes failed:", e)
+
+    def flush(self):
+        """Delivers whatever is pending immediately, on the calling thread."""
+        with self._cond:
+            batch = self._take()
+        self._deliver(batch)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
@@ -0,0 +1,198 @@
+"""
+Per-call deadlines and hung-driver isolation for COM operations.
+
+ComCallGuard runs each device's calls on that device's own worker thread
+and waits at most a deadline for the result. When a call overruns, the
+caller gets ComTimeoutError, the wedged worker thread is abandoned (it can
+only be left to finish on its own) and the device is quarantined: further
+calls fail immediately with DeviceQuarantinedError until a background
+health probe on a fresh worker completes within its deadline.
+
+Calls for other devices keep running on their own workers, so one stuck
+Bluetooth driver no longer freezes the GUI or the control server.
+"""
+import concurrent.futures
+import queue
+import threading
+import time
+
+DEFAULT_TIMEOUT = 2.0
+GLOBAL_KEY = None  # key for calls not tied to a device (enumeration, policy config)
+
+
+class ComTimeoutError(TimeoutError):
+    """A COM call did not complete within its deadline."""
+
+    def __init__(self, device_id, operation, timeout):
+        super().__init__(f"{operation} on {device_id or 'audio system'} did not complete within {timeout:.1f}s")
+        self.device_id = device_id
+        self.operation = operation
+
+
+class DeviceQuarantinedError(ComTimeoutError):
+    """The device timed out earlier and has not passed a health probe since."""
+
+    def __init__(self, device_id, operation):
+        TimeoutError.__init__(self, f"{device_id or 'audio system'} is quarantined after a timeout; "
+                                    f"{operation} was not attempted")
+        self.device_id = device_id
+        self.operation = operation
+
+
+class _Worker:
+    """One daemon thread executing submitted calls in order."""
+
+    def __init__(self, name, thread_init):
+        self.tasks = queue.SimpleQueue()
+        self.abandoned = False
+        self.thread = threading.Thread(target=self._run, args=(thread_init,), name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self, thread_init):
+        if thread_init is not None:
+            thread_init()
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            future, func, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            if self.abandoned:
+                return
+
+    def submit(self, func, args, kwargs):
+        future = concurrent.futures.Future()
+        self.tasks.put((future, func, args, kwargs))
+        return future
+
+    def stop(self):
+        self.tasks.put(None)
+
+
+class ComCallGuard:
+    """
+    `thread_init` runs on every worker thread before its first call (pass
+    volume.init_com). `on_state_change(device_id, quarantined)` is called from
+    guard threads whenever a device enters or leaves quarantine.
+    """
+    def __init__(self, default_timeout=DEFAULT_TIMEOUT, thread_init=None,
+                 probe_interval=5.0, on_state_change=None):
+        self.default_timeout = default_timeout
+        self.thread_init = thread_init
+        self.probe_interval = probe_interval
+        self.on_state_change = on_state_change
+        self.workers = {}
+        self.quarantine = {}   # device key -> (since, operation)
+        self.probes = {}       # device key -> zero-argument health check
+        self.stats = {"calls": 0, "timeouts": 0, "fast_failures": 0,
+                      "recoveries": 0, "failed_probes": 0, "abandoned_threads": 0}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._prober = threading.Thread(target=self._probe_loop, name="com-health-probe", daemon=True)
+        self._prober.start()
+
+    def _worker(self, key):
+        with self._lock:
+            worker = self.workers.get(key)
+            if worker is None:
+                worker = self.workers[key] = _Worker(f"com-worker-{key or 'global'}", self.thread_init)
+            return worker
+
+    def set_probe(self, device_id, probe):
+        """Registers the health check run while the device is quarantined (e.g. a volume read)."""
+        self.probes[device_id] = probe
+
+    def is_quarantined(self, device_id):
+        return device_id in self.quarantine
+
+    def call(self, device_id, func, *args, timeout=None, **kwargs):
+        """Runs func(*args, **kwargs) on the device's worker, raising ComTimeoutError past the deadline."""
+        operation = getattr(func, "__name__", "call")
+        if device_id in self.quarantine:
+            self.stats["fast_failures"] += 1
+            raise DeviceQuarantinedError(device_id, operation)
+        timeout = self.default_timeout if timeout is None else timeout
+        self.stats["calls"] += 1
+        future = self._worker(device_id).submit(func, args, kwargs)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            self._quarantine(device_id, operation)
+            raise ComTimeoutError(device_id, operation, timeout) from None
+
+    def _quarantine(self, key, operation):
+        with self._lock:
+            worker = self.workers.pop(key, None)
+            if worker is not None:
+                # The thread is stuck inside the driver; let it exit whenever it returns.
+                worker.abandoned = True
+                worker.stop()
+                self.stats["abandoned_threads"] += 1
+            newly = key not in self.quarantine
+            self.quarantine[key] = (time.monotonic(), operation)
+        self.stats["timeouts"] += 1
+        if newly:
+            print(f"Quarantined {key or 'audio system'} after {operation} timed out.")
+            self._notify(key, True)
+            self._wake.set()
+
+    def _release(self, key):
+        with self._lock:
+            if self.quarantine.pop(key, None) is None:
+                return
+        self.stats["recoveries"] += 1
+        print(f"{key or 'audio system'} passed its health probe, leaving quarantine.")
+        self._notify(key, False)
+
+    def _notify(self, key, quarantined):
+        if self.on_state_change is not None:
+            try:
+                self.on_state_change(key, quarantined)
+            except Exception as e:
+                print("Quarantine state handler failed:", e)
+
+    def _probe_loop(self):
+        while not self._closed:
+            self._wake.wait(self.probe_interval)
+            self._wake.clear()
+            for key in list(self.quarantine):
+                since, _ = self.quarantine.get(key, (0.0, None))
+                if time.monotonic() - since < self.probe_interval:
+                    continue
+                probe = self.probes.get(key)
+                if probe is None:
+                    # Nothing to check with: give the device another chance.
+                    self._release(key)
+                    continue
+                future = self._worker(key).submit(probe, (), {})
+                try:
+                    future.result(self.default_timeout)
+                except concurrent.futures.TimeoutError:
+                    self.stats["failed_probes"] += 1
+                    self._quarantine(key, "health probe")
+                except Exception:
+                    # The driver answered, even if with an error: it is no longer hung.
+                    self._release(key)
+                else:
+                    self._release(key)
+
+    def metrics(self):
+        now = time.monotonic()
+        return dict(self.stats,
+                    quarantined={str(key): {"seconds": round(now - since, 1), "operation": operation}
+                                 for key, (since, operation) in list(self.quarantine.items())})
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        with self._lock:
+            workers = list(self.workers.values())
+            self.workers.clear()
+        for worker in workers:
+            worker.stop()
@@ -0,0 +1,380 @@
+"""
+Record/replay tracing of the COM calls made through the volume package helpers.
+
+Recording: volume.set_com_tracer(TraceRecorder(path)) (or `python -m volume
+--trace FILE`) makes every traced helper append one record -- interface, method,
+arguments, result, HRESULT, start time and latency -- to a compact binary
+trace. Interface pointers are stored as small per-trace handles, never as
+raw addresses.
+
+Not traced: make_peak_sampler() samplers and get_channels_peak_values(),
+which the peak meter calls tens of times a second per endpoint and whose
+per-channel lists have no compact encoding; callback (un)registration;
+and the generators iter_endpoint_collection() and iter_audio_sessions(),
+whose calls happen after the helper has returned.
+
+Replay: TraceReplayer drives an audio backend (normally the simulated one)
+with the recorded call sequence, sleeping each call's recorded latency
+inside the backend call, and reports throughput and how long the replaying
+("UI") thread was blocked. That makes traces captured on real machines
+comparable between builds on Linux CI.
+
+    python com_trace.py dump session.vctrace
+    python com_trace.py replay session.vctrace [--fast] [--speed 2]
+    python com_trace.py synth demo.vctrace       # synthetic slider drag + device switch
+
+File layout (little endian):
+    header  b"VCTR" u16 version, u16 reserved, f64 wall-clock start
+    name    u8 1, u16 id, u16 length, utf-8 bytes
+    call    u8 2, u16 interface, u16 method, i32 hresult, u64 start_ns,
+            u32 latency_ns, u8 argc, argc tagged values, 1 tagged result
+    value   u8 tag + payload: n (none), h u32 handle, i i64, f f64, s u16 name id
+"""
+import argparse
+import os
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+
+MAGIC = b"VCTR"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHHd")
+_NAME = struct.Struct("<BHH")
+_CALL = struct.Struct("<BHHiQIB")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_U16 = struct.Struct("<H")
+
+RECORD_NAME = 1
+RECORD_CALL = 2
+
+TraceCall = namedtuple("TraceCall", "start_ns interface method args result hresult latency_ns")
+
+
+class Handle(int):
+    """A per-trace stand-in for an interface pointer."""
+
+    def __repr__(self):
+        return f"<#{int(self)}>"
+
+
+class TraceRecorder:
+    """Appends call records to a trace file. Thread-safe; buffered until flush() or close()."""
+
+    def __init__(self, path, flush_bytes=64 * 1024):
+        self.file = open(path, "wb")
+        self.flush_bytes = flush_bytes
+        self.buffer = bytearray(_HEADER.pack(MAGIC, VERSION, 0, time.time()))
+        self.names = {}
+        self.handles = {}
+        self.origin_ns = time.perf_counter_ns()
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _name_id(self, name):
+        name_id = self.names.get(name)
+        if name_id is None:
+            name_id = self.names[name] = len(self.names)
+            data = name.encode("utf-8")
+            self.buffer += _NAME.pack(RECORD_NAME, name_id, len(data))
+            self.buffer += data
+        return name_id
+
+    def _pack_value(self, buf, value):
+        if value is None:
+            buf += b"n"
+        elif isinstance(value, bool) or isinstance(value, int) and not hasattr(value, "value"):
+            buf += b"i"
+            buf += _I64.pack(int(value))
+        elif isinstance(value, float):
+            buf += b"f"
+            buf += _F64.pack(value)
+        elif isinstance(value, str):
+            buf += b"s"
+            buf += _U16.pack(self._name_id(value))
+        elif hasattr(value, "value") and (value.value is None or isinstance(value.value, int)):
+            # ctypes pointer (c_void_p): record a stable small handle
+            address = value.value or 0
+            handle = self.handles.get(address)
+            if handle is None:
+                handle = self.handles[address] = len(self.handles)
+            buf += b"h"
+            buf += _U32.pack(handle)
+        else:
+            buf += b"s"
+            buf += _U16.pack(self._name_id(repr(value)))
+
+    def record(self, interface, method, args, result, hresult, start_ns, latency_ns):
+        with self._lock:
+            iface_id = self._name_id(interface)
+            method_id = self._name_id(method)
+            # Pack the values first so any new name records precede the call.
+            values = bytearray()
+            for arg in args:
+                self._pack_value(values, arg)
+            self._pack_value(values, result)
+            self.buffer += _CALL.pack(RECORD_CALL, iface_id, method_id, hresult,
+                                      max(0, start_ns - self.origin_ns),
+                                      min(latency_ns, 0xFFFFFFFF), len(args))
+            self.buffer += values
+            self.calls += 1
+            if len(self.buffer) >= self.flush_bytes:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        self.file.write(self.buffer)
+        self.buffer = bytearray()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+            self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_trace(path):
+    """Returns (wall_clock_start, [TraceCall, ...]) for a trace file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, _, wall_start = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} volume COM trace")
+    offset = _HEADER.size
+    names = {}
+    calls = []
+
+    def read_value():
+        nonlocal offset
+        tag = data[offset:offset + 1]
+        offset += 1
+        if tag == b"n":
+            return None
+        if tag == b"h":
+            value = Handle(_U32.unpack_from(data, offset)[0])
+            offset += 4
+        elif tag == b"i":
+            value = _I64.unpack_from(data, offset)[0]
+            offset += 8
+        elif tag == b"f":
+            value = _F64.unpack_from(data, offset)[0]
+            offset += 8
+        elif tag == b"s":
+            value = names[_U16.unpack_from(data, offset)[0]]
+            offset += 2
+        else:
+            raise ValueError(f"Corrupt trace: unknown value tag {tag!r} at {offset - 1}")
+        return value
+
+    while offset < len(data):
+        kind = data[offset]
+        if kind == RECORD_NAME:
+            _, name_id, length = _NAME.unpack_from(data, offset)
+            offset += _NAME.size
+            names[name_id] = data[offset:offset + length].decode("utf-8")
+            offset += length
+        elif kind == RECORD_CALL:
+            _, iface_id, method_id, hresult, start_ns, latency_ns, argc = _CALL.unpack_from(data, offset)
+            offset += _CALL.size
+            args = tuple(read_value() for _ in range(argc))
+            result = read_value()
+            calls.append(TraceCall(start_ns, names[iface_id], names[method_id], args, result,
+                                   hresult, latency_ns))
+        else:
+            raise ValueError(f"Corrupt trace: unknown record type {kind} at {offset}")
+    return wall_start, calls
+
+
+# ============================================================
+# Replay
+# ============================================================
+class _LatencyBackend:
+    """Wraps a backend so that every call first sleeps the recorded driver latency."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.latency = 0.0
+
+    def __getattr__(self, name):
+        func = getattr(self.backend, name)
+
+        def call(*args, **kwargs):
+            if self.latency:
+                time.sleep(self.latency)
+            return func(*args, **kwargs)
+        return call
+
+
+class TraceReplayer:
+    """
+    Replays recorded calls against `backend`. Device pointers, volume
+    interfaces and device-ID strings seen in the trace are mapped, in order
+    of first appearance, onto the backend's devices.
+
+    honor_timing=True reproduces the recorded gaps between calls (scaled by
+    1/speed) to measure UI-thread blocking under the original pacing;
+    False issues calls back to back to measure throughput.
+    """
+    def __init__(self, calls, backend, speed=1.0, honor_timing=True, honor_latency=True):
+        self.calls = calls
+        self.backend = _LatencyBackend(backend)
+        self.speed = speed
+        self.honor_timing = honor_timing
+        self.honor_latency = honor_latency
+        self.device_ids = [device["id"] for device in backend.list_devices("all")]
+        self.device_map = {}      # trace handle or ID string -> backend device ID
+        self.volume_map = {}      # IAudioEndpointVolume handle -> backend device ID
+
+    def _device(self, key):
+        device = self.device_map.get(key)
+        if device is None:
+            device = self.device_ids[len(self.device_map) % len(self.device_ids)]
+            self.device_map[key] = device
+        return device
+
+    def _volume_device(self, handle):
+        device = self.volume_map.get(handle)
+        if device is None:
+            device = self.volume_map[handle] = self._device(("volume", handle))
+        return device
+
+    def _dispatch(self, call):
+        backend = self.backend
+        method = call.method
+        args = call.args
+        if method == "Activate" and call.result is not None:
+            self.volume_map[call.result] = self._device(args[0])
+            return backend.get_volume(self.volume_map[call.result])
+        if method == "SetMasterVolumeLevelScalar":
+            return backend.set_volume(args[1], self._volume_device(args[0]))
+        if method in ("GetMasterVolumeLevelScalar", "GetMute"):
+            return backend.get_volume(self._volume_device(args[0]))
+        if method == "SetMute":
+            return backend.set_mute(bool(args[1]), self._volume_device(args[0]))
+        if method in ("VolumeStepUp", "VolumeStepDown"):
+            direction = "up" if method == "VolumeStepUp" else "down"
+            return backend.step_volume(direction, self._volume_device(args[0]))
+        if method == "SetDefaultEndpoint":
+            return backend.set_default(self._device(args[0]))
+        if method in ("EnumAudioEndpoints", "GetDefaultAudioEndpoint"):
+            return backend.list_devices("all")
+        # Property/ID reads and the like: only the recorded latency matters.
+        if self.backend.latency:
+            time.sleep(self.backend.latency)
+        return None
+
+    def run(self):
+        """Replays every call and returns a statistics dict."""
+        blocked = 0.0
+        latencies = []
+        errors = 0
+        if not self.calls:
+            return {"calls": 0}
+        base_ns = self.calls[0].start_ns
+        start = time.perf_counter()
+        for call in self.calls:
+            if self.honor_timing:
+                due = start + (call.start_ns - base_ns) / 1e9 / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.backend.latency = call.latency_ns / 1e9 / self.speed if self.honor_latency else 0.0
+            t0 = time.perf_counter()
+            try:
+                self._dispatch(call)
+            except Exception:
+                errors += 1
+            elapsed = time.perf_counter() - t0
+            blocked += elapsed
+            latencies.append(elapsed)
+        wall = time.perf_counter() - start
+        latencies.sort()
+        return {
+            "calls": len(self.calls),
+            "errors": errors,
+            "wall_s": wall,
+            "calls_per_s": len(self.calls) / wall if wall else float("inf"),
+            "blocked_s": blocked,
+            "blocked_fraction": blocked / wall if wall else 0.0,
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+            "max_ms": latencies[-1] * 1000,
+        }
+
+
+def write_synthetic_trace(path, drag_steps=200, device_latency_ms=2.0):
+    """
+    Writes a trace resembling a user session without Windows: activate the
+    default device, drag the slider across the range, switch the default
+    device and toggle mute.
+    """
+    class Pointer:
+        def __init__(self, value):
+            self.value = value
+
+    recorder = TraceRecorder(path)
+    clock = [recorder.origin_ns]
+    latency = int(device_latency_ms * 1e6)
+
+    def emit(interface, method, args, result=None, gap_ms=1.0):
+        recorder.record(interface, method, args, result, 0, clock[0], latency)
+        clock[0] += int(gap_ms * 1e6) + latency
+
+    enumerator, speakers, headphones = Pointer(0x1000), Pointer(0x2000), Pointer(0x3000)
+    speakers_volume, headphones_volume = Pointer(0x2100), Pointer(0x3100)
+    emit("IMMDeviceEnumerator", "GetDefaultAudioEndpoint", (enumerator, 0, 0), speakers)
+    emit("IMMDevice", "Activate", (speakers,), speakers_volume)
+    emit("IAudioEndpointVolume", "GetMasterVolumeLevelScalar", (speakers_volume,), 0.5)
+    for i in range(drag_steps):
+        emit("IAudioEndpointVolume", "SetMasterVolumeLevelScalar",
+             (speakers_volume, i / max(1, drag_steps - 1)), gap_ms=8.0)
+    emit("IMMDevice", "Activate", (headphones,), headphones_volume, gap_ms=500.0)
+    emit("IPolicyConfig", "SetDefaultEndpoint", ("{0.0.0.00000000}.{headphones}",), gap_ms=20.0)
+    emit("IAudioEndpointVolume", "SetMute", (headphones_volume, True), gap_ms=300.0)
+    emit("IAudioEndpointVolume", "SetMute", (headphones_volume, False), gap_ms=300.0)
+    recorder.close()
+    return recorder.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and replay volume COM traces")
+    commands = parser.add_subparsers(dest="command", required=True)
+    dump = commands.add_parser("dump", help="print the recorded calls")
+    dump.add_argument("trace")
+    replay = commands.add_parser("replay", help="replay against the simulated backend")
+    replay.add_argument("trace")
+    replay.add_argument("--speed", type=float, default=1.0, help="time compression factor")
+    replay.add_argument("--fast", action="store_true", help="ignore recorded gaps between calls")
+    replay.add_argument("--no-latency", action="store_true", help="ignore recorded call latencies")
+    synth = commands.add_parser("synth", help="write a synthetic trace")
+    synth.add_argument("trace")
+    args = parser.parse_args()
+
+    if args.command == "synth":
+        print(f"Wrote {write_synthetic_trace(args.trace)} calls to {args.trace}")
+        return
+    wall_start, calls = read_trace(args.trace)
+    if args.command == "dump":
+        print(f"# {len(calls)} calls recorded {time.ctime(wall_start)}")
+        for call in calls:
+            print(f"{call.start_ns / 1e6:12.3f}ms {call.latency_ns / 1e3:9.1f}us "
+                  f"hr=0x{call.hresult & 0xFFFFFFFF:08X} {call.interface}.{call.method}"
+                  f"{call.args!r} -> {call.result!r}")
+        return
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from audio_backend import SimulatedAudioBackend
+    stats = TraceReplayer(calls, SimulatedAudioBackend(), speed=args.speed,
+                          honor_timing=not args.fast, honor_latency=not args.no_latency).run()
+    for key, value in stats.items():
+        print(f"{key:>16}: {value:.3f}" if isinstance(value, float) else f"{key:>16}: {value}")
+
+
+if __name__ == "__main__":
+    main()
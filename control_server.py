@@ -0,0 +1,475 @@
+"""
+Local JSON-RPC 2.0 control server for the volume package operations.
+
+Clients connect over TCP on localhost or a Unix-domain socket and exchange
+newline-delimited JSON: one request object, or one batch array, per line.
+Connections stay open for any number of requests. A batch is executed as a
+single job on the backend worker thread, so it costs one worker round-trip
+however many calls it contains.
+
+Methods:
+    list(flow="all")              get(device=None)
+    set(level, device=None)       step(direction, device=None)
+    mute(muted=None, device=None) set_default(device)
+    get_db(device=None)           set_db(db, device=None)
+    get_position(device=None)     set_position(position, device=None)
+    get_channels(device=None)     set_channels(levels, device=None)
+    sessions(device=None)         set_session(process, level, device=None)
+    metrics()                     ping()
+    subscribe() / unsubscribe()
+
+Positions are calibrated 0..100 slider positions (see calibration.py).
+set, set_db, set_position, set_channels, step and mute also accept
+`context`, a controller name echoed back as the "source" of the resulting
+volume event.
+
+After `subscribe`, the connection also receives change notifications:
+    {"jsonrpc": "2.0", "method": "event", "params": {...}}
+
+asyncio has no public named-pipe server, so on Windows the server listens on
+TCP localhost; Unix-domain sockets are used where asyncio supports them.
+
+Usage:
+    python control_server.py --simulate --address tcp:127.0.0.1:8765
+    python -m volume --serve unix:/tmp/volume.sock
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import inspect
+import itertools
+import json
+import socket
+import threading
+
+from audio_backend import BackendError
+
+DEFAULT_ADDRESS = "tcp:127.0.0.1:8765"
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+BACKEND_ERROR = -32000
+
+# RPC method name -> backend method name
+BACKEND_METHODS = {
+    "list": "list_devices",
+    "get": "get_volume",
+    "set": "set_volume",
+    "step": "step_volume",
+    "mute": "set_mute",
+    "get_db": "get_volume_db",
+    "set_db": "set_volume_db",
+    "get_position": "get_position",
+    "set_position": "set_position",
+    "get_channels": "get_channels",
+    "set_channels": "set_channels",
+    "set_default": "set_default",
+    "sessions": "list_sessions",
+    "set_session": "set_session_volume",
+    "metrics": "metrics",
+}
+
+# Parameter name -> accepted types, checked before a backend method runs
+PARAM_TYPES = {
+    "device": (str, type(None)),
+    "flow": str,
+    "direction": str,
+    "process": str,
+    "context": (str, type(None)),
+    "muted": (bool, int, type(None)),
+    "levels": list,
+}
+
+# Subscribers whose socket buffer grows past this stop receiving events
+# until they catch up, so a stalled client cannot grow server memory.
+MAX_SUBSCRIBER_BUFFER = 1 << 20
+
+
+class RpcError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def parse_address(address):
+    """Parses "tcp:HOST:PORT" or "unix:PATH" into (kind, target)."""
+    kind, _, rest = address.partition(":")
+    if kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        return "tcp", (host or "127.0.0.1", int(port))
+    if kind == "unix":
+        if not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Unix-domain sockets are not available on this platform.")
+        return "unix", rest
+    raise ValueError(f"Unsupported address: {address!r}")
+
+
+def _error(request_id, code, message):
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def _check_request(request):
+    if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" \
+            or not isinstance(request.get("method"), str):
+        raise RpcError(INVALID_REQUEST, "Invalid Request")
+    params = request.get("params", {})
+    if not isinstance(params, (dict, list)):
+        raise RpcError(INVALID_PARAMS, "params must be an object or array")
+    return request["method"], params
+
+
+class ControlServer:
+    """
+    Serves JSON-RPC on `address`. `backend_factory` is called once on the
+    dedicated worker thread (for the COM backend that is where COM gets
+    initialized) and every backend call runs on that same thread.
+    """
+    def __init__(self, backend_factory, address=DEFAULT_ADDRESS):
+        self.backend_factory = backend_factory
+        self.address = address
+        self.backend = None
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="volume-rpc-worker")
+        self.subscribers = set()
+        self.handlers = set()    # connection handler tasks, cancelled by shutdown()
+        self.signatures = {}   # backend method name -> inspect.Signature
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.stats = {"connections": 0, "requests": 0, "batches": 0, "events": 0}
+
+    # -------------------------------
+    # Worker-thread side
+    # -------------------------------
+    def _create_backend(self):
+        backend = self.backend_factory()
+        backend.add_listener(self._on_backend_event)
+        return backend
+
+    def _call(self, method, params):
+        name = BACKEND_METHODS.get(method)
+        if name is None:
+            raise RpcError(METHOD_NOT_FOUND, f"Method not found: {method}")
+        func = getattr(self.backend, name)
+        signature = self.signatures.get(name)
+        if signature is None:
+            signature = self.signatures[name] = inspect.signature(func)
+        try:
+            bound = signature.bind(*params) if isinstance(params, list) else signature.bind(**params)
+        except TypeError as e:
+            raise RpcError(INVALID_PARAMS, str(e))
+        for param, value in bound.arguments.items():
+            expected = PARAM_TYPES.get(param)
+            if expected is not None and not isinstance(value, expected):
+                raise RpcError(INVALID_PARAMS, f"Invalid type for {param}: {type(value).__name__}")
+        return func(*bound.args, **bound.kwargs)
+
+    def _execute(self, calls):
+        """Runs a list of (id, method, params) on the worker and returns response dicts."""
+        responses = []
+        for request_id, method, params in calls:
+            try:
+                result = self._call(method, params)
+                response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+            except RpcError as e:
+                response = _error(request_id, e.code, e.message)
+            except (BackendError, OSError, ValueError) as e:
+                # Includes com_guard's ComTimeoutError (a TimeoutError, hence OSError).
+                response = _error(request_id, BACKEND_ERROR, str(e))
+            except Exception as e:
+                # A bug in one call must not cost the connection or the rest of the batch.
+                print(f"RPC {method} failed:", repr(e))
+                response = _error(request_id, INTERNAL_ERROR, f"Internal error: {e}")
+            responses.append(response)
+        return responses
+
+    def _on_backend_event(self, event):
+        # Called on the worker thread; hand the event to the event loop.
+        if self.subscribers and self.loop is not None:
+            self.loop.call_soon_threadsafe(self._broadcast, event)
+
+    # -------------------------------
+    # Event-loop side
+    # -------------------------------
+    def _broadcast(self, event):
+        if not self.subscribers:
+            return
+        self.stats["events"] += 1
+        line = json.dumps({"jsonrpc": "2.0", "method": "event", "params": event}).encode() + b"\n"
+        for writer in list(self.subscribers):
+            if writer.is_closing():
+                self.subscribers.discard(writer)
+            elif writer.transport.get_write_buffer_size() < MAX_SUBSCRIBER_BUFFER:
+                writer.write(line)
+
+    def _local_call(self, method, writer):
+        if method == "subscribe":
+            self.subscribers.add(writer)
+            return True
+        if method == "unsubscribe":
+            self.subscribers.discard(writer)
+            return True
+        return "pong"
+
+    async def _dispatch(self, payload, writer):
+        """Returns the response payload (dict, list or None) for one parsed line."""
+        batch = isinstance(payload, list)
+        requests = payload if batch else [payload]
+        if batch:
+            if not requests:
+                return _error(None, INVALID_REQUEST, "Empty batch")
+            self.stats["batches"] += 1
+        self.stats["requests"] += len(requests)
+
+        # Each slot is (is_notification, ready response or index into the worker job).
+        slots = []
+        calls = []
+        for request in requests:
+            request_id = request.get("id") if isinstance(request, dict) else None
+            try:
+                method, params = _check_request(request)
+            except RpcError as e:
+                slots.append((False, _error(request_id, e.code, e.message)))
+                continue
+            # Requests without an id are notifications and get no response.
+            notification = "id" not in request
+            if method in ("subscribe", "unsubscribe", "ping"):
+                result = self._local_call(method, writer)
+                slots.append((notification, {"jsonrpc": "2.0", "id": request_id, "result": result}))
+            else:
+                slots.append((notification, len(calls)))
+                calls.append((request_id, method, params))
+
+        results = []
+        if calls:
+            results = await self.loop.run_in_executor(self.executor, self._execute, calls)
+
+        responses = [results[value] if isinstance(value, int) else value
+                     for notification, value in slots if not notification]
+        if not responses:
+            return None
+        return responses if batch else responses[0]
+
+    async def _handle_connection(self, reader, writer):
+        self.stats["connections"] += 1
+        handler = asyncio.current_task()
+        self.handlers.add(handler)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    payload = json.loads(line)
+                except ValueError:
+                    response = _error(None, PARSE_ERROR, "Parse error")
+                else:
+                    response = await self._dispatch(payload, writer)
+                if response is not None:
+                    writer.write(json.dumps(response).encode() + b"\n")
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # ValueError: a line longer than the stream limit (64 KiB); there is no way to find the next one
+            pass
+        except asyncio.CancelledError:
+            pass  # shutdown() closes open connections
+        finally:
+            self.subscribers.discard(writer)
+            self.handlers.discard(handler)
+            writer.close()
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.backend = await self.loop.run_in_executor(self.executor, self._create_backend)
+        kind, target = parse_address(self.address)
+        if kind == "tcp":
+            self.server = await asyncio.start_server(self._handle_connection, *target)
+            if target[1] == 0:
+                # Report the ephemeral port the OS picked.
+                self.address = f"tcp:{target[0]}:{self.server.sockets[0].getsockname()[1]}"
+        else:
+            self.server = await asyncio.start_unix_server(self._handle_connection, target)
+        print("Control server listening on", self.address)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def shutdown(self, grace=1.0):
+        """
+        Stops listening, cancels the open connections and waits for them,
+        and gives a backend call still running `grace` seconds to finish.
+        """
+        if self.backend is not None:
+            self.backend.remove_listener(self._on_backend_event)
+        if self.server is not None:
+            self.server.close()
+        handlers = list(self.handlers)
+        for handler in handlers:
+            handler.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+        # The worker runs jobs in order: once this one ran, nothing will complete into the loop.
+        barrier = self.executor.submit(lambda: None)
+        self.executor.shutdown(wait=False)
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(barrier), grace)
+        except asyncio.TimeoutError:
+            print("Control server: a backend call was still running at shutdown.")
+
+    def start_in_thread(self):
+        """
+        Runs the server on a daemon thread with its own event loop, returning
+        once it is listening. Used by the GUI so Tk keeps the main thread.
+        """
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except Exception as e:
+                errors.append(e)
+                started.set()
+                loop.close()
+                return
+            started.set()
+            try:
+                loop.run_forever()
+            finally:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.close()
+
+        self.thread = threading.Thread(target=run, name="volume-rpc-server", daemon=True)
+        self.thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self.thread
+
+    def stop_from_thread(self, timeout=5.0):
+        """Shuts down a server started with start_in_thread() and waits for its loop to close."""
+        if self.loop is None or self.loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result(timeout)
+        except concurrent.futures.TimeoutError:
+            print("Control server did not shut down in time.")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+
+# ============================================================
+# Blocking client (scripts, hotkeys, tests)
+# ============================================================
+class ControlClient:
+    """Minimal keep-alive client. Notifications received while waiting for a response are queued in `events`."""
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=5.0):
+        kind, target = parse_address(address)
+        family = socket.AF_INET if kind == "tcp" else socket.AF_UNIX
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(target)
+        if kind == "tcp":
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile("rb")
+        self.ids = itertools.count(1)
+        self.events = []
+
+    def _send(self, payload):
+        self.sock.sendall(json.dumps(payload).encode() + b"\n")
+
+    def _receive(self):
+        while True:
+            line = self.file.readline()
+            if not line:
+                raise ConnectionError("Control server closed the connection.")
+            message = json.loads(line)
+            if isinstance(message, dict) and message.get("method") == "event":
+                self.events.append(message["params"])
+                continue
+            return message
+
+    def call(self, method, **params):
+        self._send({"jsonrpc": "2.0", "id": next(self.ids), "method": method, "params": params})
+        response = self._receive()
+        if "error" in response:
+            raise RpcError(response["error"]["code"], response["error"]["message"])
+        return response["result"]
+
+    def batch(self, calls):
+        """Sends [(method, params), ...] as one batch and returns the responses in request order."""
+        requests = [{"jsonrpc": "2.0", "id": next(self.ids), "method": method, "params": params}
+                    for method, params in calls]
+        self._send(requests)
+        by_id = {response.get("id"): response for response in self._receive()}
+        return [by_id.get(request["id"]) for request in requests]
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON-RPC control server for the volume package")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS,
+                        help="tcp:HOST:PORT or unix:PATH (default: %(default)s)")
+    parser.add_argument("--simulate", action="store_true",
+                        help="use the in-memory simulated backend instead of Core Audio")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="simulated per-call latency in seconds")
+    parser.add_argument("--groups", metavar="FILE",
+                        help="keep the linked volume groups defined in FILE (JSON) in step")
+    parser.add_argument("--rules", metavar="FILE",
+                        help="run the automation rules defined in FILE (JSON)")
+    args = parser.parse_args()
+
+    if args.simulate:
+        from audio_backend import SimulatedAudioBackend
+        factory = lambda: SimulatedAudioBackend(latency=args.latency)
+    else:
+        from audio_backend import ComAudioBackend
+        factory = ComAudioBackend
+    if args.groups:
+        from volume_groups import VolumeGroupManager, load_groups
+        groups = load_groups(args.groups)
+        base_factory = factory
+
+        def factory():
+            backend = base_factory()
+            VolumeGroupManager(backend, groups).start()
+            return backend
+    if args.rules:
+        from automation import RuleEngine, load_rules
+        rules = load_rules(args.rules)
+        rules_factory = factory
+
+        def factory():
+            backend = rules_factory()
+            if hasattr(backend, "watch_endpoints"):
+                backend.watch_endpoints()
+                backend.watch_sessions()
+            RuleEngine(backend, rules).start()
+            return backend
+    server = ControlServer(factory, args.address)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Automatic ducking while a call is in progress.
+
+DuckingEngine lowers every other render endpoint and application session by
+`duck_db` while there is communications activity, and restores them when it
+ends. Activity comes from two event-driven sources:
+
+  - session events: a session of one of `processes` (Teams.exe, ...)
+    becoming active, or any session on the communications render endpoint
+    when that is a dedicated device (not also the console default);
+  - the peak meter: meter_sampler() wraps a PeakMeter sampler (normally the
+    communications capture endpoint) and reports a transition only when the
+    peak crosses `on_db` upwards or `off_db` downwards, so the engine is
+    woken by the meter thread's own samples rather than polling.
+
+Ducking ramps in over `attack` seconds and out over `release` seconds,
+writing at most `rate` steps per second and only while a ramp is running.
+The release starts only after `hold` seconds without activity, and new
+activity during a release ramps back down from where it is. Together with
+the gap between on_db and off_db this keeps speech pauses from pumping the
+music.
+
+The levels to restore are taken from the backend (its state cache) when the
+duck starts, and the last step writes them back as the exact scalars read.
+An endpoint or session that someone else changes while ducked is left where
+they put it. Endpoint ramps run in dB through set_volume_db; session volumes
+are scalar, so they are scaled by the same dB factor.
+
+Configuration is JSON, all keys optional:
+
+    {"duck_db": 15, "attack": 0.3, "release": 1.5, "hold": 2.0,
+     "processes": ["Teams.exe", "Zoom.exe"], "sessions": true,
+     "meter": {"flow": "capture", "on_db": -40, "off_db": -50}}
+"""
+import concurrent.futures
+import json
+import threading
+import time
+
+from audio_backend import clamp_level
+
+
+def load_config(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def start_ducking(backend, config):
+    """
+    Starts a DuckingEngine on a ComAudioBackend from a config dict, plus a
+    PeakMeter on the communications endpoint if it has a "meter" section.
+    Returns (engine, meter or None).
+    """
+    config = dict(config)
+    meter_config = dict(config.pop("meter", None) or {})
+    backend.watch_endpoints()
+    backend.watch_sessions()
+    engine = DuckingEngine(backend, **config).start()
+    if not meter_config:
+        return engine, None
+    from meter import PeakMeter
+    from volume import init_com, make_peak_sampler
+    device_id = backend.communications_device(meter_config.pop("flow", "capture"))
+    meter = PeakMeter(rate=meter_config.pop("rate", 30.0), thread_init=init_com)
+    sampler = make_peak_sampler(backend.cache.audio_meter(device_id))
+    meter.add_source(device_id, engine.meter_sampler(("meter", device_id), sampler, **meter_config))
+    meter.start()
+    return engine, meter
+
+
+class DuckingEngine:
+    """
+    Follows `backend` session and volume events. `processes` are the
+    communications applications whose active sessions duck everything
+    else. Call start() to begin and close() to stop; close() restores
+    anything still ducked.
+    """
+    def __init__(self, backend, duck_db=15.0, attack=0.3, release=1.5, hold=2.0, processes=(), sessions=True,
+                 rate=30.0, context_name="ducking", max_workers=8, clock=time.monotonic):
+        self.backend = backend
+        self.duck_db = duck_db
+        self.attack = attack
+        self.release = release
+        self.hold = hold
+        self.processes = {process.lower() for process in processes}
+        self.duck_sessions = sessions
+        self.period = 1.0 / rate
+        self.context_name = context_name
+        self.clock = clock
+        self.comm_device = None
+        self.trigger_device = None
+        self.active = set()       # keys of the current activity sources
+        self.quiet_since = None   # when the last activity source went quiet
+        self.depth = 0.0          # 0 = not ducked, 1 = fully ducked
+        self.endpoints = {}       # endpoint ID -> (level, dB) to restore
+        self.sessions = {}        # (process, endpoint ID) -> level to restore
+        self.stats = {"ducks": 0, "restores": 0, "steps": 0, "writes": 0, "overrides": 0,
+                      "transitions": 0, "errors": 0}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="duck-write")
+        self._thread = threading.Thread(target=self._run, name="ducking", daemon=True)
+
+    def start(self):
+        self._find_comm_device()
+        for session in self.backend.list_sessions():
+            if session["active"] and self._is_trigger(session):
+                self.active.add(("session", session["device"], session["pid"]))
+        self.backend.add_listener(self.on_event)
+        self._thread.start()
+        return self
+
+    def _find_comm_device(self):
+        # The communications endpoint carries the call, so it is never ducked. Its sessions only
+        # count as call activity when it is a dedicated device, not also the console default.
+        comm = self.backend.communications_device("render")
+        console = next((device["id"] for device in self.backend.list_devices("render") if device["default"]), None)
+        self.comm_device = comm
+        self.trigger_device = comm if comm != console else None
+
+    def _is_trigger(self, session):
+        return ((session["process"] or "").lower() in self.processes
+                or (self.trigger_device is not None and session["device"] == self.trigger_device))
+
+    # -------------------------------
+    # Activity intake (backend and meter threads)
+    # -------------------------------
+    def set_activity(self, key, active):
+        with self._cond:
+            if active:
+                if key in self.active:
+                    return
+                self.active.add(key)
+            else:
+                if key not in self.active:
+                    return
+                self.active.discard(key)
+                if not self.active:
+                    self.quiet_since = self.clock()
+            self.stats["transitions"] += 1
+            self._cond.notify()
+
+    def meter_sampler(self, key, sampler, on_db=-40.0, off_db=-50.0):
+        """
+        Wraps a PeakMeter sampler so its peaks drive activity for `key`,
+        with hysteresis between on_db and off_db (dBFS).
+        """
+        on_peak = 10 ** (on_db / 20)
+        off_peak = 10 ** (off_db / 20)
+        state = [False]
+
+        def sample():
+            peak, channel_peaks = sampler()
+            if not state[0] and peak >= on_peak:
+                state[0] = True
+                self.set_activity(key, True)
+            elif state[0] and peak < off_peak:
+                state[0] = False
+                self.set_activity(key, False)
+            return peak, channel_peaks
+        return sample
+
+    def on_event(self, event):
+        kind = event.get("event")
+        if kind == "session":
+            self._on_session(event)
+        elif kind == "volume":
+            with self._cond:
+                if event["device"] in self.endpoints and event.get("source") != self.context_name:
+                    # Someone else moved it while ducked; leave it there.
+                    del self.endpoints[event["device"]]
+                    self.stats["overrides"] += 1
+        elif kind == "default" and event.get("flow") == "render":
+            self._find_comm_device()
+
+    def _on_session(self, event):
+        change = event["change"]
+        if self._is_trigger(event):
+            key = ("session", event["device"], event["pid"])
+            self.set_activity(key, event["active"] and change != "removed")
+            return
+        if not self.duck_sessions:
+            return
+        target = ((event["process"] or "").lower(), event["device"])
+        with self._cond:
+            if self.depth <= 0.0:
+                return
+            if change == "volume" and event.get("source") != self.context_name and target in self.sessions:
+                del self.sessions[target]
+                self.stats["overrides"] += 1
+                return
+            if change != "added" or target in self.sessions:
+                return
+            # An application that starts playing mid-call joins the duck. Once fully ducked the
+            # engine thread is idle, so it is brought down to the current depth here.
+            self.sessions[target] = event["level"]
+            value = clamp_level(event["level"] * 10 ** (-self.depth * self.duck_db / 20))
+        self._executor.submit(self._write, self.backend.set_session_volume, target[0], value, target[1])
+
+    # -------------------------------
+    # Ramping (engine thread)
+    # -------------------------------
+    def _target(self, now):
+        if self.active:
+            return 1.0
+        if self.depth > 0.0 and self.quiet_since is not None and now - self.quiet_since < self.hold:
+            return 1.0
+        return 0.0
+
+    def _run(self):
+        last = None
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    now = self.clock()
+                    target = self._target(now)
+                    if target != self.depth:
+                        break
+                    last = None
+                    timeout = None
+                    if not self.active and self.depth > 0.0 and self.quiet_since is not None:
+                        timeout = max(0.0, self.quiet_since + self.hold - now)
+                    self._cond.wait(timeout)
+                starting = self.depth == 0.0
+            if starting:
+                endpoints, sessions = self._read_levels()
+                with self._cond:
+                    self.endpoints, self.sessions = endpoints, sessions
+                    self.stats["ducks"] += 1
+            with self._cond:
+                elapsed = self.period if last is None else now - last
+                if target > self.depth:
+                    self.depth = min(1.0, self.depth + elapsed / self.attack) if self.attack > 0 else 1.0
+                else:
+                    self.depth = max(0.0, self.depth - elapsed / self.release) if self.release > 0 else 0.0
+                depth = self.depth
+                endpoints = dict(self.endpoints)
+                sessions = dict(self.sessions)
+                if depth == 0.0:
+                    self.endpoints.clear()
+                    self.sessions.clear()
+                    self.stats["restores"] += 1
+            last = now
+            self._apply(depth, endpoints, sessions)
+            # Pace the ramp; new activity or close() still wakes the thread at once.
+            with self._cond:
+                if not self._closed and self._target(self.clock()) != self.depth:
+                    self._cond.wait(self.period)
+
+    def _read_levels(self):
+        """Returns the endpoint (level, dB) and session levels to restore, read when a duck starts."""
+        endpoints = {}
+        for device in self.backend.list_devices("render"):
+            if device["id"] == self.comm_device:
+                continue
+            try:
+                level = self.backend.get_volume(device["id"])["level"]
+                db = self.backend.get_volume_db(device["id"])["db"]
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Ducking cannot read {device['id']}:", e)
+                continue
+            endpoints[device["id"]] = (level, db)
+        sessions = {}
+        if self.duck_sessions:
+            for session in self.backend.list_sessions():
+                if not self._is_trigger(session):
+                    sessions.setdefault(((session["process"] or "").lower(), session["device"]), session["level"])
+        return endpoints, sessions
+
+    def _write(self, func, *args):
+        try:
+            func(*args, context=self.context_name)
+            self.stats["writes"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Ducking write {func.__name__} failed:", e)
+
+    def _apply(self, depth, endpoints, sessions):
+        self.stats["steps"] += 1
+        writes = []
+        for device_id, (level, db) in endpoints.items():
+            if depth == 0.0:
+                # The exact level read before ducking, not a dB round trip.
+                writes.append(self._executor.submit(self._write, self.backend.set_volume, level, device_id))
+            else:
+                writes.append(self._executor.submit(self._write, self.backend.set_volume_db,
+                                                    db - depth * self.duck_db, device_id))
+        gain = 10 ** (-depth * self.duck_db / 20)
+        for (process, device_id), level in sessions.items():
+            value = level if depth == 0.0 else clamp_level(level * gain)
+            writes.append(self._executor.submit(self._write, self.backend.set_session_volume,
+                                                process, value, device_id))
+        concurrent.futures.wait(writes)
+
+    def close(self):
+        self.backend.remove_listener(self.on_event)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        if self.depth > 0.0:
+            self._apply(0.0, self.endpoints, self.sessions)
+            self.depth = 0.0
+        self._executor.shutdown()
@@ -0,0 +1,701 @@
+"""
+Controller/agent fan-out for managing volume on many machines from one node.
+
+Each machine runs a headless agent that serves the audio backend operations
+over a compact binary protocol. A controller fans one command out to many
+agents concurrently with asyncio: it keeps one pooled connection per host,
+pipelines all of a command's operations on it, bounds every host by its own
+timeout and aggregates the results.
+
+Frames are a fixed header followed by an op-specific body:
+
+    !IIBB  body length, request id, opcode, status (0 ok, 1 error)
+
+Device-addressed requests carry a target (!BH flow + endpoint ID length,
+then the UTF-8 ID); an empty ID selects that flow's default endpoint.
+Responses carry the request id, so a connection can have any number of
+requests in flight. A request the agent cannot parse gets an error reply
+like any failed operation.
+
+An agent started with a shared token requires every connection to open
+with a HELLO frame carrying that token, and closes connections that do
+not. Agents listen on 127.0.0.1 by default; binding another address needs
+--allow-remote and a token (--token or the FLEET_TOKEN environment
+variable). The token travels in clear, so keep agents on a trusted network.
+
+Inventory files name hosts and groups of hosts, and the agents' token:
+
+    {"hosts": {"kiosk-301": "10.0.3.1:8766", ...},
+     "groups": {"room-3": ["kiosk-301", "kiosk-302"]},
+     "token": "..."}
+
+Usage:
+    python fleet.py agent --listen 0.0.0.0:8766 --allow-remote --token ...
+    python fleet.py run -i lab.json -t room-3 set=40% capture:mute=on
+    python fleet.py demo --agents 200 -t room-3 set=40% capture:mute=on
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import hmac
+import ipaddress
+import itertools
+import json
+import os
+import struct
+import time
+
+from audio_backend import FLOW_NAMES, BackendError, SimulatedAudioBackend
+
+DEFAULT_PORT = 8766
+DEFAULT_TIMEOUT = 3.0
+MAX_BODY = 1 << 16
+
+HEADER = struct.Struct("!IIBB")
+TARGET = struct.Struct("!BH")
+STATE = struct.Struct("!fB")
+STRING = struct.Struct("!H")
+LEVEL = struct.Struct("!f")
+BYTE = struct.Struct("!B")
+SIGNED = struct.Struct("!b")
+COUNT = struct.Struct("!H")
+
+OP_PING = 0
+OP_LIST = 1
+OP_GET = 2
+OP_SET = 3
+OP_STEP = 4
+OP_MUTE = 5
+OP_SET_DEFAULT = 6
+OP_HELLO = 7
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+MUTE_OFF, MUTE_ON, MUTE_TOGGLE = 0, 1, 2
+FLOW_ALL = 2
+TOKEN_ENV = "FLEET_TOKEN"
+
+
+class FleetError(Exception):
+    """An agent answered a request with an error."""
+
+
+def parse_host_address(address, default_port=DEFAULT_PORT):
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, default_port
+    return host, int(port)
+
+
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+# ============================================================
+# Wire encoding
+# ============================================================
+def _pack_str(text):
+    data = text.encode("utf-8")
+    return STRING.pack(len(data)) + data
+
+
+def _unpack_str(buf, offset):
+    (length,) = STRING.unpack_from(buf, offset)
+    offset += STRING.size
+    return bytes(buf[offset:offset + length]).decode("utf-8"), offset + length
+
+
+def _pack_target(flow, device):
+    data = (device or "").encode("utf-8")
+    return TARGET.pack(flow, len(data)) + data
+
+
+def _unpack_target(buf, offset):
+    flow, length = TARGET.unpack_from(buf, offset)
+    if flow not in FLOW_NAMES:
+        raise ValueError(f"Invalid data flow {flow}")
+    offset += TARGET.size
+    if offset + length > len(buf):
+        raise ValueError("Truncated endpoint ID")
+    return flow, bytes(buf[offset:offset + length]).decode("utf-8") or None, offset + length
+
+
+def frame(request_id, opcode, body=b"", status=STATUS_OK):
+    return HEADER.pack(len(body), request_id, opcode, status) + body
+
+
+async def read_frame(reader):
+    header = await reader.readexactly(HEADER.size)
+    length, request_id, opcode, status = HEADER.unpack(header)
+    if length > MAX_BODY:
+        raise ConnectionError(f"Frame body of {length} bytes exceeds {MAX_BODY}")
+    body = await reader.readexactly(length) if length else b""
+    return request_id, opcode, status, body
+
+
+def _pack_state(state):
+    return STATE.pack(state["level"], state["muted"]) + _pack_str(state["device"])
+
+
+def _unpack_state(body):
+    level, muted = STATE.unpack_from(body, 0)
+    device, _ = _unpack_str(body, STATE.size)
+    return {"device": device, "level": round(level, 4), "muted": bool(muted)}
+
+
+# Request builders used by the controller: each returns (opcode, body).
+def op_ping():
+    return OP_PING, b""
+
+
+def op_list(flow=FLOW_ALL):
+    return OP_LIST, BYTE.pack(flow)
+
+
+def op_get(flow=0, device=None):
+    return OP_GET, _pack_target(flow, device)
+
+
+def op_set(level, flow=0, device=None):
+    return OP_SET, LEVEL.pack(level) + _pack_target(flow, device)
+
+
+def op_step(direction, flow=0, device=None):
+    return OP_STEP, SIGNED.pack(1 if direction == "up" else -1) + _pack_target(flow, device)
+
+
+def op_mute(muted=None, flow=0, device=None):
+    mode = MUTE_TOGGLE if muted is None else (MUTE_ON if muted else MUTE_OFF)
+    return OP_MUTE, BYTE.pack(mode) + _pack_target(flow, device)
+
+
+def op_set_default(device):
+    return OP_SET_DEFAULT, _pack_target(0, device)
+
+
+def op_hello(token):
+    return OP_HELLO, token.encode("utf-8")
+
+
+def decode_reply(opcode, body):
+    if opcode == OP_PING:
+        return "pong"
+    if opcode == OP_HELLO:
+        return "ok"
+    if opcode == OP_LIST:
+        (count,) = COUNT.unpack_from(body, 0)
+        offset = COUNT.size
+        devices = []
+        for _ in range(count):
+            flow, default = BYTE.unpack_from(body, offset)[0], BYTE.unpack_from(body, offset + 1)[0]
+            device_id, offset = _unpack_str(body, offset + 2)
+            name, offset = _unpack_str(body, offset)
+            devices.append({"id": device_id, "name": name, "flow": FLOW_NAMES.get(flow),
+                            "default": bool(default)})
+        return devices
+    if opcode == OP_SET_DEFAULT:
+        device, _ = _unpack_str(body, BYTE.size)
+        return {"device": device, "flow": FLOW_NAMES.get(body[0])}
+    return _unpack_state(body)
+
+
+def parse_op(text):
+    """
+    Parses a command-line operation "[flow:]op[=value]", e.g. "set=40%",
+    "capture:mute=on", "step=down", "get", "list", "default=<endpoint ID>".
+    """
+    head, _, value = text.partition("=")
+    flow_name, _, name = head.rpartition(":")
+    flow = {"": 0, "render": 0, "capture": 1}.get(flow_name)
+    if flow is None:
+        raise ValueError(f"Unknown data flow in {text!r}")
+    if name == "set":
+        level = float(value.rstrip("%"))
+        if value.endswith("%") or level > 1.0:
+            level /= 100.0
+        return op_set(level, flow)
+    if name == "step" and value in ("up", "down"):
+        return op_step(value, flow)
+    if name == "mute" and value in ("on", "off", "toggle", ""):
+        return op_mute({"on": True, "off": False}.get(value), flow)
+    if name == "get":
+        return op_get(flow)
+    if name == "list":
+        return op_list(flow if flow_name else FLOW_ALL)
+    if name == "default" and value:
+        return op_set_default(value)
+    if name == "ping":
+        return op_ping()
+    raise ValueError(f"Invalid operation: {text!r}")
+
+
+# ============================================================
+# Agent (one per machine)
+# ============================================================
+class FleetAgent:
+    """
+    Serves the binary protocol on `address` ("HOST:PORT"). Like the control
+    server, `backend_factory` is called on a dedicated worker thread and
+    every backend call runs there. With a `token`, connections must open
+    with a matching HELLO; one is required unless `address` is loopback.
+    """
+    def __init__(self, backend_factory, address=f"127.0.0.1:{DEFAULT_PORT}", token=None):
+        host, _ = parse_host_address(address)
+        if not token and not is_loopback(host):
+            raise ValueError(f"A shared token is required to serve on {address}")
+        self.backend_factory = backend_factory
+        self.address = address
+        self.token = token.encode("utf-8") if token else None
+        self.backend = None
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="fleet-agent-worker")
+        self.server = None
+        self.port = None
+        self.handlers = set()
+        self.stats = {"connections": 0, "requests": 0, "errors": 0, "rejected": 0}
+
+    # -------------------------------
+    # Worker-thread side
+    # -------------------------------
+    def _resolve(self, flow, device):
+        if device is not None or flow == 0:
+            return device
+        for info in self.backend.list_devices(FLOW_NAMES[flow]):
+            if info["default"]:
+                return info["id"]
+        raise BackendError(f"No default {FLOW_NAMES[flow]} device")
+
+    def _execute(self, opcode, body):
+        backend = self.backend
+        if opcode in (OP_PING, OP_HELLO):
+            return b""
+        if opcode == OP_LIST:
+            (flow,) = BYTE.unpack_from(body, 0)
+            if flow != FLOW_ALL and flow not in FLOW_NAMES:
+                raise ValueError(f"Invalid data flow {flow}")
+            devices = backend.list_devices("all" if flow == FLOW_ALL else FLOW_NAMES[flow])
+            parts = [COUNT.pack(len(devices))]
+            for info in devices:
+                parts.append(BYTE.pack({"render": 0, "capture": 1}.get(info["flow"], FLOW_ALL)))
+                parts.append(BYTE.pack(bool(info["default"])))
+                parts.append(_pack_str(info["id"]))
+                parts.append(_pack_str(info["name"]))
+            return b"".join(parts)
+        if opcode == OP_SET:
+            (level,) = LEVEL.unpack_from(body, 0)
+            flow, device, _ = _unpack_target(body, LEVEL.size)
+            return _pack_state(backend.set_volume(level, self._resolve(flow, device)))
+        if opcode == OP_STEP:
+            (direction,) = SIGNED.unpack_from(body, 0)
+            flow, device, _ = _unpack_target(body, SIGNED.size)
+            return _pack_state(backend.step_volume("up" if direction > 0 else "down",
+                                                   self._resolve(flow, device)))
+        if opcode == OP_MUTE:
+            (mode,) = BYTE.unpack_from(body, 0)
+            if mode not in (MUTE_OFF, MUTE_ON, MUTE_TOGGLE):
+                raise ValueError(f"Invalid mute mode {mode}")
+            flow, device, _ = _unpack_target(body, BYTE.size)
+            muted = None if mode == MUTE_TOGGLE else mode == MUTE_ON
+            return _pack_state(backend.set_mute(muted, self._resolve(flow, device)))
+        if opcode == OP_GET:
+            flow, device, _ = _unpack_target(body, 0)
+            return _pack_state(backend.get_volume(self._resolve(flow, device)))
+        if opcode == OP_SET_DEFAULT:
+            _, device, _ = _unpack_target(body, 0)
+            result = backend.set_default(device)
+            return BYTE.pack({"render": 0, "capture": 1}.get(result["flow"], 0)) + _pack_str(result["device"])
+        raise BackendError(f"Unknown opcode {opcode}")
+
+    def _call(self, opcode, body):
+        try:
+            return STATUS_OK, self._execute(opcode, body)
+        except (BackendError, OSError, ValueError, struct.error) as e:
+            self.stats["errors"] += 1
+            return STATUS_ERROR, str(e).encode("utf-8")[:MAX_BODY]
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Fleet opcode {opcode} failed:", repr(e))
+            return STATUS_ERROR, f"Internal error: {e}".encode("utf-8")[:MAX_BODY]
+
+    # -------------------------------
+    # Event-loop side
+    # -------------------------------
+    async def _respond(self, writer, request_id, opcode, body):
+        loop = asyncio.get_running_loop()
+        status, reply = await loop.run_in_executor(self.executor, self._call, opcode, body)
+        if not writer.is_closing():
+            writer.write(frame(request_id, opcode, reply, status))
+
+    async def _handle_connection(self, reader, writer):
+        self.stats["connections"] += 1
+        handler = asyncio.current_task()
+        self.handlers.add(handler)
+        pending = set()
+        try:
+            try:
+                if self.token is not None and not await self._authenticate(reader, writer):
+                    return
+                while True:
+                    request_id, opcode, _, body = await read_frame(reader)
+                    self.stats["requests"] += 1
+                    # Pipelined requests are queued on the worker in arrival order.
+                    task = asyncio.ensure_future(self._respond(writer, request_id, opcode, body))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except asyncio.CancelledError:
+            pass  # shutdown() stopped waiting for a stuck backend call
+        finally:
+            writer.close()
+            self.handlers.discard(handler)
+
+    async def _authenticate(self, reader, writer):
+        request_id, opcode, _, body = await read_frame(reader)
+        if opcode == OP_HELLO and hmac.compare_digest(body, self.token):
+            writer.write(frame(request_id, opcode))
+            return True
+        self.stats["rejected"] += 1
+        writer.write(frame(request_id, opcode, b"Invalid or missing token", STATUS_ERROR))
+        await writer.drain()
+        return False
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.backend = await loop.run_in_executor(self.executor, self.backend_factory)
+        host, port = parse_host_address(self.address)
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Fleet agent listening on {self.address}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.executor.shutdown(wait=False)
+
+    async def shutdown(self, grace=1.0):
+        """Stops listening and gives open connections `grace` seconds to finish."""
+        if self.server is not None:
+            self.server.close()
+        if self.handlers:
+            _, stuck = await asyncio.wait(list(self.handlers), timeout=grace)
+            for handler in stuck:
+                handler.cancel()
+        self.executor.shutdown(wait=False)
+
+
+# ============================================================
+# Controller
+# ============================================================
+class Inventory:
+    """Host name -> "HOST:PORT" address, plus named groups of hosts and the agents' token."""
+
+    def __init__(self, hosts, groups=None, token=None):
+        self.hosts = dict(hosts)
+        self.groups = {name: list(members) for name, members in (groups or {}).items()}
+        self.token = token
+
+    def resolve(self, selectors):
+        """Expands group names, host names and "all" into an ordered list of host names."""
+        selected = {}
+        for selector in selectors:
+            if selector == "all":
+                names = self.hosts
+            elif selector in self.groups:
+                names = self.groups[selector]
+            elif selector in self.hosts:
+                names = [selector]
+            else:
+                raise KeyError(f"Unknown host or group: {selector}")
+            for name in names:
+                selected[name] = None
+        return list(selected)
+
+
+def load_inventory(path):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    return Inventory(config["hosts"], config.get("groups"), config.get("token"))
+
+
+class HostResult:
+    __slots__ = ("host", "ok", "results", "error", "elapsed")
+
+    def __init__(self, host, ok, results=None, error=None, elapsed=0.0):
+        self.host = host
+        self.ok = ok
+        self.results = results
+        self.error = error
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return f"HostResult({self.host!r}, ok={self.ok}, error={self.error!r}, elapsed={self.elapsed:.3f})"
+
+
+class AgentConnection:
+    """One pooled connection to an agent; any number of requests may be in flight."""
+
+    def __init__(self, address, token=None):
+        self.address = address
+        self.token = token
+        self.reader = None
+        self.writer = None
+        self.ids = itertools.count(1)
+        self.waiting = {}   # request id -> (opcode, future)
+        self._reader_task = None
+
+    @property
+    def connected(self):
+        return self.writer is not None and not self.writer.is_closing()
+
+    async def connect(self):
+        host, port = parse_host_address(self.address)
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self._reader_task = asyncio.ensure_future(self._read_replies())
+        if self.token:
+            (reply,) = await self.pipeline([op_hello(self.token)])
+            if isinstance(reply, Exception):
+                self.close()
+                raise ConnectionError(f"{self.address} refused the connection: {reply}")
+
+    async def _read_replies(self):
+        try:
+            while True:
+                request_id, opcode, status, body = await read_frame(self.reader)
+                entry = self.waiting.pop(request_id, None)
+                if entry is None or entry[1].done():
+                    continue
+                if status == STATUS_OK:
+                    entry[1].set_result(decode_reply(opcode, body))
+                else:
+                    entry[1].set_exception(FleetError(body.decode("utf-8", "replace")))
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            self._fail(ConnectionError(f"Connection to {self.address} lost: {e}"))
+        finally:
+            self.writer.close()
+
+    def _fail(self, error):
+        waiting, self.waiting = self.waiting, {}
+        for _, future in waiting.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def pipeline(self, ops):
+        """Sends every (opcode, body) without waiting and returns the replies (or exceptions) in order."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for opcode, body in ops:
+            request_id = next(self.ids) & 0xFFFFFFFF
+            future = loop.create_future()
+            self.waiting[request_id] = (opcode, future)
+            self.writer.write(frame(request_id, opcode, body))
+            futures.append(future)
+        await self.writer.drain()
+        return await asyncio.gather(*futures, return_exceptions=True)
+
+    def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self.writer is not None:
+            self.writer.close()
+        self._fail(ConnectionError("Connection closed"))
+
+    async def wait_closed(self):
+        if self.writer is not None:
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+
+class FleetController:
+    """
+    Fans commands out to the hosts of an Inventory. Connections are pooled
+    per host and reused across commands; at most `max_concurrency` hosts
+    are contacted at once, each bounded by `timeout` seconds including
+    connecting.
+    """
+    def __init__(self, inventory, timeout=DEFAULT_TIMEOUT, max_concurrency=256):
+        self.inventory = inventory
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.pool = {}
+
+    async def _connection(self, host):
+        connection = self.pool.get(host)
+        if connection is None or not connection.connected:
+            connection = AgentConnection(self.inventory.hosts[host], self.inventory.token)
+            await connection.connect()
+            self.pool[host] = connection
+        return connection
+
+    async def _run_host(self, host, ops, semaphore):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                results = await asyncio.wait_for(self._host_ops(host, ops), self.timeout)
+            except asyncio.TimeoutError:
+                # A wedged agent may still answer later; drop the connection.
+                connection = self.pool.pop(host, None)
+                if connection is not None:
+                    connection.close()
+                return HostResult(host, False, error=f"timed out after {self.timeout:.1f}s",
+                                  elapsed=time.perf_counter() - start)
+            except (OSError, ConnectionError) as e:
+                self.pool.pop(host, None)
+                return HostResult(host, False, error=str(e), elapsed=time.perf_counter() - start)
+            errors = [str(result) for result in results if isinstance(result, Exception)]
+            return HostResult(host, not errors, results, "; ".join(errors) or None,
+                              time.perf_counter() - start)
+
+    async def _host_ops(self, host, ops):
+        connection = await self._connection(host)
+        return await connection.pipeline(ops)
+
+    async def run(self, selectors, ops):
+        """Runs ops (a list of (opcode, body)) on every selected host; returns {host: HostResult}."""
+        hosts = self.inventory.resolve(selectors)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(*(self._run_host(host, ops, semaphore) for host in hosts))
+        return {result.host: result for result in results}
+
+    async def close(self):
+        connections = list(self.pool.values())
+        self.pool.clear()
+        for connection in connections:
+            connection.close()
+        await asyncio.gather(*(connection.wait_closed() for connection in connections))
+
+
+def summarize(results):
+    """Aggregates {host: HostResult} into counts and latency figures."""
+    elapsed = sorted(result.elapsed for result in results.values())
+    failed = {host: result.error for host, result in results.items() if not result.ok}
+    return {
+        "hosts": len(results),
+        "ok": len(results) - len(failed),
+        "failed": failed,
+        "p50_ms": round(elapsed[len(elapsed) // 2] * 1000, 1) if elapsed else 0.0,
+        "max_ms": round(elapsed[-1] * 1000, 1) if elapsed else 0.0,
+    }
+
+
+async def start_simulated_fleet(count, latency=0.0, room_size=10):
+    """
+    Starts `count` agents with simulated backends on ephemeral localhost
+    ports and returns (agents, inventory) with hosts grouped into rooms
+    ("room-1", "room-2", ...) of `room_size`.
+    """
+    agents = []
+    hosts = {}
+    groups = {}
+    for i in range(count):
+        agent = await FleetAgent(lambda: SimulatedAudioBackend(latency=latency), "127.0.0.1:0").start()
+        agents.append(agent)
+        name = f"sim-{i:03d}"
+        hosts[name] = f"127.0.0.1:{agent.port}"
+        groups.setdefault(f"room-{i // room_size + 1}", []).append(name)
+    return agents, Inventory(hosts, groups)
+
+
+def _print_results(results, verbose):
+    if verbose:
+        for host, result in results.items():
+            print(f"{host}: {result.results if result.ok else 'FAILED ' + result.error}")
+    print(json.dumps(summarize(results), indent=2))
+
+
+async def _run_command(inventory, args, ops):
+    controller = FleetController(inventory, timeout=args.timeout, max_concurrency=args.concurrency)
+    try:
+        start = time.perf_counter()
+        results = await controller.run(args.target, ops)
+        elapsed = time.perf_counter() - start
+    finally:
+        await controller.close()
+    _print_results(results, args.verbose)
+    print(f"{len(results)} hosts in {elapsed * 1000:.1f} ms")
+
+
+async def _demo(args, ops):
+    agents, inventory = await start_simulated_fleet(args.agents, args.latency)
+    try:
+        await _run_command(inventory, args, ops)
+    finally:
+        await asyncio.gather(*(agent.shutdown() for agent in agents))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Volume control fan-out across many machines")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    agent = commands.add_parser("agent", help="serve this machine's audio backend")
+    agent.add_argument("--listen", default=f"127.0.0.1:{DEFAULT_PORT}")
+    agent.add_argument("--allow-remote", action="store_true",
+                       help="allow a --listen address other than loopback (needs a token)")
+    agent.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                       help=f"shared token controllers must present (default: ${TOKEN_ENV})")
+    agent.add_argument("--simulate", action="store_true", help="use the in-memory simulated backend")
+    agent.add_argument("--latency", type=float, default=0.0, help="simulated per-call latency in seconds")
+
+    for name, help_text in (("run", "send operations to hosts from an inventory"),
+                            ("demo", "run against simulated agents on localhost")):
+        command = commands.add_parser(name, help=help_text)
+        if name == "run":
+            command.add_argument("-i", "--inventory", required=True)
+            command.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                                 help=f"agents' shared token, if the inventory has none (default: ${TOKEN_ENV})")
+        else:
+            command.add_argument("--agents", type=int, default=200)
+            command.add_argument("--latency", type=float, default=0.002)
+        command.add_argument("-t", "--target", action="append", default=[],
+                             help="host, group or 'all' (repeatable)")
+        command.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="per-host timeout")
+        command.add_argument("--concurrency", type=int, default=256)
+        command.add_argument("-v", "--verbose", action="store_true")
+        command.add_argument("ops", nargs="+", help="e.g. set=40%% capture:mute=on step=up get")
+
+    args = parser.parse_args()
+    if args.command == "agent":
+        host, _ = parse_host_address(args.listen)
+        if not is_loopback(host) and not args.allow_remote:
+            parser.error(f"--listen {args.listen} is not a loopback address; pass --allow-remote to serve it")
+        if not is_loopback(host) and not args.token:
+            parser.error(f"serving {args.listen} needs a shared token (--token or ${TOKEN_ENV})")
+        if args.simulate:
+            factory = lambda: SimulatedAudioBackend(latency=args.latency)
+        else:
+            from audio_backend import ComAudioBackend
+            factory = ComAudioBackend
+        try:
+            asyncio.run(FleetAgent(factory, args.listen, args.token).serve_forever())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    ops = [parse_op(text) for text in args.ops]
+    args.target = args.target or ["all"]
+    if args.command == "run":
+        inventory = load_inventory(args.inventory)
+        inventory.token = inventory.token or args.token
+        asyncio.run(_run_command(inventory, args, ops))
+    else:
+        asyncio.run(_demo(args, ops))
+
+
+if __name__ == "__main__":
+    main()
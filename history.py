@@ -0,0 +1,129 @@
+"""
+Undo/redo history of volume, mute and default-device changes.
+
+VolumeHistory keeps a fixed number of entries in parallel typed arrays
+(timestamp, kind, device index, source, old value, new value) used as a
+ring buffer, so recording never allocates per entry and the oldest entries
+are overwritten once the ring is full. Endpoint IDs are interned once into
+a small table and referenced by index.
+
+Three counters describe the ring: entries in [start, cursor) can be undone
+and entries in [cursor, end) redone. Recording a new change drops the redo
+tail. Undo and redo move the cursor by one, so both are O(1).
+
+Successive changes of the same kind to the same device from the same source
+within `coalesce_window` seconds can be folded into one entry (a slider
+drag becomes a single undo step).
+"""
+import time
+from array import array
+
+LEVEL = 0
+MUTE = 1
+DEFAULT = 2
+
+SOURCE_LOCAL = 0
+SOURCE_EXTERNAL = 1
+
+NO_DEVICE = -1.0
+
+
+class VolumeHistory:
+    def __init__(self, capacity=256, coalesce_window=0.6):
+        self.capacity = capacity
+        self.coalesce_window = coalesce_window
+        self.times = array("d", bytes(8 * capacity))
+        self.kinds = array("B", bytes(capacity))
+        self.devices = array("H", bytes(2 * capacity))
+        self.sources = array("B", bytes(capacity))
+        self.olds = array("d", bytes(8 * capacity))
+        self.news = array("d", bytes(8 * capacity))
+        self.device_ids = []
+        self._device_index = {}
+        self.start = 0
+        self.cursor = 0
+        self.end = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def _intern(self, device_id):
+        index = self._device_index.get(device_id)
+        if index is None:
+            index = self._device_index[device_id] = len(self.device_ids)
+            self.device_ids.append(device_id)
+        return index
+
+    def _encode(self, kind, value):
+        if kind == DEFAULT:
+            return NO_DEVICE if value is None else float(self._intern(value))
+        return float(value)
+
+    def _decode(self, kind, raw):
+        if kind == LEVEL:
+            return raw
+        if kind == MUTE:
+            return bool(raw)
+        return None if raw == NO_DEVICE else self.device_ids[int(raw)]
+
+    def record(self, kind, device, old, new, external=False, coalesce=False, now=None):
+        """
+        Records a change. `device` is the endpoint ID for LEVEL and MUTE
+        entries and the data flow for DEFAULT entries, whose old/new values
+        are endpoint IDs.
+        """
+        if old == new:
+            return
+        now = time.monotonic() if now is None else now
+        device_index = device if kind == DEFAULT else self._intern(device)
+        source = SOURCE_EXTERNAL if external else SOURCE_LOCAL
+        new_raw = self._encode(kind, new)
+        if coalesce and self.start < self.cursor == self.end:
+            i = (self.cursor - 1) % self.capacity
+            if (self.kinds[i] == kind and self.devices[i] == device_index and self.sources[i] == source
+                    and now - self.times[i] <= self.coalesce_window):
+                self.news[i] = new_raw
+                self.times[i] = now
+                if self.news[i] == self.olds[i]:
+                    # Dragged back to where it started: nothing left to undo.
+                    self.cursor -= 1
+                    self.end = self.cursor
+                return
+        i = self.cursor % self.capacity
+        self.times[i] = now
+        self.kinds[i] = kind
+        self.devices[i] = device_index
+        self.sources[i] = source
+        self.olds[i] = self._encode(kind, old)
+        self.news[i] = new_raw
+        self.cursor += 1
+        self.end = self.cursor
+        if self.end - self.start > self.capacity:
+            self.start = self.end - self.capacity
+
+    def can_undo(self):
+        return self.cursor > self.start
+
+    def can_redo(self):
+        return self.cursor < self.end
+
+    def _entry(self, i, raw):
+        kind = self.kinds[i]
+        device = self.devices[i] if kind == DEFAULT else self.device_ids[self.devices[i]]
+        return kind, device, self._decode(kind, raw)
+
+    def undo(self):
+        """Steps back one entry and returns (kind, device, value to restore), or None."""
+        if not self.can_undo():
+            return None
+        self.cursor -= 1
+        i = self.cursor % self.capacity
+        return self._entry(i, self.olds[i])
+
+    def redo(self):
+        """Steps forward one entry and returns (kind, device, value to apply again), or None."""
+        if not self.can_redo():
+            return None
+        i = self.cursor % self.capacity
+        self.cursor += 1
+        return self._entry(i, self.news[i])
@@ -0,0 +1,423 @@
+"""
+Loudness analysis of rendered audio, and an auto-gain loop driven by it.
+
+A packet source is a callable taking a handler: it passes every packet
+waiting to handler(frames) as a (frames, channels) NumPy array that is only
+valid during the call, and returns the number of frames read. Sources also
+have `sample_rate`, `channels`, start(), stop() and close().
+volume.LoopbackCapture is the Windows source, exposing the engine's own
+buffers; SyntheticSource feeds arrays through the same contract on any
+platform.
+
+CapturePipeline drains a source on one thread into a LoudnessAnalyzer, which
+works on whole arrays:
+
+  - each packet is copied (and converted to float, if the mix format is
+    integer PCM) once, into a preallocated 100 ms block;
+  - per block, RMS and peak per channel are reductions over the block, and
+    the K-weighting of ITU-R BS.1770 is applied as a gain on the block's
+    power spectrum (one rfft for all channels), giving the weighted mean
+    square per channel;
+  - momentary (400 ms) and short-term (3 s) loudness, overall and per
+    channel, are sums over a ring of those block powers.
+
+Weighting the power spectrum of each block instead of running the two
+biquads sample by sample keeps every stage vectorized. For steady material
+it matches the filtered measurement (a 997 Hz sine at -20 dBFS on one
+channel reads -23.0 LUFS); block edges make it differ by a fraction of a dB
+on transients, which the 3 s window smooths out.
+
+AutoGain follows the short-term loudness and moves the endpoint's master
+level in dB (set_volume_db, i.e. SetMasterVolumeLevel) so content lands
+near a target loudness. The correction is an offset from the level the user
+chose, limited in range and slew rate, held through silence, and restarted
+from the new level whenever someone else changes the volume.
+
+NumPy is required by this module (and volume.capture) only.
+"""
+import json
+import math
+import threading
+import time
+
+import numpy as np
+
+# K-weighting stages (BS.1770 / libebur128 design, valid at any sample rate)
+_SHELF_F0 = 1681.974450955533
+_SHELF_GAIN_DB = 3.999843853973347
+_SHELF_Q = 0.7071752369554196
+_HIGHPASS_F0 = 38.13547087602444
+_HIGHPASS_Q = 0.5003270373238773
+
+SILENCE_DB = -100.0
+_SILENCE_POWER = 10 ** (SILENCE_DB / 10)
+
+
+def k_weighting(sample_rate):
+    """Returns the ((b0, b1, b2), (1, a1, a2)) biquads of the K-weighting filter."""
+    k = math.tan(math.pi * _SHELF_F0 / sample_rate)
+    vh = 10 ** (_SHELF_GAIN_DB / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / _SHELF_Q + k * k
+    shelf = ((vh + vb * k / _SHELF_Q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / _SHELF_Q + k * k) / a0), \
+            (1.0, 2 * (k * k - 1) / a0, (1 - k / _SHELF_Q + k * k) / a0)
+    k = math.tan(math.pi * _HIGHPASS_F0 / sample_rate)
+    a0 = 1 + k / _HIGHPASS_Q + k * k
+    highpass = (1.0, -2.0, 1.0), (1.0, 2 * (k * k - 1) / a0, (1 - k / _HIGHPASS_Q + k * k) / a0)
+    return shelf, highpass
+
+
+def k_weighting_power(sample_rate, frames):
+    """|H(f)|^2 of the K-weighting filter at the rfft bins of a `frames`-long block."""
+    z = np.exp(-2j * np.pi * np.arange(frames // 2 + 1) / frames)
+    response = np.ones_like(z)
+    for b, a in k_weighting(sample_rate):
+        response *= np.polyval(b[::-1], z) / np.polyval(a[::-1], z)
+    return np.abs(response) ** 2
+
+
+def channel_weights(channels):
+    """BS.1770 channel gains in WAVEFORMATEXTENSIBLE order: LFE excluded, surrounds +1.5 dB."""
+    if channels == 6:      # FL FR FC LFE BL BR
+        return np.array([1.0, 1.0, 1.0, 0.0, 1.41, 1.41])
+    if channels == 8:      # FL FR FC LFE BL BR SL SR
+        return np.array([1.0, 1.0, 1.0, 0.0, 1.41, 1.41, 1.41, 1.41])
+    return np.ones(channels)
+
+
+def _db(power):
+    return 10 * np.log10(np.maximum(power, _SILENCE_POWER))
+
+
+def _lufs(power):
+    return -0.691 + 10 * np.log10(np.maximum(power, _SILENCE_POWER))
+
+
+# ============================================================
+# Analysis
+# ============================================================
+class LoudnessAnalyzer:
+    """
+    Feed it packets with feed(frames). Every `block_seconds` it computes a
+    result dict and passes it to on_block (on the feeding thread):
+
+        {"time", "duration", "rms": [dBFS per channel], "peak": [dBFS per channel],
+         "momentary": LUFS, "short_term": LUFS, "channel_short_term": [LUFS per channel]}
+
+    `latest` holds the newest result for readers on other threads.
+    """
+    def __init__(self, sample_rate, channels, block_seconds=0.1, momentary_seconds=0.4, short_term_seconds=3.0,
+                 weights=None, on_block=None, clock=time.monotonic):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_frames = max(1, round(sample_rate * block_seconds))
+        self.duration = self.block_frames / sample_rate
+        self.momentary_blocks = max(1, round(momentary_seconds / self.duration))
+        self.short_term_blocks = max(self.momentary_blocks, round(short_term_seconds / self.duration))
+        self.weights = channel_weights(channels) if weights is None else np.asarray(weights, np.float64)
+        self.on_block = on_block
+        self.clock = clock
+        self.block = np.zeros((self.block_frames, channels), np.float32)
+        self.fill = 0
+        # Parseval over the rfft bins (interior bins stand for two), with the K-weighting folded in.
+        bins = np.full(self.block_frames // 2 + 1, 2.0)
+        bins[0] = 1.0
+        if self.block_frames % 2 == 0:
+            bins[-1] = 1.0
+        self.bin_weights = bins * k_weighting_power(sample_rate, self.block_frames) / self.block_frames ** 2
+        self.powers = np.zeros((self.short_term_blocks, channels))   # ring of K-weighted block powers
+        self.blocks = 0
+        self.latest = None
+
+    def feed(self, frames):
+        scale = None
+        if frames.dtype.kind == "i":
+            scale = 1.0 / (1 << (8 * frames.dtype.itemsize - 1))
+        start = 0
+        count = len(frames)
+        while start < count:
+            n = min(count - start, self.block_frames - self.fill)
+            target = self.block[self.fill:self.fill + n]
+            if scale is None:
+                np.copyto(target, frames[start:start + n], casting="unsafe")
+            else:
+                np.multiply(frames[start:start + n], scale, out=target, casting="unsafe")
+            self.fill += n
+            start += n
+            if self.fill == self.block_frames:
+                self.fill = 0
+                self._analyze()
+
+    def _analyze(self):
+        block = self.block
+        mean_square = np.einsum("ij,ij->j", block, block, dtype=np.float64) / self.block_frames
+        peak = np.maximum(block.max(axis=0), -block.min(axis=0))
+        spectrum = np.fft.rfft(block, axis=0)
+        weighted = self.bin_weights @ (spectrum.real ** 2 + spectrum.imag ** 2)
+        self.powers[self.blocks % self.short_term_blocks] = weighted
+        self.blocks += 1
+
+        momentary = self._window(self.momentary_blocks)
+        short_term = self._window(self.short_term_blocks)
+        result = {
+            "time": self.clock(),
+            "duration": self.duration,
+            "rms": _db(mean_square).tolist(),
+            "peak": _db(np.square(peak, dtype=np.float64)).tolist(),
+            "momentary": float(_lufs(self.weights @ momentary)),
+            "short_term": float(_lufs(self.weights @ short_term)),
+            "channel_short_term": _lufs(self.weights * short_term).tolist(),
+        }
+        self.latest = result
+        if self.on_block is not None:
+            self.on_block(result)
+
+    def _window(self, blocks):
+        """Mean K-weighted power per channel over the newest `blocks` blocks."""
+        blocks = min(blocks, self.blocks)
+        end = self.blocks % self.short_term_blocks
+        start = end - blocks
+        if start >= 0:
+            return self.powers[start:end].mean(axis=0)
+        return (self.powers[start:].sum(axis=0) + self.powers[:end].sum(axis=0)) / blocks
+
+
+# ============================================================
+# Sources and the Capture Thread
+# ============================================================
+def sine(frequency, seconds, sample_rate=48000, channels=2, dbfs=-20.0, active=None):
+    """
+    A (frames, channels) float32 test signal: a sine at `dbfs` peak on the
+    `active` channels (default all) and silence on the others.
+    """
+    t = np.arange(round(seconds * sample_rate)) / sample_rate
+    tone = (10 ** (dbfs / 20) * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+    signal = np.zeros((len(t), channels), np.float32)
+    for channel in (range(channels) if active is None else active):
+        signal[:, channel] = tone
+    return signal
+
+
+class SyntheticSource:
+    """
+    Packet source over an in-memory (frames, channels) array, cut into
+    `packet_frames` packets that are views of the array. With realtime set,
+    each drain returns only what would have been rendered since the last
+    one; otherwise up to `burst` packets per drain. Loops when `loop` is set.
+    """
+    def __init__(self, signal, sample_rate=48000, packet_frames=480, realtime=False, burst=10, loop=False,
+                 clock=time.perf_counter):
+        self.signal = signal
+        self.sample_rate = sample_rate
+        self.channels = signal.shape[1]
+        self.packet_frames = packet_frames
+        self.realtime = realtime
+        self.burst = burst
+        self.loop = loop
+        self.clock = clock
+        self.position = 0
+        self.started = None
+        self.stats = {"packets": 0, "frames": 0}
+
+    def start(self):
+        self.started = self.clock()
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+    @property
+    def exhausted(self):
+        return not self.loop and self.position >= len(self.signal)
+
+    def __call__(self, handler):
+        if self.realtime:
+            due = int((self.clock() - self.started) * self.sample_rate) - self.stats["frames"]
+        else:
+            due = self.burst * self.packet_frames
+        total = 0
+        while due >= self.packet_frames or (due > 0 and not self.realtime):
+            if self.position >= len(self.signal):
+                if not self.loop:
+                    break
+                self.position = 0
+            frames = self.signal[self.position:self.position + min(self.packet_frames, due)]
+            self.position += len(frames)
+            handler(frames)
+            self.stats["packets"] += 1
+            self.stats["frames"] += len(frames)
+            total += len(frames)
+            due -= len(frames)
+        return total
+
+
+class CapturePipeline:
+    """
+    Opens a packet source with open_source() on its own thread (after
+    `thread_init`, e.g. volume.init_com), drains it every `period` seconds
+    into a LoudnessAnalyzer and stops when the source fails, runs dry
+    (`exhausted`) or stop() is called.
+    """
+    def __init__(self, open_source, on_block=None, period=0.01, thread_init=None, **analyzer_options):
+        self.open_source = open_source
+        self.on_block = on_block
+        self.period = period
+        self.thread_init = thread_init
+        self.analyzer_options = analyzer_options
+        self.analyzer = None
+        self.source = None
+        self.ready = threading.Event()
+        self.stats = {"drains": 0, "frames": 0, "errors": 0}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loopback-capture", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            if self.thread_init is not None:
+                self.thread_init()
+            self.source = self.open_source()
+            self.analyzer = LoudnessAnalyzer(self.source.sample_rate, self.source.channels,
+                                             on_block=self.on_block, **self.analyzer_options)
+        except (OSError, ValueError) as e:
+            self.stats["errors"] += 1
+            print("Loopback capture unavailable:", e)
+            return
+        finally:
+            self.ready.set()
+        source, feed = self.source, self.analyzer.feed
+        try:
+            source.start()
+            while not self._stop.is_set():
+                self.stats["frames"] += source(feed)
+                self.stats["drains"] += 1
+                if getattr(source, "exhausted", False):
+                    break
+                self._stop.wait(self.period)
+        except OSError as e:
+            # The endpoint went away or the engine reset the stream.
+            self.stats["errors"] += 1
+            print("Loopback capture stopped:", e)
+        finally:
+            source.close()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+# ============================================================
+# Auto-Gain
+# ============================================================
+class AutoGain:
+    """
+    Pass on_block to a CapturePipeline (or LoudnessAnalyzer) for the
+    endpoint `device` of `backend`. The endpoint is set to the user's level
+    plus an offset that brings short-term loudness toward `target` LUFS:
+    at most `max_boost`/`max_cut` dB, moving at most `slew` dB per second.
+    A correction starts once the error exceeds `deadband` dB and then runs
+    until the offset is reached; writes smaller than `min_step` dB are
+    skipped, and the offset holds while the content is quieter than `gate`
+    LUFS (momentary or short-term).
+
+    Loopback audio is the engine mix before the endpoint volume, so the
+    measurement does not include the offset. Set post_volume for a source
+    that does include it.
+    """
+    def __init__(self, backend, device=None, target=-18.0, max_boost=6.0, max_cut=12.0, slew=2.0, deadband=1.0,
+                 min_step=0.25, gate=-45.0, post_volume=False, context_name="autogain"):
+        self.backend = backend
+        self.device = device
+        self.target = target
+        self.max_boost = max_boost
+        self.max_cut = max_cut
+        self.slew = slew
+        self.deadband = deadband
+        self.min_step = min_step
+        self.gate = gate
+        self.post_volume = post_volume
+        self.context_name = context_name
+        self.reference = None   # the user's level in dB; None re-reads it on the next block
+        self.offset = 0.0
+        self.settling = False   # moving toward the desired offset until it is reached
+        self.written = None
+        self.stats = {"blocks": 0, "writes": 0, "rebases": 0, "gated": 0, "errors": 0}
+
+    def start(self):
+        self.backend.add_listener(self.on_event)
+        return self
+
+    def on_event(self, event):
+        if (event.get("event") == "volume" and event["device"] == self.device
+                and event.get("source") != self.context_name):
+            # The user (or another controller) moved the level: it becomes the new reference.
+            self.reference = None
+
+    def on_block(self, block):
+        self.stats["blocks"] += 1
+        try:
+            if self.reference is None:
+                state = self.backend.get_volume_db(self.device)
+                self.device = state["device"]
+                self.reference = self.written = state["db"]
+                self.offset = 0.0
+                self.settling = False
+                self.stats["rebases"] += 1
+            loudness = block["short_term"] - (self.offset if self.post_volume else 0.0)
+            if block["momentary"] < self.gate or loudness < self.gate:
+                # Silence, or the tail of the 3 s window after the sound stopped: hold.
+                self.stats["gated"] += 1
+                self.settling = False
+            else:
+                desired = min(self.max_boost, max(-self.max_cut, self.target - loudness))
+                if abs(desired - self.offset) > self.deadband:
+                    self.settling = True
+                if self.settling:
+                    remaining = desired - self.offset
+                    limit = self.slew * block["duration"]
+                    if abs(remaining) <= limit:
+                        self.offset = desired
+                        self.settling = False
+                    else:
+                        self.offset += math.copysign(limit, remaining)
+            db = self.reference + self.offset
+            if abs(db - self.written) >= self.min_step:
+                self.backend.set_volume_db(db, self.device, context=self.context_name)
+                self.written = db
+                self.stats["writes"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            print("Auto-gain update failed:", e)
+
+    def close(self):
+        self.backend.remove_listener(self.on_event)
+
+
+def load_config(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def start_autogain(backend, config):
+    """
+    Starts loopback capture of a ComAudioBackend endpoint with an AutoGain
+    on it, from a config dict ("device" plus AutoGain options, and an
+    optional "analyzer" section). Returns (pipeline, gain).
+    """
+    from volume import init_com
+    config = dict(config)
+    analyzer_options = config.pop("analyzer", None) or {}
+    device_id = backend.get_volume(config.pop("device", None))["device"]
+    gain = AutoGain(backend, device_id, **config).start()
+    pipeline = CapturePipeline(lambda: backend.open_loopback(device_id), on_block=gain.on_block,
+                               thread_init=init_com, **analyzer_options).start()
+    return pipeline, gain
@@ -0,0 +1,164 @@
+"""
+Peak meter sampling for audio endpoints.
+
+PeakMeter polls a set of samplers (see volume.make_peak_sampler) at a fixed
+rate on one background thread and writes every sample into a preallocated,
+array-backed PeakRingBuffer per endpoint. The GUI only reads the ring
+buffers when it redraws, so metering never blocks or wakes the Tk thread.
+
+The sampler contract is deliberately small -- a callable returning
+(peak, channel_peaks_or_None) -- so synthetic samplers can drive the same
+code on any platform (see benchmarks/meter_rate.py).
+"""
+import threading
+import time
+from array import array
+
+
+class PeakRingBuffer:
+    """
+    Fixed-capacity ring of (timestamp, peak, channel peaks) samples stored in
+    flat arrays. append() never allocates; readers get copies or reductions.
+    Single writer; readers may run concurrently and see at worst the sample
+    being written as the previous value.
+    """
+    def __init__(self, capacity, channels=0):
+        self.capacity = capacity
+        self.channels = channels
+        self.times = array("d", bytes(8 * capacity))
+        self.peaks = array("f", bytes(4 * capacity))
+        self.channel_peaks = array("f", bytes(4 * capacity * channels))
+        self.count = 0          # total samples ever written
+        self.write_index = 0    # next slot to write
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, timestamp, peak, channel_peaks=None):
+        i = self.write_index
+        self.times[i] = timestamp
+        self.peaks[i] = peak
+        if self.channels and channel_peaks is not None:
+            base = i * self.channels
+            for c in range(self.channels):
+                self.channel_peaks[base + c] = channel_peaks[c]
+        self.write_index = (i + 1) % self.capacity
+        self.count += 1
+
+    def latest(self):
+        """Returns (timestamp, peak) of the newest sample, or (0.0, 0.0) if empty."""
+        if not self.count:
+            return 0.0, 0.0
+        i = (self.write_index - 1) % self.capacity
+        return self.times[i], self.peaks[i]
+
+    def latest_channels(self):
+        if not self.count or not self.channels:
+            return []
+        base = ((self.write_index - 1) % self.capacity) * self.channels
+        return list(self.channel_peaks[base:base + self.channels])
+
+    def recent(self, n):
+        """Returns the newest n master peaks, oldest first."""
+        n = min(n, len(self))
+        end = self.write_index
+        start = end - n
+        if start >= 0:
+            return self.peaks[start:end].tolist()
+        return self.peaks[start:].tolist() + self.peaks[:end].tolist()
+
+    def max_recent(self, n):
+        """Peak-hold helper: the largest of the newest n master peaks."""
+        n = min(n, len(self))
+        if not n:
+            return 0.0
+        end = self.write_index
+        start = end - n
+        if start >= 0:
+            return max(self.peaks[start:end])
+        return max(max(self.peaks[start:]), max(self.peaks[:end]) if end else 0.0)
+
+    def decimated(self, points, window=None):
+        """
+        Reduces the newest `window` samples (default: all buffered) to at most
+        `points` values, keeping the maximum of each bucket so transients
+        survive decimation. Suitable for drawing level histories.
+        """
+        values = self.recent(len(self) if window is None else window)
+        if len(values) <= points:
+            return values
+        step = len(values) / points
+        return [max(values[int(k * step):int((k + 1) * step)] or [0.0]) for k in range(points)]
+
+
+class PeakMeter:
+    """
+    Samples every registered source at `rate` Hz on one daemon thread.
+    `thread_init` runs once on that thread before sampling (the COM backend
+    passes volume.init_com there, since peak interfaces are MTA objects).
+    """
+    def __init__(self, rate=30.0, capacity=1024, thread_init=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.thread_init = thread_init
+        self.sources = {}
+        self.stats = {"ticks": 0, "samples": 0, "overruns": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_source(self, key, sampler, channels=0):
+        """Registers sampler under key and returns its PeakRingBuffer."""
+        ring = PeakRingBuffer(self.capacity, channels)
+        with self._lock:
+            self.sources[key] = (sampler, ring)
+        return ring
+
+    def remove_source(self, key):
+        with self._lock:
+            self.sources.pop(key, None)
+
+    def ring(self, key):
+        entry = self.sources.get(key)
+        return entry[1] if entry else None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="peak-meter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        if self.thread_init is not None:
+            self.thread_init()
+        period = 1.0 / self.rate
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            with self._lock:
+                sources = list(self.sources.values())
+            for sampler, ring in sources:
+                try:
+                    peak, channel_peaks = sampler()
+                except OSError:
+                    self.stats["errors"] += 1
+                    continue
+                ring.append(now, peak, channel_peaks)
+            self.stats["ticks"] += 1
+            self.stats["samples"] += len(sources)
+
+            next_tick += period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Missed the slot: resynchronize instead of bursting to catch up.
+                self.stats["overruns"] += 1
+                next_tick = time.perf_counter()
@@ -0,0 +1,494 @@
+"""
+OSC/UDP control surface input.
+
+Hardware control surfaces send OSC fader updates at 100+ Hz per fader.
+OscInput maps OSC addresses to an endpoint and an operation (volume, mute,
+step up/down) on an audio backend, keeps only the latest value per target
+and applies the pending targets once per tick as one batch on the backend
+worker. Level changes from any other source are sent back to the surface
+(to the address of the control, so motorized faders follow). Feedback goes
+to the surfaces that sent a mapped control in the last `surface_timeout`
+seconds, at most `max_surfaces` of them.
+
+Mapping files look like:
+
+    {"listen": "0.0.0.0:9000",
+     "controls": {"/1/fader1": {"op": "volume"},
+                  "/1/mute1":  {"op": "mute", "device": "{0.0.0.00000000}.{...}"},
+                  "/1/up1":    {"op": "step_up"},
+                  "/1/down1":  {"op": "step_down"}}}
+
+A missing "device" targets the default render endpoint. Bundles carrying a
+real timetag are used to measure end-to-end latency (sender clock to write
+completion); arrival-to-write latency is always measured. See
+benchmarks/osc_faders.py for a local UDP sender.
+
+Usage:
+    python osc_input.py --map surface.json --simulate
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import struct
+import threading
+import time
+from array import array
+
+from audio_backend import BackendError
+
+OP_VOLUME = "volume"
+OP_MUTE = "mute"
+OP_STEP_UP = "step_up"
+OP_STEP_DOWN = "step_down"
+OPERATIONS = (OP_VOLUME, OP_MUTE, OP_STEP_UP, OP_STEP_DOWN)
+
+DEFAULT_LISTEN = "0.0.0.0:9000"
+NTP_UNIX_OFFSET = 2208988800   # seconds from 1900-01-01 to 1970-01-01
+TIMETAG_IMMEDIATE = 1
+SURFACE_TIMEOUT = 60.0
+MAX_SURFACES = 16
+
+
+class OscError(ValueError):
+    """A malformed OSC packet."""
+
+
+# ============================================================
+# OSC 1.0 encoding
+# ============================================================
+def _read_string(data, offset):
+    end = data.find(b"\0", offset)
+    if end < 0:
+        raise OscError("Unterminated OSC string")
+    return data[offset:end].decode("utf-8", "replace"), (end + 4) & ~3
+
+
+def _read_blob(data, offset):
+    (size,) = struct.unpack_from(">i", data, offset)
+    start = offset + 4
+    return data[start:start + size], (start + size + 3) & ~3
+
+
+_ARG_READERS = {
+    "i": lambda data, offset: (struct.unpack_from(">i", data, offset)[0], offset + 4),
+    "f": lambda data, offset: (struct.unpack_from(">f", data, offset)[0], offset + 4),
+    "h": lambda data, offset: (struct.unpack_from(">q", data, offset)[0], offset + 8),
+    "d": lambda data, offset: (struct.unpack_from(">d", data, offset)[0], offset + 8),
+    "s": _read_string,
+    "b": _read_blob,
+    "T": lambda data, offset: (True, offset),
+    "F": lambda data, offset: (False, offset),
+    "N": lambda data, offset: (None, offset),
+}
+
+
+def parse_packet(data, timetag=TIMETAG_IMMEDIATE):
+    """Yields (address, args, timetag) for every message in a packet, flattening bundles."""
+    try:
+        if data.startswith(b"#bundle\0"):
+            (timetag,) = struct.unpack_from(">Q", data, 8)
+            offset = 16
+            while offset < len(data):
+                (size,) = struct.unpack_from(">i", data, offset)
+                offset += 4
+                yield from parse_packet(data[offset:offset + size], timetag)
+                offset += size
+            return
+        address, offset = _read_string(data, 0)
+        if not address.startswith("/"):
+            raise OscError(f"Invalid OSC address: {address!r}")
+        tags = ","
+        if offset < len(data):
+            tags, offset = _read_string(data, offset)
+        args = []
+        for tag in tags[1:]:
+            reader = _ARG_READERS.get(tag)
+            if reader is None:
+                raise OscError(f"Unsupported OSC type tag: {tag!r}")
+            value, offset = reader(data, offset)
+            args.append(value)
+        yield address, args, timetag
+    except struct.error as e:
+        raise OscError(f"Truncated OSC packet: {e}") from None
+
+
+def _pad_string(text):
+    data = text.encode("utf-8") + b"\0"
+    return data + b"\0" * (-len(data) % 4)
+
+
+def encode_message(address, *args):
+    tags = ","
+    payload = []
+    for value in args:
+        if isinstance(value, bool):
+            tags += "T" if value else "F"
+        elif isinstance(value, int):
+            tags += "i"
+            payload.append(struct.pack(">i", value))
+        elif isinstance(value, float):
+            tags += "f"
+            payload.append(struct.pack(">f", value))
+        else:
+            tags += "s"
+            payload.append(_pad_string(str(value)))
+    return _pad_string(address) + _pad_string(tags) + b"".join(payload)
+
+
+def encode_bundle(timetag, messages):
+    parts = [b"#bundle\0", struct.pack(">Q", timetag)]
+    for message in messages:
+        parts.append(struct.pack(">i", len(message)))
+        parts.append(message)
+    return b"".join(parts)
+
+
+def unix_to_timetag(seconds):
+    whole = int(seconds)
+    return ((whole + NTP_UNIX_OFFSET) << 32) | int((seconds - whole) * (1 << 32))
+
+
+def timetag_to_unix(timetag):
+    return (timetag >> 32) - NTP_UNIX_OFFSET + (timetag & 0xFFFFFFFF) / (1 << 32)
+
+
+# ============================================================
+# Control mapping
+# ============================================================
+class Control:
+    __slots__ = ("address", "op", "device")
+
+    def __init__(self, address, op, device=None):
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown OSC control operation: {op!r}")
+        self.address = address
+        self.op = op
+        self.device = device
+
+
+def load_mapping(path):
+    """Returns (listen address, {OSC address: Control})."""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    controls = {address: Control(address, entry["op"], entry.get("device"))
+                for address, entry in config.get("controls", {}).items()}
+    return config.get("listen", DEFAULT_LISTEN), controls
+
+
+class LatencyRecorder:
+    """Keeps the last `capacity` latency samples (seconds) in a flat array."""
+
+    def __init__(self, capacity=4096):
+        self.samples = array("d", bytes(8 * capacity))
+        self.capacity = capacity
+        self.count = 0
+
+    def add(self, value):
+        self.samples[self.count % self.capacity] = value
+        self.count += 1
+
+    def report(self):
+        values = sorted(self.samples[:min(self.count, self.capacity)])
+        if not values:
+            return {"samples": 0}
+
+        def percentile(p):
+            return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 2)
+        return {"samples": self.count, "p50_ms": percentile(0.5), "p99_ms": percentile(0.99),
+                "max_ms": round(values[-1] * 1000, 2)}
+
+
+class _Pending:
+    """Latest value for one (device, op) target and when it was sent and received."""
+    __slots__ = ("control", "value", "arrived", "sent")
+
+    def __init__(self, control, value, arrived, sent):
+        self.control = control
+        self.value = value
+        self.arrived = arrived
+        self.sent = sent
+
+
+# ============================================================
+# Receiver
+# ============================================================
+class _OscProtocol(asyncio.DatagramProtocol):
+    def __init__(self, owner):
+        self.owner = owner
+
+    def connection_made(self, transport):
+        self.owner.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.owner.on_datagram(data, addr)
+
+
+class OscInput:
+    """
+    Receives OSC on `listen` ("HOST:PORT") and drives `backend_factory()`'s
+    backend, created and called on one worker thread like the control
+    server's. Pending targets are applied every `tick` seconds.
+    """
+    def __init__(self, backend_factory, controls, listen=DEFAULT_LISTEN, tick=0.01,
+                 context_name="osc", feedback=True, surface_timeout=SURFACE_TIMEOUT, max_surfaces=MAX_SURFACES):
+        self.backend_factory = backend_factory
+        self.controls = controls
+        self.listen = listen
+        self.tick = tick
+        self.context_name = context_name
+        self.feedback = feedback
+        self.surface_timeout = surface_timeout
+        self.max_surfaces = max_surfaces
+        self.backend = None
+        self.transport = None
+        self.loop = None
+        self.port = None
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="osc-worker")
+        self.pending = {}      # (device, op) -> _Pending
+        self.surfaces = {}     # sender address -> last seen (monotonic), least recently seen first
+        self.written = {}      # device -> level we last wrote for a fader
+        self.default_device = None
+        self.by_device = {}    # device -> [Control], for feedback
+        self.stats = {"packets": 0, "messages": 0, "unknown": 0, "malformed": 0,
+                      "writes": 0, "ticks": 0, "feedback": 0, "errors": 0,
+                      "surfaces_dropped": 0}
+        self.e2e_latency = LatencyRecorder()
+        self.queue_latency = LatencyRecorder()
+        self._tick_task = None
+
+    # -------------------------------
+    # Intake (event loop)
+    # -------------------------------
+    def on_datagram(self, data, addr):
+        now = time.perf_counter()
+        self.stats["packets"] += 1
+        try:
+            messages = list(parse_packet(data))
+        except OscError:
+            self.stats["malformed"] += 1
+            return
+        matched = False
+        for address, args, timetag in messages:
+            self.stats["messages"] += 1
+            control = self.controls.get(address)
+            if control is None:
+                self.stats["unknown"] += 1
+                continue
+            matched = True
+            sent = timetag_to_unix(timetag) if timetag != TIMETAG_IMMEDIATE else None
+            self._submit(control, args[0] if args else None, now, sent)
+        if matched:
+            # Only senders that drive a mapped control get feedback: stray or spoofed packets
+            # must not push real surfaces out of the table.
+            self._add_surface(addr)
+
+    def _add_surface(self, addr):
+        self.surfaces.pop(addr, None)
+        self.surfaces[addr] = time.monotonic()
+        if len(self.surfaces) > self.max_surfaces:
+            del self.surfaces[next(iter(self.surfaces))]
+            self.stats["surfaces_dropped"] += 1
+
+    def _submit(self, control, value, arrived, sent):
+        key = (control.device, control.op)
+        pending = self.pending.get(key)
+        if control.op in (OP_STEP_UP, OP_STEP_DOWN):
+            # Buttons send 1 on press and 0 on release; steps add up instead of coalescing.
+            if value is not None and not value:
+                return
+            value = 1 if pending is None else pending.value + 1
+        elif control.op == OP_MUTE:
+            if value is None:
+                return
+            value = bool(value)
+        else:
+            try:
+                value = min(1.0, max(0.0, float(value)))
+            except (TypeError, ValueError):
+                self.stats["malformed"] += 1
+                return
+        if pending is None:
+            self.pending[key] = _Pending(control, value, arrived, sent)
+        else:
+            # Latency is measured for the update that is actually written.
+            pending.value, pending.arrived, pending.sent = value, arrived, sent
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            if not self.pending:
+                continue
+            batch, self.pending = list(self.pending.values()), {}
+            self.stats["ticks"] += 1
+            try:
+                await self.loop.run_in_executor(self.executor, self._apply, batch)
+            except Exception as e:
+                # Keep ticking: one failed batch must not stop every later write.
+                self.stats["errors"] += 1
+                print("OSC batch failed:", e)
+
+    # -------------------------------
+    # Worker thread
+    # -------------------------------
+    def _apply(self, batch):
+        backend = self.backend
+        for item in batch:
+            control, value = item.control, item.value
+            try:
+                if control.op == OP_VOLUME:
+                    self.written[control.device or self.default_device] = value
+                    backend.set_volume(value, control.device, context=self.context_name)
+                elif control.op == OP_MUTE:
+                    backend.set_mute(value, control.device, context=self.context_name)
+                else:
+                    direction = "up" if control.op == OP_STEP_UP else "down"
+                    for _ in range(value):
+                        backend.step_volume(direction, control.device, context=self.context_name)
+                self.stats["writes"] += 1
+            except (BackendError, OSError) as e:
+                self.stats["errors"] += 1
+                print(f"OSC {control.address} failed:", e)
+                continue
+            self.queue_latency.add(time.perf_counter() - item.arrived)
+            if item.sent is not None:
+                self.e2e_latency.add(time.time() - item.sent)
+
+    def _index_controls(self, default_device):
+        """Maps controls without a device to the current default render endpoint."""
+        by_device = {}
+        for control in self.controls.values():
+            by_device.setdefault(control.device or default_device, []).append(control)
+        self.default_device = default_device
+        self.by_device = by_device
+
+    def _on_backend_event(self, event):
+        if event.get("event") == "default" and event.get("flow") == "render":
+            self._index_controls(event["device"])
+            return
+        if event.get("event") != "volume" or not self.feedback:
+            return
+        device = event["device"]
+        if event.get("source") == self.context_name:
+            written = self.written.get(device)
+            if written is not None and abs(written - event["level"]) < 1e-4:
+                # The surface already shows the value it sent.
+                return
+        controls = self.by_device.get(device)
+        if controls and self.loop is not None:
+            self.loop.call_soon_threadsafe(self._send_feedback, controls, event["level"], event["muted"])
+
+    # -------------------------------
+    # Feedback (event loop)
+    # -------------------------------
+    def _expire_surfaces(self):
+        cutoff = time.monotonic() - self.surface_timeout
+        while self.surfaces:
+            addr = next(iter(self.surfaces))
+            if self.surfaces[addr] >= cutoff:
+                break
+            del self.surfaces[addr]
+            self.stats["surfaces_dropped"] += 1
+
+    def _send_feedback(self, controls, level, muted):
+        self._expire_surfaces()
+        if self.transport is None or not self.surfaces:
+            return
+        messages = []
+        for control in controls:
+            if control.op == OP_VOLUME:
+                messages.append(encode_message(control.address, float(level)))
+            elif control.op == OP_MUTE:
+                messages.append(encode_message(control.address, int(muted)))
+        if not messages:
+            return
+        packet = messages[0] if len(messages) == 1 else encode_bundle(TIMETAG_IMMEDIATE, messages)
+        for surface in self.surfaces:
+            self.transport.sendto(packet, surface)
+            self.stats["feedback"] += 1
+
+    # -------------------------------
+    # Lifecycle
+    # -------------------------------
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.backend = await self.loop.run_in_executor(self.executor, self.backend_factory)
+        state = await self.loop.run_in_executor(self.executor, self.backend.get_volume)
+        self._index_controls(state["device"])
+        self.backend.add_listener(self._on_backend_event)
+        host, _, port = self.listen.rpartition(":")
+        await self.loop.create_datagram_endpoint(lambda: _OscProtocol(self), local_addr=(host, int(port)))
+        self.port = self.transport.get_extra_info("sockname")[1]
+        self._tick_task = asyncio.ensure_future(self._tick_loop())
+        return self
+
+    async def run_forever(self):
+        await self.start()
+        print(f"OSC input listening on {self.listen}")
+        await self._tick_task
+
+    def close(self):
+        if self._tick_task is not None:
+            self._tick_task.cancel()
+        if self.transport is not None:
+            self.transport.close()
+        if self.backend is not None:
+            self.backend.remove_listener(self._on_backend_event)
+        self.executor.shutdown(wait=False)
+
+    def metrics(self):
+        return dict(self.stats, e2e_latency=self.e2e_latency.report(),
+                    queue_latency=self.queue_latency.report())
+
+    def start_in_thread(self):
+        """Runs the receiver on a daemon thread with its own event loop (used by the GUI)."""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except Exception as e:
+                errors.append(e)
+                return
+            finally:
+                started.set()
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, name="osc-input", daemon=True)
+        thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSC control surface input")
+    parser.add_argument("--map", required=True, help="control mapping file (JSON)")
+    parser.add_argument("--listen", help="override the mapping's listen address")
+    parser.add_argument("--tick", type=float, default=0.01, help="apply interval in seconds")
+    parser.add_argument("--simulate", action="store_true", help="use the in-memory simulated backend")
+    args = parser.parse_args()
+
+    listen, controls = load_mapping(args.map)
+    if args.simulate:
+        from audio_backend import SimulatedAudioBackend
+        factory = SimulatedAudioBackend
+    else:
+        from audio_backend import ComAudioBackend
+        factory = ComAudioBackend
+    osc = OscInput(factory, controls, args.listen or listen, tick=args.tick)
+    try:
+        asyncio.run(osc.run_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(osc.metrics(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Single-instance IPC: CLI invocations are forwarded to a running app.
+
+While `python -m volume` runs, it serves the control server's JSON-RPC
+methods on a private local endpoint (a Unix-domain socket, or an ephemeral
+TCP port on localhost where asyncio has no Unix sockets) and writes that
+address to a per-user instance file. A command such as
+
+    python -m volume set 30
+
+reads the instance file, sends one request and prints the result. The
+forwarding path imports only socket and json, never the COM helpers, so a
+hotkey-bound script gets its answer in a few milliseconds instead of a COM
+bootstrap and a full enumeration. When no instance answers, the command
+runs directly against a ComAudioBackend of its own.
+
+Commands (DEVICE is an endpoint ID; the default render endpoint if omitted):
+    get [DEVICE]                    set PERCENT [DEVICE]
+    step up|down [DEVICE]           mute [on|off|toggle] [DEVICE]
+    list [render|capture|all]       default DEVICE
+    position PERCENT [DEVICE]       (calibrated: 50 sounds equally loud on every device)
+
+The instance file lives in $XDG_RUNTIME_DIR, %LOCALAPPDATA% or the temp
+directory; VOLUME_INSTANCE_FILE overrides it (several sessions, benchmarks).
+"""
+import json
+import os
+import socket
+import sys
+
+CONTEXT = "cli"
+CONNECT_TIMEOUT = 0.5
+CALL_TIMEOUT = 5.0
+
+COMMANDS = ("get", "set", "step", "mute", "list", "default", "position")
+
+USAGE = """usage: python -m volume COMMAND [ARGS]
+    get [DEVICE]                    set PERCENT [DEVICE]
+    step up|down [DEVICE]           mute [on|off|toggle] [DEVICE]
+    list [render|capture|all]       default DEVICE
+    position PERCENT [DEVICE]"""
+
+
+class NoInstance(Exception):
+    """No running instance accepted the connection."""
+
+
+class CommandError(Exception):
+    """The command line or the command itself failed."""
+
+
+def instance_file():
+    path = os.environ.get("VOLUME_INSTANCE_FILE")
+    if path:
+        return path
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.environ.get("TEMP") or "."
+        return os.path.join(base, "volume-control", "instance")
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+        os.environ.get("TMPDIR", "/tmp"), f"volume-control-{os.getuid()}")
+    return os.path.join(base, "volume-control.instance")
+
+
+# ============================================================
+# Command line -> JSON-RPC request
+# ============================================================
+def _percent(text):
+    try:
+        return float(text.rstrip("%")) / 100.0
+    except ValueError:
+        raise CommandError(f"Invalid volume percentage: {text!r}")
+
+
+def _device(args):
+    if len(args) > 1:
+        raise CommandError(USAGE)
+    return {"device": args[0]} if args else {}
+
+
+def parse_command(argv):
+    """Returns (method, params) for a command line such as ["set", "30"]."""
+    if not argv or argv[0] not in COMMANDS:
+        raise CommandError(USAGE)
+    command, args = argv[0], argv[1:]
+    if command == "get":
+        return "get", _device(args)
+    if command == "set":
+        if not args:
+            raise CommandError(USAGE)
+        return "set", dict(_device(args[1:]), level=_percent(args[0]), context=CONTEXT)
+    if command == "position":
+        if not args:
+            raise CommandError(USAGE)
+        return "set_position", dict(_device(args[1:]), position=_percent(args[0]) * 100, context=CONTEXT)
+    if command == "step":
+        if not args or args[0] not in ("up", "down"):
+            raise CommandError(USAGE)
+        return "step", dict(_device(args[1:]), direction=args[0], context=CONTEXT)
+    if command == "mute":
+        states = {"on": True, "off": False, "toggle": None}
+        muted = None
+        if args and args[0] in states:
+            muted, args = states[args[0]], args[1:]
+        return "mute", dict(_device(args), muted=muted, context=CONTEXT)
+    if command == "list":
+        if len(args) > 1 or (args and args[0] not in ("render", "capture", "all")):
+            raise CommandError(USAGE)
+        return "list", {"flow": args[0] if args else "all"}
+    if len(args) != 1:
+        raise CommandError(USAGE)
+    return "set_default", {"device": args[0]}
+
+
+def format_result(method, result):
+    if method == "list":
+        return "\n".join(f"{'*' if d['default'] else ' '} {d['flow']:<8} {d['name']}  {d['id']}" for d in result)
+    if method == "set_default":
+        return f"Default {result['flow']} device: {result['device']}"
+    text = f"{round(result['level'] * 100)}%{' (muted)' if result['muted'] else ''}"
+    if method == "set_position":
+        return f"position {result['position']}, level {text}"
+    return text
+
+
+# ============================================================
+# Client side
+# ============================================================
+def _connect(path=None):
+    try:
+        with open(path or instance_file()) as f:
+            address = f.read().strip()
+    except OSError:
+        raise NoInstance("no instance file")
+    kind, _, target = address.partition(":")
+    try:
+        if kind == "unix" and hasattr(socket, "AF_UNIX"):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(target)
+        elif kind == "tcp":
+            host, _, port = target.rpartition(":")
+            sock = socket.create_connection((host, int(port)), CONNECT_TIMEOUT)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            raise NoInstance(f"unsupported address {address!r}")
+    except (OSError, ValueError) as e:
+        # A stale file left behind by an instance that did not exit cleanly.
+        raise NoInstance(str(e))
+    return sock
+
+
+def forward(method, params, path=None):
+    """
+    Sends one request to the running instance and returns its result.
+    Raises NoInstance if nothing is listening, so the caller can fall back;
+    once connected, failures raise CommandError rather than risk running a
+    command twice.
+    """
+    sock = _connect(path)
+    try:
+        sock.settimeout(CALL_TIMEOUT)
+        sock.sendall(json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params}).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    except OSError as e:
+        raise CommandError(f"Running instance did not answer: {e}")
+    finally:
+        sock.close()
+    if not line:
+        raise CommandError("Running instance closed the connection.")
+    response = json.loads(line)
+    if "error" in response:
+        raise CommandError(response["error"]["message"])
+    return response["result"]
+
+
+def instance_running(path=None):
+    try:
+        return forward("ping", {}, path) == "pong"
+    except (NoInstance, CommandError):
+        return False
+
+
+def run_direct(method, params):
+    """Runs the command in this process, with its own COM bootstrap."""
+    from audio_backend import BackendError, ComAudioBackend
+    from control_server import BACKEND_METHODS
+    try:
+        backend = ComAudioBackend(context_name=CONTEXT)
+        return getattr(backend, BACKEND_METHODS[method])(**params)
+    except (BackendError, OSError, ValueError) as e:
+        raise CommandError(str(e))
+
+
+def main(argv=None):
+    """Entry point for `python -m volume COMMAND ...`; returns the exit status."""
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        method, params = parse_command(argv)
+        try:
+            result = forward(method, params)
+        except NoInstance:
+            result = run_direct(method, params)
+    except CommandError as e:
+        print(e, file=sys.stderr)
+        return 2 if str(e) == USAGE else 1
+    print(format_result(method, result))
+    return 0
+
+
+# ============================================================
+# Instance side
+# ============================================================
+class InstanceEndpoint:
+    """
+    Serves the running app's backend to later CLI invocations. `backend_factory`
+    is handed to a ControlServer, so every forwarded command runs on its COM
+    worker thread and never on the Tk thread.
+    """
+    def __init__(self, backend_factory, path=None):
+        self.backend_factory = backend_factory
+        self.path = path or instance_file()
+        self.server = None
+        self.address = None
+
+    def start(self):
+        from control_server import ControlServer
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), mode=0o700, exist_ok=True)
+        if hasattr(socket, "AF_UNIX") and sys.platform != "win32":
+            address = "unix:" + self.path + ".sock"
+        else:
+            address = "tcp:127.0.0.1:0"
+        self.server = ControlServer(self.backend_factory, address)
+        self.server.start_in_thread()
+        self.address = self.server.address
+        # Write then rename, so a client never reads a half-written address.
+        temp = f"{self.path}.{os.getpid()}"
+        with open(temp, "w") as f:
+            f.write(self.address)
+        os.replace(temp, self.path)
+        return self
+
+    def close(self):
+        try:
+            with open(self.path) as f:
+                ours = f.read().strip() == self.address
+            if ours:
+                os.remove(self.path)
+        except OSError:
+            pass
+        if self.server is not None:
+            self.server.stop_from_thread()
+            if self.address.startswith("unix:"):
+                try:
+                    os.remove(self.address[len("unix:"):])
+                except OSError:
+                    pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+"""
+Shared-memory state board: the running app's device list, levels, mute
+states and default endpoints, readable by other processes without COM
+calls or IPC round-trips.
+
+StateBoardPublisher follows a backend's events and keeps a fixed-layout
+region current: a named mapping ("Local\\volume-control-board-USER") on
+Windows, or a file in the runtime directory, mapped shared, elsewhere.
+There is one writer. Every write is bracketed by a sequence counter (a
+seqlock): the counter is made odd before the region changes and even
+again after. A volume event rewrites only its device's record.
+
+StateBoardReader maps the same region read-only. snapshot() copies it
+between two reads of the counter and retries if the counter was odd or
+moved, so it never returns a half-written state. A reader that only
+wants to know whether anything changed compares `seq` (one 8-byte read).
+The reader side imports only the standard library:
+
+    from state_board import StateBoardReader
+    board = StateBoardReader()
+    board.level()          # (level, muted) of the default render endpoint
+    board.snapshot()       # {"seq", "updated", "pid", "devices": [...], "defaults": {...}}
+
+    python state_board.py [--watch]
+
+The protocol relies on the writer's stores becoming visible in program
+order, which x86 and x64 guarantee. VOLUME_STATE_BOARD overrides the
+mapping name (Windows) or file path.
+
+Layout (little endian):
+    header  b"VCSB" u16 version, u16 slots, u16 record size, u16 flags, u32 writer pid,
+            u64 sequence, f64 updated (unix time), u32 device count, u32 layout,
+            4 x i16 default slot (render/capture x console/communications, -1 none), 16 reserved bytes
+    record  64s endpoint ID, 64s name (UTF-8, NUL padded), u8 flow, u8 muted, u8 flags, u8 reserved,
+            f32 level
+"""
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+MAGIC = b"VCSB"
+VERSION = 1
+SLOTS = 64
+
+_HEADER = struct.Struct("<4sHHHHIQdII4h16x")
+_RECORD = struct.Struct("<64s64sBBBxf")
+_SEQ = struct.Struct("<Q")
+_SEQ_OFFSET = 16
+_COUNT = struct.Struct("<I")
+_COUNT_OFFSET = 32
+
+FLAG_TRUNCATED = 0x1      # header: more devices than slots
+FLAG_QUARANTINED = 0x1    # record: the device is not responding
+FLAG_UNKNOWN = 0x2        # record: level and mute could not be read
+
+FLOWS = ("render", "capture")
+ROLES = ("console", "communications")
+DEFAULT_KEYS = tuple((flow, role) for flow in FLOWS for role in ROLES)
+
+
+class BoardUnavailable(Exception):
+    """No app is publishing a state board (or it is from another version)."""
+
+
+def board_name():
+    name = os.environ.get("VOLUME_STATE_BOARD")
+    if name:
+        return name
+    if sys.platform == "win32":
+        return f"Local\\volume-control-board-{os.environ.get('USERNAME', 'user')}"
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+        os.environ.get("TMPDIR", "/tmp"), f"volume-control-{os.getuid()}")
+    return os.path.join(base, "volume-control.board")
+
+
+def board_size(slots):
+    return _HEADER.size + slots * _RECORD.size
+
+
+def _text(value, size):
+    data = (value or "").encode("utf-8")[:size]
+    return data.ljust(size, b"\0")
+
+
+def _decode(data):
+    return data.rstrip(b"\0").decode("utf-8", errors="ignore")
+
+
+# ============================================================
+# Writer
+# ============================================================
+class StateBoard:
+    """
+    The writable region. Only one thread may write at a time; the
+    publisher serializes its calls.
+    """
+    def __init__(self, name=None, slots=SLOTS):
+        self.name = name or board_name()
+        self.slots = slots
+        self.size = board_size(slots)
+        self._file = None
+        if sys.platform == "win32":
+            self.map = mmap.mmap(-1, self.size, tagname=self.name)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.name)), mode=0o700, exist_ok=True)
+            # Not truncated first: a reader still mapping the file would fault.
+            self._file = open(self.name, "r+b" if os.path.exists(self.name) else "w+b")
+            if os.fstat(self._file.fileno()).st_size != self.size:
+                self._file.truncate(self.size)
+            self.map = mmap.mmap(self._file.fileno(), self.size)
+        # A board left by an earlier instance keeps counting, so its readers see the change.
+        magic, _, _, _, _, _, seq, _, _, layout = _HEADER.unpack_from(self.map, 0)[:10]
+        self.seq = (seq + 1) & ~1 if magic == MAGIC else 0
+        self.layout = layout if magic == MAGIC else 0
+        self.slot_of = {}   # endpoint ID -> record index
+        self.stats = {"publishes": 0, "updates": 0}
+
+    def _begin(self):
+        self.seq += 1
+        _SEQ.pack_into(self.map, _SEQ_OFFSET, self.seq)
+
+    def _end(self):
+        self.seq += 1
+        _SEQ.pack_into(self.map, _SEQ_OFFSET, self.seq)
+
+    def publish(self, devices, defaults):
+        """
+        Rewrites the whole board. `devices` are dicts with "id", "name",
+        "flow", "level", "muted" (and optionally "quarantined"); `defaults`
+        maps (flow, role) in DEFAULT_KEYS to an endpoint ID.
+        """
+        shown = devices[:self.slots]
+        self.slot_of = {device["id"]: index for index, device in enumerate(shown)}
+        self.layout += 1
+        records = b"".join(self._record(device) for device in shown)
+        default_slots = [self.slot_of.get(defaults.get(key), -1) for key in DEFAULT_KEYS]
+        # Everything is packed first, so the counter stays odd for one copy only.
+        data = _HEADER.pack(MAGIC, VERSION, self.slots, _RECORD.size, FLAG_TRUNCATED if len(devices) > self.slots else 0,
+                            os.getpid(), self.seq + 1, time.time(), len(shown), self.layout, *default_slots) + records
+        self._begin()
+        self.map[:len(data)] = data
+        self._end()
+        self.stats["publishes"] += 1
+
+    def _record(self, device):
+        level = device.get("level")
+        flags = (FLAG_QUARANTINED if device.get("quarantined") else 0) | (FLAG_UNKNOWN if level is None else 0)
+        return _RECORD.pack(_text(device["id"], 64), _text(device.get("name"), 64),
+                            FLOWS.index(device["flow"]) if device.get("flow") in FLOWS else 255,
+                            bool(device.get("muted")), flags, float("nan") if level is None else level)
+
+    def update(self, device):
+        """Rewrites one device's record; False if the device is not on the board."""
+        index = self.slot_of.get(device["id"])
+        if index is None:
+            return False
+        record = self._record(device)
+        self._begin()
+        offset = _HEADER.size + index * _RECORD.size
+        self.map[offset:offset + _RECORD.size] = record
+        struct.pack_into("<d", self.map, 24, time.time())
+        self._end()
+        self.stats["updates"] += 1
+        return True
+
+    def close(self):
+        # A zero pid tells readers nobody is publishing any more.
+        self._begin()
+        struct.pack_into("<I", self.map, 12, 0)
+        self._end()
+        self.map.close()
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.remove(self.name)
+            except OSError:
+                pass
+
+
+class StateBoardPublisher:
+    """
+    Publishes `backend` state to a StateBoard and keeps it current from the
+    backend's events. Volume events rewrite one record; device and default
+    events re-read the device list (from the backend's caches) and
+    republish. Call close() to withdraw the board.
+    """
+    def __init__(self, backend, board=None):
+        self.backend = backend
+        self.board = board if board is not None else StateBoard()
+        self.devices = {}    # endpoint ID -> device dict as published
+        self.defaults = {}   # (flow, role) -> endpoint ID
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.backend.add_listener(self.on_event)
+        self.refresh()
+        return self
+
+    def refresh(self):
+        """Re-reads devices, levels and defaults and republishes everything."""
+        devices = {}
+        for device in self.backend.list_devices("all"):
+            devices[device["id"]] = self._with_volume(device)
+        defaults = {}
+        for flow in FLOWS:
+            defaults[(flow, "console")] = next((device["id"] for device in devices.values()
+                                                if device["flow"] == flow and device["default"]), None)
+            defaults[(flow, "communications")] = self._guarded(self.backend.communications_device, flow)
+        with self.lock:
+            self.devices = devices
+            self.defaults = defaults
+            self.board.publish(list(devices.values()), defaults)
+
+    def _guarded(self, func, *args):
+        try:
+            return func(*args)
+        except Exception as e:
+            print("State board:", e)
+            return None
+
+    def _with_volume(self, device):
+        # Reading the volume also registers the device's volume notifications.
+        state = self._guarded(self.backend.get_volume, device["id"])
+        return dict(device, level=state["level"] if state else None, muted=state["muted"] if state else False)
+
+    def on_event(self, event):
+        kind = event.get("event")
+        if kind == "volume":
+            with self.lock:
+                device = self.devices.get(event["device"])
+                if device is not None:
+                    device["level"] = event["level"]
+                    device["muted"] = event["muted"]
+                    self.board.update(device)
+        elif kind in ("device", "default"):
+            self.refresh()
+
+    def close(self):
+        self.backend.remove_listener(self.on_event)
+        with self.lock:
+            self.board.close()
+
+
+# ============================================================
+# Reader
+# ============================================================
+class StateBoardReader:
+    """
+    Read-only view of the board published by the running app. Raises
+    BoardUnavailable if there is none, or if the writer stays mid-update
+    for `timeout` seconds.
+    """
+    def __init__(self, name=None, timeout=1.0):
+        self.name = name or board_name()
+        self.timeout = timeout
+        self.stats = {"reads": 0, "retries": 0}
+        self._file = None
+        try:
+            if sys.platform == "win32":
+                header = mmap.mmap(-1, _HEADER.size, tagname=self.name)
+            else:
+                self._file = open(self.name, "rb")
+                header = mmap.mmap(self._file.fileno(), _HEADER.size, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise BoardUnavailable(f"No state board at {self.name}: {e}")
+        magic, version, slots, record_size = _HEADER.unpack_from(header, 0)[:4]
+        header.close()
+        if magic != MAGIC or version != VERSION or record_size != _RECORD.size:
+            self.close()
+            raise BoardUnavailable(f"{self.name} is not a version {VERSION} state board")
+        self.slots = slots
+        if sys.platform == "win32":
+            self.map = mmap.mmap(-1, board_size(slots), tagname=self.name)
+        else:
+            self.map = mmap.mmap(self._file.fileno(), board_size(slots), access=mmap.ACCESS_READ)
+        self._layout = None
+        self._layout_seq = None
+        self._slot_of = {}        # endpoint ID -> record index, for self._layout
+        self._default_slot = -1   # default render endpoint's record index, for self._layout
+
+    @property
+    def seq(self):
+        """The sequence counter; it changes with every write."""
+        return _SEQ.unpack_from(self.map, _SEQ_OFFSET)[0]
+
+    def _read(self, size=None):
+        """
+        Copies the first `size` bytes (the header and every published
+        record if None) between two equal, even counter reads.
+        """
+        deadline = None
+        while True:
+            seq = _SEQ.unpack_from(self.map, _SEQ_OFFSET)[0]
+            if not seq & 1:
+                data = self.map[:size or board_size(min(self.slots, _COUNT.unpack_from(self.map, _COUNT_OFFSET)[0]))]
+                if _SEQ.unpack_from(self.map, _SEQ_OFFSET)[0] == seq:
+                    self.stats["reads"] += 1
+                    header = _HEADER.unpack_from(data, 0)
+                    if header[5] == 0:
+                        raise BoardUnavailable("The app publishing the state board has exited")
+                    return data, header
+            self.stats["retries"] += 1
+            if deadline is None:
+                deadline = time.monotonic() + self.timeout
+            elif time.monotonic() > deadline:
+                raise BoardUnavailable("The state board is not settling (writer stalled mid-update?)")
+            time.sleep(0)
+
+    def snapshot(self):
+        data, header = self._read()
+        flags, pid, seq, updated, count = header[4:9]
+        devices = []
+        for index in range(count):
+            device_id, name, flow, muted, record_flags, level = _RECORD.unpack_from(
+                data, _HEADER.size + index * _RECORD.size)
+            devices.append({"id": _decode(device_id), "name": _decode(name),
+                            "flow": FLOWS[flow] if flow < len(FLOWS) else None,
+                            "level": None if record_flags & FLAG_UNKNOWN else level, "muted": bool(muted),
+                            "quarantined": bool(record_flags & FLAG_QUARANTINED)})
+        defaults = {f"{flow}/{role}": devices[slot]["id"] if 0 <= slot < count else None
+                    for (flow, role), slot in zip(DEFAULT_KEYS, header[10:14])}
+        return {"seq": seq, "updated": updated, "pid": pid, "truncated": bool(flags & FLAG_TRUNCATED),
+                "devices": devices, "defaults": defaults}
+
+    def level(self, device=None):
+        """
+        (level, muted) of one endpoint, None as the endpoint ID meaning the
+        default render endpoint. Copies only the header and the records up
+        to the device's, while the device list stays the same.
+        """
+        for _ in range(3):
+            slot = self._default_slot if device is None else self._slot_of.get(device, -1)
+            if slot >= 0:
+                offset = _HEADER.size + slot * _RECORD.size
+                data, header = self._read(offset + _RECORD.size)
+                if header[9] == self._layout and (device is not None or header[10] == slot):
+                    _, _, _, muted, flags, level = _RECORD.unpack_from(data, offset)
+                    return (None if flags & FLAG_UNKNOWN else level), bool(muted)
+            elif self._layout is not None and self.seq == self._layout_seq:
+                break
+            # The device list changed (or was never read): index it again.
+            data, header = self._read()
+            self._layout = header[9]
+            self._layout_seq = header[6]
+            self._default_slot = header[10]
+            self._slot_of = {_decode(_RECORD.unpack_from(data, _HEADER.size + index * _RECORD.size)[0]): index
+                             for index in range(header[8])}
+        raise KeyError(device)
+
+    def close(self):
+        if getattr(self, "map", None) is not None:
+            self.map.close()
+            self.map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Print the state board of the running volume app")
+    parser.add_argument("--watch", action="store_true", help="print again whenever the board changes")
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between checks with --watch")
+    args = parser.parse_args()
+    try:
+        reader = StateBoardReader()
+        seq = None
+        while True:
+            if reader.seq != seq:
+                snapshot = reader.snapshot()
+                seq = snapshot["seq"]
+                defaults = set(snapshot["defaults"].values())
+                for device in snapshot["devices"]:
+                    level = "?" if device["level"] is None else f"{round(device['level'] * 100)}%"
+                    print(f"{'*' if device['id'] in defaults else ' '} {device['flow'] or '?':<8} {level:>5}"
+                          f"{' muted' if device['muted'] else '':6} {device['name']}  {device['id']}")
+                print()
+            if not args.watch:
+                break
+            time.sleep(args.interval)
+    except BoardUnavailable as e:
+        print(e, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from audit_journal import _HEADER, _RECORD, AuditJournal, AuditReader, write_synthetic_journal
+from volume.core import OP_SET_MUTE, OP_SET_VOLUME
+
+DEVICE = "{0.0.0.00000000}.{a}"
+OTHER = "{0.0.0.00000000}.{b}"
+
+
+def test_record_and_query(tmp_path):
+    path = str(tmp_path / "audit.vcaj")
+    journal = AuditJournal(path, flush_interval=60.0)
+    journal.record(OP_SET_VOLUME, DEVICE, 0.5, 0.2, actor="gui")
+    journal.record(OP_SET_MUTE, OTHER, 1.0, actor="cli")
+    journal.record(OP_SET_VOLUME, DEVICE, 0.7, actor="gui")
+    journal.close()
+
+    reader = AuditReader(path)
+    try:
+        assert len(reader) == 3
+        records = list(reader.query(device=DEVICE))
+        assert [r.new for r in records] == pytest.approx([0.5, 0.7])
+        assert records[0].old == pytest.approx(0.2)
+        assert records[0].actor == "gui" and records[0].device == DEVICE
+        assert [r.actor for r in reader.query(op="set_mute")] == ["cli"]
+        times = [reader.times[i] for i in range(len(reader))]
+        assert times == sorted(times)
+    finally:
+        reader.close()
+
+
+def test_time_range_query(tmp_path):
+    path = str(tmp_path / "synthetic.vcaj")
+    devices = write_synthetic_journal(path, 1000, devices=4, span=1000.0)
+    reader = AuditReader(path)
+    try:
+        start = reader.times[0]
+        window = list(reader.query(since=start + 100.0, until=start + 200.0))
+        assert len(window) == 100
+        assert all(start + 100.0 <= r.time < start + 200.0 for r in window)
+        assert len(list(reader.query(since=start + 100.0, until=start + 200.0, device=devices[1]))) == 25
+    finally:
+        reader.close()
+
+
+def test_torn_record_is_cut_before_appending(tmp_path):
+    path = str(tmp_path / "audit.vcaj")
+    journal = AuditJournal(path)
+    journal.record(OP_SET_VOLUME, DEVICE, 0.5)
+    journal.close()
+    with open(path, "ab") as f:
+        f.write(b"\xff" * (_RECORD.size // 2))
+
+    reader = AuditReader(path)
+    assert len(reader) == 1
+    reader.close()
+
+    journal = AuditJournal(path)
+    journal.record(OP_SET_MUTE, OTHER, 1.0)
+    journal.close()
+    assert os.path.getsize(path) == _HEADER.size + 2 * _RECORD.size
+    reader = AuditReader(path)
+    try:
+        assert [(r.op, r.device) for r in reader.query()] == [("set_volume", DEVICE), ("set_mute", OTHER)]
+    finally:
+        reader.close()
+
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"not a journal, just some text\n")
+    with pytest.raises(ValueError):
+        AuditJournal(str(path))
+    assert path.read_bytes() == b"not a journal, just some text\n"
@@ -0,0 +1,63 @@
+import pytest
+
+from calibration import POSITIONS, REVERSE_STEP_DB, CalibrationProfile, CalibrationStore
+
+RANGES = [(-65.25, 0.0, 0.75), (-96.0, 0.0, 0.5), (-46.5, 0.0, 1.5), (-10.0, 6.0, 0.5)]
+MEASURED = [(-40.0, 52.0), (-30.0, 62.0), (-20.0, 72.0), (-10.0, 82.0), (0.0, 92.0)]
+
+
+@pytest.mark.parametrize("volume_range", RANGES)
+@pytest.mark.parametrize("measurements", [(), MEASURED])
+def test_table_is_monotonic_and_in_range(volume_range, measurements):
+    table = CalibrationProfile(volume_range, measurements).compile()
+    assert len(table.db) == POSITIONS + 1
+    assert all(a <= b for a, b in zip(table.db, table.db[1:]))
+    assert table.db[0] == volume_range[0]
+    assert all(volume_range[0] <= db <= volume_range[1] for db in table.db)
+    assert all(a <= b for a, b in zip(table.positions, table.positions[1:]))
+
+
+@pytest.mark.parametrize("volume_range", RANGES)
+def test_position_round_trip(volume_range):
+    table = CalibrationProfile(volume_range).compile()
+    for position in range(POSITIONS + 1):
+        db = table.to_db(position)
+        assert table.to_position(db, current=position) == position
+        # Without the current position, the reverse table lands on a position with the same dB.
+        assert table.to_db(table.to_position(db)) == pytest.approx(db, abs=REVERSE_STEP_DB * 20)
+
+
+def test_perceptual_curve_without_measurements():
+    table = CalibrationProfile((-65.25, 0.0, 0.75)).compile()
+    assert table.to_db(100) == 0.0
+    assert table.to_db(50) == pytest.approx(-10.0)
+    assert table.to_db(25) == pytest.approx(-20.0)
+
+
+def test_full_scale_matches_devices():
+    # Two devices with different responses land on the same measured level at 50.
+    quiet = CalibrationProfile((-65.25, 0.0, 0.75), [(-40.0, 52.0), (0.0, 92.0)], full_scale=85.0).compile()
+    loud = CalibrationProfile((-96.0, 0.0, 0.5), [(-40.0, 58.0), (0.0, 104.0)], full_scale=85.0).compile()
+    assert 52.0 + (quiet.to_db(50) + 40.0) == pytest.approx(75.0)
+    assert 58.0 + (loud.to_db(50) + 40.0) * 46.0 / 40.0 == pytest.approx(75.0)
+
+
+def test_measurements_must_rise():
+    with pytest.raises(ValueError):
+        CalibrationProfile((-65.25, 0.0, 0.75), [(-40.0, 60.0), (-20.0, 50.0)])
+
+
+def test_store_reloads_compiled_table(tmp_path):
+    path = str(tmp_path / "calibration.json")
+    store = CalibrationStore(path)
+    store.measure("{dev}", -20.0, 70.0)
+    store.measure("{dev}", 0.0, 90.0)
+    compiled = store.table("{dev}", (-65.25, 0.0, 0.75))
+    assert store.stats["compiled"] == 1
+
+    reloaded = CalibrationStore(path)
+    table = reloaded.table("{dev}", (-65.25, 0.0, 0.75))
+    assert reloaded.stats == {"compiled": 0, "loaded": 1, "hits": 0}
+    assert list(table.db) == pytest.approx(list(compiled.db), abs=1e-4)
+    # A different range recompiles.
+    assert CalibrationStore(path).table("{dev}", (-96.0, 0.0, 0.5)).db[0] == -96.0
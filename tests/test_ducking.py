@@ -0,0 +1,45 @@
+import time
+
+from audio_backend import SimulatedAudioBackend, SimulatedDevice
+from ducking import DuckingEngine
+
+SPEAKERS = "{0.0.0.00000000}.{sim-speakers}"
+HEADSET = "{0.0.0.00000000}.{sim-headset}"
+
+
+def levels(backend):
+    return ({device_id: backend.get_volume(device_id)["level"] for device_id in backend.devices},
+            {(s["process"], s["device"]): s["level"] for s in backend.list_sessions()})
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_duck_and_exact_restore():
+    backend = SimulatedAudioBackend()
+    backend.add_device(SimulatedDevice(HEADSET, "Simulated Headset", 0, 0.7))
+    backend.communications[0] = HEADSET
+    backend.add_session(SPEAKERS, 100, "Spotify.exe", level=0.9)
+    backend.add_session(SPEAKERS, 101, "chrome.exe", level=0.6)
+    backend.add_session(HEADSET, 200, "Teams.exe", active=False)
+    before = levels(backend)
+
+    engine = DuckingEngine(backend, duck_db=15.0, attack=0.05, release=0.05, hold=0.05,
+                           processes=["Teams.exe"]).start()
+    try:
+        backend.set_session_active(HEADSET, 200, True)
+        wait_for(lambda: engine.depth == 1.0)
+        ducked = levels(backend)
+        assert ducked[1][("Spotify.exe", SPEAKERS)] < 0.9 * 0.2
+        assert ducked[1][("Teams.exe", HEADSET)] == before[1][("Teams.exe", HEADSET)]
+
+        backend.set_session_active(HEADSET, 200, False)
+        wait_for(lambda: engine.depth == 0.0 and engine.stats["restores"] == 1)
+        assert levels(backend) == before
+        assert engine.stats["errors"] == 0
+    finally:
+        engine.close()
@@ -0,0 +1,76 @@
+from history import DEFAULT, LEVEL, MUTE, VolumeHistory
+
+DEVICE = "{0.0.0.00000000}.{a}"
+OTHER = "{0.0.0.00000000}.{b}"
+
+
+def test_undo_redo():
+    history = VolumeHistory()
+    history.record(LEVEL, DEVICE, 0.2, 0.5, now=1.0)
+    history.record(MUTE, DEVICE, False, True, now=2.0)
+    history.record(DEFAULT, 0, DEVICE, OTHER, now=3.0)
+    assert history.undo() == (DEFAULT, 0, DEVICE)
+    assert history.undo() == (MUTE, DEVICE, False)
+    assert history.redo() == (MUTE, DEVICE, True)
+    assert history.undo() == (MUTE, DEVICE, False)
+    assert history.undo() == (LEVEL, DEVICE, 0.2)
+    assert history.undo() is None
+    assert history.redo() == (LEVEL, DEVICE, 0.5)
+
+
+def test_record_drops_redo_tail():
+    history = VolumeHistory()
+    history.record(LEVEL, DEVICE, 0.2, 0.5, now=1.0)
+    history.record(LEVEL, DEVICE, 0.5, 0.8, now=2.0)
+    history.undo()
+    history.record(LEVEL, DEVICE, 0.5, 0.1, now=3.0)
+    assert not history.can_redo()
+    assert history.undo() == (LEVEL, DEVICE, 0.5)
+    assert history.undo() == (LEVEL, DEVICE, 0.2)
+
+
+def test_no_change_is_not_recorded():
+    history = VolumeHistory()
+    history.record(LEVEL, DEVICE, 0.5, 0.5)
+    history.record(DEFAULT, 0, None, None)
+    assert len(history) == 0
+
+
+def test_default_without_previous_device():
+    history = VolumeHistory()
+    history.record(DEFAULT, 1, None, DEVICE, now=1.0)
+    assert history.undo() == (DEFAULT, 1, None)
+
+
+def test_drag_coalesces_into_one_entry():
+    history = VolumeHistory(coalesce_window=0.5)
+    levels = [0.2, 0.3, 0.4, 0.5, 0.6]
+    for i, (old, new) in enumerate(zip(levels, levels[1:])):
+        history.record(LEVEL, DEVICE, old, new, coalesce=True, now=1.0 + 0.1 * i)
+    assert len(history) == 1
+    # Another device, another source or a pause past the window starts a new entry.
+    history.record(LEVEL, OTHER, 0.6, 0.7, coalesce=True, now=1.4)
+    history.record(LEVEL, OTHER, 0.7, 0.8, external=True, coalesce=True, now=1.5)
+    history.record(LEVEL, OTHER, 0.8, 0.9, external=True, coalesce=True, now=3.0)
+    assert len(history) == 4
+    for _ in range(3):
+        history.undo()
+    assert history.undo() == (LEVEL, DEVICE, 0.2)
+
+
+def test_drag_back_to_start_leaves_nothing():
+    history = VolumeHistory()
+    history.record(LEVEL, DEVICE, 0.5, 0.6, coalesce=True, now=1.0)
+    history.record(LEVEL, DEVICE, 0.6, 0.5, coalesce=True, now=1.1)
+    assert len(history) == 0
+    assert not history.can_undo()
+
+
+def test_ring_overwrites_oldest():
+    history = VolumeHistory(capacity=4)
+    for i in range(10):
+        history.record(LEVEL, DEVICE, i / 10, (i + 1) / 10, now=float(i))
+    assert len(history) == 4
+    undone = [history.undo()[2] for _ in range(4)]
+    assert undone == [0.9, 0.8, 0.7, 0.6]
+    assert history.undo() is None
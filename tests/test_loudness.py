@@ -0,0 +1,59 @@
+"""The DSP stages, fed synthetic buffers through the packet source contract."""
+import numpy as np
+import pytest
+
+from loudness import CapturePipeline, LoudnessAnalyzer, SyntheticSource, sine
+
+RATE = 48000
+
+
+def drain(source, analyzer):
+    source.start()
+    while not source.exhausted:
+        source(analyzer.feed)
+
+
+def test_reference_sine_reads_minus_23_lufs():
+    # BS.1770 reference: 997 Hz at -20 dBFS on one channel is -23.0 LUFS.
+    analyzer = LoudnessAnalyzer(RATE, 2)
+    drain(SyntheticSource(sine(997, 4.0, RATE, 2, -20.0, active=[0]), RATE, burst=100), analyzer)
+    assert analyzer.latest["short_term"] == pytest.approx(-23.0, abs=0.05)
+    assert analyzer.latest["momentary"] == pytest.approx(-23.0, abs=0.05)
+    assert analyzer.latest["channel_short_term"][1] <= -100.0
+
+
+def test_rms_and_peak_per_channel():
+    analyzer = LoudnessAnalyzer(RATE, 2)
+    drain(SyntheticSource(sine(1000, 1.0, RATE, 2, -6.0, active=[1]), RATE), analyzer)
+    rms, peak = analyzer.latest["rms"], analyzer.latest["peak"]
+    assert peak[1] == pytest.approx(-6.0, abs=0.01)
+    assert rms[1] == pytest.approx(-6.0 - 10 * np.log10(2), abs=0.01)
+    assert rms[0] <= -100.0 and peak[0] <= -100.0
+
+
+def test_integer_pcm_matches_float():
+    signal = sine(997, 4.0, RATE, 2, -20.0)
+    as_float = LoudnessAnalyzer(RATE, 2)
+    as_int = LoudnessAnalyzer(RATE, 2)
+    drain(SyntheticSource(signal, RATE), as_float)
+    drain(SyntheticSource((signal * 32767).astype(np.int16), RATE), as_int)
+    assert as_int.latest["short_term"] == pytest.approx(as_float.latest["short_term"], abs=0.01)
+
+
+def test_packets_need_not_align_with_blocks():
+    signal = sine(440, 2.0, RATE, 2, -12.0)
+    aligned = LoudnessAnalyzer(RATE, 2)
+    odd = LoudnessAnalyzer(RATE, 2)
+    drain(SyntheticSource(signal, RATE, packet_frames=480), aligned)
+    drain(SyntheticSource(signal, RATE, packet_frames=333), odd)
+    assert odd.blocks == aligned.blocks == 20
+    assert odd.latest["short_term"] == pytest.approx(aligned.latest["short_term"], abs=1e-6)
+
+
+def test_capture_pipeline_stops_when_source_runs_dry():
+    blocks = []
+    pipeline = CapturePipeline(lambda: SyntheticSource(sine(997, 1.0, RATE, 2, -20.0, active=[0]), RATE),
+                               on_block=blocks.append, period=0.0).start()
+    pipeline.join(5.0)
+    assert pipeline.stats["frames"] == RATE
+    assert len(blocks) == 10
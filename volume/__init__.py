@@ -0,0 +1,85 @@
+"""
+Windows Core Audio control through ctypes COM calls.
+
+The package is split into submodules that are only imported when one of
+their names is first used, so `import volume` itself costs next to nothing
+and has no side effects:
+
+    volume.core       constants, GUIDs, interface specs, tracing, event contexts
+    volume.endpoints  enumeration, device IDs and names, EndpointCache, hot-plug
+    volume.volume     level/mute/dB helpers, volume notifications, metering, sessions
+    volume.policy     default endpoint switching (IPolicyConfig)
+    volume.state      read-through cache of level, mute, names and defaults
+    volume.capture    loopback capture as NumPy views (needs NumPy)
+    volume.gui        the Tkinter app; never imported by the names below
+
+`volume.get_mute`, `volume.EndpointCache` etc. resolve to the submodule that
+defines them. `python -m volume` starts the GUI.
+"""
+import importlib
+
+_EXPORTS = {
+    "core": (
+        "COINIT_MULTITHREADED", "CLSCTX_ALL", "EDataFlow_eRender", "EDataFlow_eCapture", "EDataFlow_eAll",
+        "ERole_eConsole", "ERole_eMultimedia", "ERole_eCommunications", "DEVICE_STATE_ACTIVE",
+        "ADDED", "REMOVED", "CHANGED", "OP_SET_VOLUME", "OP_SET_MUTE", "OP_STEP_UP", "OP_STEP_DOWN",
+        "OP_SET_DEFAULT", "OP_SET_VOLUME_DB", "OP_SET_CHANNEL_VOLUME", "UNKNOWN",
+        "GUID", "create_guid", "GUID_BYTES", "guid", "PROPERTYKEY", "VT_LPWSTR", "PROPVARIANT",
+        "AUDIO_VOLUME_NOTIFICATION_DATA", "HRESULT", "INTERFACE_SPECS", "vtable", "interface",
+        "set_com_tracer", "traced", "set_audit_journal", "audit_change", "init_com",
+        "EventContext", "new_event_context", "event_context_owner", "PROCESS_EVENT_CONTEXT",
+        "E_NOINTERFACE", "ComCallbackObject", "com_release", "query_interface",
+        "WAVE_FORMAT_PCM", "WAVE_FORMAT_IEEE_FLOAT", "WAVE_FORMAT_EXTENSIBLE", "WAVEFORMATEX", "WAVEFORMATEXTENSIBLE",
+    ),
+    "endpoints": (
+        "create_device_enumerator", "get_default_endpoint", "activate_audio_endpoint_volume",
+        "activate_audio_meter_information", "get_device_id", "get_device_state", "get_device",
+        "get_device_data_flow", "get_device_friendly_name", "iter_endpoint_collection",
+        "enumerate_audio_endpoints", "EndpointInfo", "EndpointCache", "EndpointNotificationClient",
+        "register_endpoint_notification", "unregister_endpoint_notification",
+    ),
+    "volume": (
+        "volume_step_up", "volume_step_down", "set_mute", "get_mute", "get_master_volume",
+        "set_master_volume", "get_master_volume_db", "set_master_volume_db", "get_volume_range",
+        "get_channel_count", "get_channel_volume", "get_channel_volumes", "set_channel_volume",
+        "get_peak_value", "get_metering_channel_count", "get_channels_peak_values", "make_peak_sampler",
+        "VolumeNotificationClient", "register_volume_notification", "unregister_volume_notification",
+        "AudioSessionStateInactive", "AudioSessionStateActive", "AudioSessionStateExpired",
+        "activate_audio_session_manager", "iter_audio_sessions", "get_session_volume", "set_session_volume",
+        "get_session_mute", "set_session_mute", "get_process_name", "AudioSession", "AudioSessionTracker",
+    ),
+    "policy": (
+        "switch_default_device",
+    ),
+    "state": (
+        "VolumeStateCache",
+    ),
+    "capture": (
+        "activate_audio_client", "sample_format", "LoopbackCapture",
+    ),
+}
+
+_SUBMODULES = ("core", "endpoints", "volume", "policy", "state", "capture", "gui")
+_LOCATIONS = {name: submodule for submodule, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_LOCATIONS)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+    submodule = _LOCATIONS.get(name)
+    if submodule is not None:
+        value = getattr(importlib.import_module("." + submodule, __name__), name)
+    else:
+        # IID_*/CLSID_* GUIDs, *Vtbl / *_Interface types and ole32 are resolved lazily by core
+        try:
+            value = getattr(importlib.import_module(".core", __name__), name)
+        except AttributeError:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LOCATIONS) | set(_SUBMODULES))
@@ -0,0 +1,12 @@
+import sys
+
+from single_instance import COMMANDS, main as run_command
+
+# `python -m volume set 30` is forwarded to the running app (or run directly)
+# without importing Tk or the COM helpers; anything else starts the GUI.
+if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+    sys.exit(run_command(sys.argv[1:]))
+
+from .gui import main
+
+main()
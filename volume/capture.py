@@ -0,0 +1,169 @@
+"""
+Loopback capture of render endpoints through IAudioClient and
+IAudioCaptureClient.
+
+LoopbackCapture opens a shared-mode loopback stream in the engine's mix
+format and hands every packet to the caller as a NumPy (frames, channels)
+view of the buffer GetBuffer returned, without copying it. The view is only
+valid until the packet is released, which happens as soon as the handler
+returns, so handlers must reduce or copy what they need. This is the packet
+source contract of loudness.CapturePipeline; loudness.SyntheticSource feeds
+the same pipeline on any platform.
+
+NumPy is only needed by this submodule; `import volume` does not load it.
+"""
+import ctypes
+from ctypes import POINTER, byref, c_uint, c_ulong, c_void_p
+
+import numpy as np
+
+from .core import (CLSCTX_ALL, WAVE_FORMAT_EXTENSIBLE, WAVE_FORMAT_IEEE_FLOAT, WAVE_FORMAT_PCM, WAVEFORMATEX,
+                   WAVEFORMATEXTENSIBLE, GUID_BYTES, _ole32, com_release, guid, interface, traced)
+
+AUDCLNT_SHAREMODE_SHARED = 0
+AUDCLNT_STREAMFLAGS_LOOPBACK = 0x00020000
+AUDCLNT_BUFFERFLAGS_DATA_DISCONTINUITY = 0x1
+AUDCLNT_BUFFERFLAGS_SILENT = 0x2
+REFTIMES_PER_SEC = 10_000_000
+
+# ============================================================
+# IAudioClient Activation and Mix Format
+# ============================================================
+@traced("IMMDevice", "Activate")
+def activate_audio_client(endpoint):
+    """
+    Activates the IAudioClient interface for the given endpoint.
+    """
+    endpoint_iface = ctypes.cast(endpoint, interface("IMMDevice"))
+    audio_client = c_void_p()
+    hr = endpoint_iface.contents.lpVtbl.contents.Activate(
+        endpoint_iface,
+        byref(guid("IID_IAudioClient")),
+        CLSCTX_ALL,
+        None,
+        byref(audio_client)
+    )
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    print("IAudioClient activated successfully:", audio_client)
+    return audio_client
+
+def sample_format(wave_format):
+    """
+    Returns (sample rate, channels, NumPy dtype) for a WAVEFORMATEX pointer.
+    Shared-mode mix formats are 32-bit float; 16- and 32-bit PCM are also
+    accepted, anything else raises ValueError.
+    """
+    fmt = ctypes.cast(wave_format, POINTER(WAVEFORMATEX)).contents
+    tag = fmt.wFormatTag
+    if tag == WAVE_FORMAT_EXTENSIBLE:
+        sub_format = bytes(ctypes.cast(wave_format, POINTER(WAVEFORMATEXTENSIBLE)).contents.SubFormat)
+        tag = {GUID_BYTES["KSDATAFORMAT_SUBTYPE_IEEE_FLOAT"]: WAVE_FORMAT_IEEE_FLOAT,
+               GUID_BYTES["KSDATAFORMAT_SUBTYPE_PCM"]: WAVE_FORMAT_PCM}.get(sub_format, tag)
+    dtype = {(WAVE_FORMAT_IEEE_FLOAT, 32): np.float32,
+             (WAVE_FORMAT_PCM, 16): np.int16,
+             (WAVE_FORMAT_PCM, 32): np.int32}.get((tag, fmt.wBitsPerSample))
+    if dtype is None:
+        raise ValueError(f"Unsupported mix format: tag {fmt.wFormatTag:#x}, {fmt.wBitsPerSample} bits")
+    return fmt.nSamplesPerSec, fmt.nChannels, np.dtype(dtype)
+
+# ============================================================
+# Loopback Capture Stream
+# ============================================================
+class LoopbackCapture:
+    """
+    A loopback stream on one render endpoint (an IMMDevice pointer).
+    Call start(), then call the object with a handler from the capturing
+    thread whenever it is time to drain the stream: every packet waiting is
+    passed to handler(view) and released, and the number of frames read is
+    returned. Packets flagged silent are passed as a view of a preallocated
+    zero buffer. The engine keeps `buffer_seconds` of audio, so drain at
+    least a few times within that.
+    """
+    def __init__(self, endpoint, buffer_seconds=0.2):
+        self.audio_client = activate_audio_client(endpoint)
+        self._client_iface = ctypes.cast(self.audio_client, interface("IAudioClient"))
+        client = self._client_iface.contents.lpVtbl.contents
+        wave_format = c_void_p()
+        hr = client.GetMixFormat(self._client_iface, byref(wave_format))
+        if hr < 0:
+            raise ctypes.WinError(hr)
+        try:
+            self.sample_rate, self.channels, self.dtype = sample_format(wave_format)
+            hr = client.Initialize(self._client_iface, AUDCLNT_SHAREMODE_SHARED, AUDCLNT_STREAMFLAGS_LOOPBACK,
+                                   int(buffer_seconds * REFTIMES_PER_SEC), 0, wave_format, None)
+            if hr < 0:
+                raise ctypes.WinError(hr)
+        finally:
+            _ole32().CoTaskMemFree(wave_format)
+        buffer_frames = c_uint()
+        hr = client.GetBufferSize(self._client_iface, byref(buffer_frames))
+        if hr < 0:
+            raise ctypes.WinError(hr)
+        self.buffer_frames = buffer_frames.value
+        self.capture_client = c_void_p()
+        hr = client.GetService(self._client_iface, byref(guid("IID_IAudioCaptureClient")),
+                               byref(self.capture_client))
+        if hr < 0:
+            raise ctypes.WinError(hr)
+
+        # Everything the drain loop touches is bound once here.
+        self._capture_iface = ctypes.cast(self.capture_client, interface("IAudioCaptureClient"))
+        capture = self._capture_iface.contents.lpVtbl.contents
+        self._get_buffer = capture.GetBuffer
+        self._release_buffer = capture.ReleaseBuffer
+        self._next_packet_size = capture.GetNextPacketSize
+        self._data = c_void_p()
+        self._frames = c_uint()
+        self._flags = c_ulong()
+        self._next = c_uint()
+        self._sample_pointer = POINTER(np.ctypeslib.as_ctypes_type(self.dtype))
+        self._zeros = np.zeros((self.buffer_frames, self.channels), self.dtype)
+        self.running = False
+        self.stats = {"packets": 0, "frames": 0, "silent": 0, "discontinuities": 0}
+
+    def start(self):
+        hr = self._client_iface.contents.lpVtbl.contents.Start(self._client_iface)
+        if hr < 0:
+            raise ctypes.WinError(hr)
+        self.running = True
+
+    def stop(self):
+        if self.running:
+            self._client_iface.contents.lpVtbl.contents.Stop(self._client_iface)
+            self.running = False
+
+    def __call__(self, handler):
+        iface = self._capture_iface
+        total = 0
+        while True:
+            hr = self._next_packet_size(iface, byref(self._next))
+            if hr < 0:
+                raise ctypes.WinError(hr)
+            if not self._next.value:
+                return total
+            hr = self._get_buffer(iface, byref(self._data), byref(self._frames), byref(self._flags), None, None)
+            if hr < 0:
+                raise ctypes.WinError(hr)
+            frames = self._frames.value
+            flags = self._flags.value
+            try:
+                if flags & AUDCLNT_BUFFERFLAGS_SILENT:
+                    self.stats["silent"] += 1
+                    view = self._zeros[:frames]
+                else:
+                    view = np.ctypeslib.as_array(ctypes.cast(self._data, self._sample_pointer),
+                                                 shape=(frames, self.channels))
+                if flags & AUDCLNT_BUFFERFLAGS_DATA_DISCONTINUITY:
+                    self.stats["discontinuities"] += 1
+                handler(view)
+            finally:
+                self._release_buffer(iface, frames)
+            self.stats["packets"] += 1
+            self.stats["frames"] += frames
+            total += frames
+
+    def close(self):
+        self.stop()
+        com_release(self.capture_client)
+        com_release(self.audio_client)
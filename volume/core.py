@@ -0,0 +1,549 @@
+"""
+COM plumbing shared by the other submodules: Core Audio constants, GUIDs,
+the declarative interface specs with their lazily built vtables, COM call
+tracing, the audit journal hook, event contexts and the base class for
+COM objects implemented in Python.
+"""
+import ctypes
+import functools
+import os
+import time
+from ctypes import POINTER, byref, c_void_p, c_ulong, c_int, c_wchar_p, c_uint
+
+# ============================================================
+# Constants and Definitions
+# ============================================================
+
+# COM and context constants
+COINIT_MULTITHREADED = 0x0
+CLSCTX_ALL = 23
+
+# Device selection enumerations (from mmdeviceapi.h)
+EDataFlow_eRender = 0   # Render devices (e.g., speakers)
+EDataFlow_eCapture = 1  # Capture devices (e.g., microphones)
+EDataFlow_eAll     = 2  # Both render and capture devices
+ERole_eConsole    = 0   # Console role
+ERole_eMultimedia = 1   # Multimedia role
+ERole_eCommunications = 2  # Communications role
+
+# Device state mask
+DEVICE_STATE_ACTIVE = 0x00000001
+
+# Endpoint change outcomes (change_coalescer), in the order later events may override earlier ones
+ADDED = "added"        # (re)appeared or became active: (re)load its metadata
+REMOVED = "removed"    # gone or no longer active: drop it
+CHANGED = "changed"    # still present, a property (e.g. the friendly name) changed
+
+# Audit journal op codes (record layout in audit_journal.py)
+OP_SET_VOLUME = 1
+OP_SET_MUTE = 2
+OP_STEP_UP = 3
+OP_STEP_DOWN = 4
+OP_SET_DEFAULT = 5
+OP_SET_VOLUME_DB = 6
+OP_SET_CHANNEL_VOLUME = 7
+UNKNOWN = float("nan")   # an old or new value that was not read
+
+@functools.lru_cache(maxsize=None)
+def _ole32():
+    """Loads ole32.dll on first use, so importing this module has no side effects."""
+    return ctypes.windll.ole32
+
+# -------------------------------
+# GUID and Helper Structures
+# -------------------------------
+class GUID(ctypes.Structure):
+    _fields_ = [
+        ("Data1", ctypes.c_uint32),  # c_ulong is 32 bits on Windows only
+        ("Data2", ctypes.c_ushort),
+        ("Data3", ctypes.c_ushort),
+        ("Data4", ctypes.c_ubyte * 8)
+    ]
+
+def create_guid(guid_str):
+    """
+    Converts a GUID string (e.g., "BCDE0395-E52F-467C-8E3D-C4579291692E")
+    into a GUID structure.
+    """
+    parts = guid_str.split('-')
+    data1 = int(parts[0], 16)
+    data2 = int(parts[1], 16)
+    data3 = int(parts[2], 16)
+    data4_bytes = bytes.fromhex(parts[3] + parts[4])
+    data4 = (ctypes.c_ubyte * 8).from_buffer_copy(data4_bytes)
+    return GUID(data1, data2, data3, data4)
+
+# GUIDs from header files, as the in-memory (little endian) GUID bytes.
+# For switching default device, we use the undocumented IPolicyConfig interface;
+# those GUIDs are commonly used in the community.
+GUID_BYTES = {
+    "CLSID_MMDeviceEnumerator":         b"\x95\x03\xde\xbc\x2f\xe5\x7c\x46\x8e\x3d\xc4\x57\x92\x91\x69\x2e",  # {BCDE0395-E52F-467C-8E3D-C4579291692E}
+    "CLSID_CPolicyConfigClient":        b"\x9c\xf9\x0a\x87\x1d\x17\x9e\x4f\xaf\x0d\xe6\x3d\xf4\x0c\x2b\xc9",  # {870AF99C-171D-4F9E-AF0D-E63DF40C2BC9}
+    "CLSID_CPolicyConfigVistaClient":   b"\xce\x35\x49\x29\x37\xf6\x7c\x4e\xa4\x1b\xab\x25\x54\x60\xb8\x62",  # {294935CE-F637-4E7C-A41B-AB255460B862}
+    "IID_IUnknown":                     b"\x00\x00\x00\x00\x00\x00\x00\x00\xc0\x00\x00\x00\x00\x00\x00\x46",  # {00000000-0000-0000-C000-000000000046}
+    "IID_IMMDeviceEnumerator":          b"\xd2\x64\x56\xa9\x14\x96\x35\x4f\xa7\x46\xde\x8d\xb6\x36\x17\xe6",  # {A95664D2-9614-4F35-A746-DE8DB63617E6}
+    "IID_IMMEndpoint":                  b"\x88\x97\xe0\x1b\x94\x68\x89\x40\x85\x86\x9a\x2a\x6c\x26\x5a\xc5",  # {1BE09788-6894-4089-8586-9A2A6C265AC5}
+    "IID_IMMNotificationClient":        b"\xc9\xee\x91\x79\x89\x7e\x85\x4d\x83\x90\x6c\x70\x3c\xec\x60\xc0",  # {7991EEC9-7E89-4D85-8390-6C703CEC60C0}
+    "IID_IAudioEndpointVolume":         b"\x82\x2c\xdf\x5c\x1e\x84\x46\x45\x97\x22\x0c\xf7\x40\x78\x22\x9a",  # {5CDF2C82-841E-4546-9722-0CF74078229A}
+    "IID_IAudioEndpointVolumeCallback": b"\xfa\x04\x78\x65\xad\xd6\x96\x44\x8a\x60\x35\x27\x52\xaf\x4f\x89",  # {657804FA-D6AD-4496-8A60-352752AF4F89}
+    "IID_IAudioMeterInformation":       b"\xf6\x16\x22\xc0\x67\x8c\x5b\x4b\x9d\x00\xd0\x08\xe7\x3e\x00\x64",  # {C02216F6-8C67-4B5B-9D00-D008E73E0064}
+    "IID_IPolicyConfig":                b"\x50\x9f\x67\xf8\x0a\x85\xcf\x41\x9c\x72\x43\x0f\x29\x02\x90\xc8",  # {F8679F50-850A-41CF-9C72-430F290290C8}
+    "IID_IPolicyConfigVista":           b"\x08\x91\x8b\x56\xbf\x44\xb4\x40\x90\x06\x86\xaf\xe5\xb5\xa6\x20",  # {568B9108-44BF-40B4-9006-86AFE5B5A620}
+    "IID_IAudioSessionManager2":        b"\xa0\x99\xaa\x77\xd6\x1b\x4f\x48\x8b\xc7\x2c\x65\x4c\x9a\x9b\x6f",  # {77AA99A0-1BD6-484F-8BC7-2C654C9A9B6F}
+    "IID_IAudioSessionControl2":        b"\x88\xff\xb7\xbf\x39\x72\xc9\x4f\x8f\xa2\x07\xc9\x50\xbe\x9c\x6d",  # {BFB7FF88-7239-4FC9-8FA2-07C950BE9C6D}
+    "IID_ISimpleAudioVolume":           b"\x98\x54\xce\x87\xd6\x68\xe5\x44\x92\x15\x6f\x75\x3a\x5d\x4f\x13",  # {87CE5498-68D6-44E5-9215-6F753A5D4F13}
+    "IID_IAudioSessionNotification":    b"\x0b\xd2\x1d\x64\x41\x4d\xcc\x49\xab\xa3\x17\x4b\x94\x77\xbb\x08",  # {641DD20B-4D41-49CC-ABA3-174B9477BB08}
+    "IID_IAudioSessionEvents":          b"\xcc\x8a\x91\x24\xb3\x64\xc1\x37\x8c\xa9\x74\xa6\x6e\x99\x57\xa8",  # {24918ACC-64B3-37C1-8CA9-74A66E9957A8}
+    "IID_IAudioClient":                 b"\x4c\xad\xb9\x1c\xfa\xdb\x32\x4c\xb1\x78\xc2\xf5\x68\xa7\x03\xb2",  # {1CB9AD4C-DBFA-4C32-B178-C2F568A703B2}
+    "IID_IAudioCaptureClient":          b"\x64\xbd\xad\xc8\x1e\xe7\xa0\x48\xa4\xde\x18\x5c\x39\x5c\xd3\x17",  # {C8ADBD64-E71E-48A0-A4DE-185C395CD317}
+    "KSDATAFORMAT_SUBTYPE_PCM":         b"\x01\x00\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71",  # {00000001-0000-0010-8000-00AA00389B71}
+    "KSDATAFORMAT_SUBTYPE_IEEE_FLOAT":  b"\x03\x00\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71",  # {00000003-0000-0010-8000-00AA00389B71}
+    "FMTID_Device_FriendlyName":        b"\x4e\x25\x5c\xa4\x1c\xdf\xfd\x4e\x80\x20\x67\xd1\x46\xa8\x50\xe0",  # {A45C254E-DF1C-4EFD-8020-67D146A850E0}
+}
+
+@functools.lru_cache(maxsize=None)
+def guid(name):
+    """Returns the GUID constant `name` (a GUID_BYTES key), created on first use."""
+    return GUID.from_buffer_copy(GUID_BYTES[name])
+
+# -------------------------------
+# PROPERTYKEY and PROPVARIANT (for friendly names)
+# -------------------------------
+class PROPERTYKEY(ctypes.Structure):
+    _fields_ = [
+        ("fmtid", GUID),
+        ("pid", ctypes.c_ulong)
+    ]
+
+# For our purposes we only handle VT_LPWSTR (VT value 31)
+VT_LPWSTR = 31
+
+class PROPVARIANT(ctypes.Structure):
+    _fields_ = [
+        ("vt", ctypes.c_ushort),
+        ("wReserved1", ctypes.c_ushort),
+        ("wReserved2", ctypes.c_ushort),
+        ("wReserved3", ctypes.c_ushort),
+        ("pwszVal", ctypes.c_wchar_p)
+    ]
+
+@functools.lru_cache(maxsize=None)
+def _friendly_name_key():
+    # PKEY_Device_FriendlyName: {A45C254E-DF1C-4EFD-8020-67D146A850E0}, 14
+    return PROPERTYKEY(guid("FMTID_Device_FriendlyName"), 14)
+
+class AUDIO_VOLUME_NOTIFICATION_DATA(ctypes.Structure):
+    _fields_ = [
+        ("guidEventContext", GUID),
+        ("bMuted", c_int),
+        ("fMasterVolume", ctypes.c_float),
+        ("nChannels", c_uint),
+        ("afChannelVolumes", ctypes.c_float * 1)  # really nChannels entries
+    ]
+
+# WAVEFORMATEX / WAVEFORMATEXTENSIBLE (mmreg.h), byte packed
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+class WAVEFORMATEX(ctypes.Structure):
+    _pack_ = 1
+    _fields_ = [
+        ("wFormatTag", ctypes.c_ushort),
+        ("nChannels", ctypes.c_ushort),
+        ("nSamplesPerSec", ctypes.c_uint32),
+        ("nAvgBytesPerSec", ctypes.c_uint32),
+        ("nBlockAlign", ctypes.c_ushort),
+        ("wBitsPerSample", ctypes.c_ushort),
+        ("cbSize", ctypes.c_ushort),
+    ]
+
+class WAVEFORMATEXTENSIBLE(ctypes.Structure):
+    _pack_ = 1
+    _fields_ = [
+        ("Format", WAVEFORMATEX),
+        ("wValidBitsPerSample", ctypes.c_ushort),
+        ("dwChannelMask", ctypes.c_uint32),
+        ("SubFormat", GUID),
+    ]
+
+# ============================================================
+# COM Interface Specs (Vtables Built on First Use)
+# ============================================================
+HRESULT = ctypes.c_long
+_PGUID = POINTER(GUID)
+_PPVOID = POINTER(c_void_p)
+_PFLOAT = POINTER(ctypes.c_float)
+_PUINT = POINTER(c_uint)
+
+# Interface name -> (base interface, methods in vtable slot order). A method is
+# (name, result type, argument types after the implicit `this` pointer).
+# vtable() and interface() turn an entry into WINFUNCTYPE prototypes and
+# Structures the first time it is used; nothing here touches COM.
+INTERFACE_SPECS = {
+    "IUnknown": (None, (
+        ("QueryInterface", HRESULT, (_PGUID, _PPVOID)),
+        ("AddRef", c_ulong, ()),
+        ("Release", c_ulong, ()),
+    )),
+    "IMMDeviceEnumerator": ("IUnknown", (
+        ("EnumAudioEndpoints", HRESULT, (c_int, c_ulong, _PPVOID)),
+        ("GetDefaultAudioEndpoint", HRESULT, (c_int, c_int, _PPVOID)),
+        ("GetDevice", HRESULT, (c_wchar_p, _PPVOID)),
+        ("RegisterEndpointNotificationCallback", HRESULT, (c_void_p,)),
+        ("UnregisterEndpointNotificationCallback", HRESULT, (c_void_p,)),
+    )),
+    "IMMDevice": ("IUnknown", (
+        ("Activate", HRESULT, (_PGUID, c_ulong, c_void_p, _PPVOID)),
+        ("OpenPropertyStore", HRESULT, (c_ulong, _PPVOID)),
+        ("GetId", HRESULT, (POINTER(c_wchar_p),)),
+        ("GetState", HRESULT, (POINTER(c_ulong),)),
+    )),
+    "IMMDeviceCollection": ("IUnknown", (
+        ("GetCount", HRESULT, (_PUINT,)),
+        ("Item", HRESULT, (c_uint, _PPVOID)),
+    )),
+    "IMMEndpoint": ("IUnknown", (
+        ("GetDataFlow", HRESULT, (POINTER(c_int),)),
+    )),
+    "IMMNotificationClient": ("IUnknown", (
+        ("OnDeviceStateChanged", HRESULT, (c_wchar_p, c_ulong)),
+        ("OnDeviceAdded", HRESULT, (c_wchar_p,)),
+        ("OnDeviceRemoved", HRESULT, (c_wchar_p,)),
+        ("OnDefaultDeviceChanged", HRESULT, (c_int, c_int, c_wchar_p)),
+        ("OnPropertyValueChanged", HRESULT, (c_wchar_p, PROPERTYKEY)),
+    )),
+    "IPropertyStore": ("IUnknown", (
+        ("GetCount", HRESULT, (_PUINT,)),
+        ("GetAt", HRESULT, (c_uint, POINTER(PROPERTYKEY))),
+        ("GetValue", HRESULT, (POINTER(PROPERTYKEY), POINTER(PROPVARIANT))),
+        # (SetValue and Commit omitted for brevity)
+    )),
+    "IAudioEndpointVolume": ("IUnknown", (
+        ("RegisterControlChangeNotify", HRESULT, (c_void_p,)),
+        ("UnregisterControlChangeNotify", HRESULT, (c_void_p,)),
+        ("GetChannelCount", HRESULT, (_PUINT,)),
+        ("SetMasterVolumeLevel", HRESULT, (ctypes.c_float, c_void_p)),
+        ("SetMasterVolumeLevelScalar", HRESULT, (ctypes.c_float, c_void_p)),
+        ("GetMasterVolumeLevel", HRESULT, (_PFLOAT,)),
+        ("GetMasterVolumeLevelScalar", HRESULT, (_PFLOAT,)),
+        ("SetChannelVolumeLevel", HRESULT, (c_uint, ctypes.c_float, c_void_p)),
+        ("SetChannelVolumeLevelScalar", HRESULT, (c_uint, ctypes.c_float, c_void_p)),
+        ("GetChannelVolumeLevel", HRESULT, (c_uint, _PFLOAT)),
+        ("GetChannelVolumeLevelScalar", HRESULT, (c_uint, _PFLOAT)),
+        ("SetMute", HRESULT, (c_int, c_void_p)),
+        ("GetMute", HRESULT, (POINTER(c_int),)),
+        ("GetVolumeStepInfo", HRESULT, (_PUINT, _PUINT)),
+        ("VolumeStepUp", HRESULT, (c_void_p,)),
+        ("VolumeStepDown", HRESULT, (c_void_p,)),
+        ("QueryHardwareSupport", HRESULT, (POINTER(c_ulong),)),
+        ("GetVolumeRange", HRESULT, (_PFLOAT, _PFLOAT, _PFLOAT)),
+    )),
+    "IAudioEndpointVolumeCallback": ("IUnknown", (
+        ("OnNotify", HRESULT, (POINTER(AUDIO_VOLUME_NOTIFICATION_DATA),)),
+    )),
+    "IAudioMeterInformation": ("IUnknown", (
+        ("GetPeakValue", HRESULT, (_PFLOAT,)),
+        ("GetMeteringChannelCount", HRESULT, (_PUINT,)),
+        ("GetChannelsPeakValues", HRESULT, (c_uint, _PFLOAT)),
+        ("QueryHardwareSupport", HRESULT, (POINTER(c_ulong),)),
+    )),
+    "IPolicyConfig": ("IUnknown", (
+        ("GetMixFormat", HRESULT, (c_wchar_p, _PPVOID)),
+        ("GetDeviceFormat", HRESULT, (c_wchar_p, c_int, _PPVOID)),
+        ("SetDeviceFormat", HRESULT, (c_wchar_p, c_void_p, c_void_p)),
+        ("GetProcessingPeriod", HRESULT, (c_wchar_p, c_int, POINTER(ctypes.c_longlong), POINTER(ctypes.c_longlong))),
+        ("SetProcessingPeriod", HRESULT, (c_wchar_p, POINTER(ctypes.c_longlong))),
+        ("GetShareMode", HRESULT, (c_wchar_p, _PPVOID)),
+        ("SetShareMode", HRESULT, (c_wchar_p, c_void_p)),
+        ("GetPropertyValue", HRESULT, (c_wchar_p, POINTER(PROPERTYKEY), POINTER(PROPVARIANT))),
+        ("SetPropertyValue", HRESULT, (c_wchar_p, POINTER(PROPERTYKEY), POINTER(PROPVARIANT))),
+        ("SetDefaultEndpoint", HRESULT, (c_wchar_p, c_int)),
+        ("SetEndpointVisibility", HRESULT, (c_wchar_p, c_int)),
+    )),
+    "IAudioClient": ("IUnknown", (
+        ("Initialize", HRESULT, (c_int, c_ulong, ctypes.c_longlong, ctypes.c_longlong, c_void_p, _PGUID)),
+        ("GetBufferSize", HRESULT, (_PUINT,)),
+        ("GetStreamLatency", HRESULT, (POINTER(ctypes.c_longlong),)),
+        ("GetCurrentPadding", HRESULT, (_PUINT,)),
+        ("IsFormatSupported", HRESULT, (c_int, c_void_p, _PPVOID)),
+        ("GetMixFormat", HRESULT, (_PPVOID,)),
+        ("GetDevicePeriod", HRESULT, (POINTER(ctypes.c_longlong), POINTER(ctypes.c_longlong))),
+        ("Start", HRESULT, ()),
+        ("Stop", HRESULT, ()),
+        ("Reset", HRESULT, ()),
+        ("SetEventHandle", HRESULT, (c_void_p,)),
+        ("GetService", HRESULT, (_PGUID, _PPVOID)),
+    )),
+    "IAudioCaptureClient": ("IUnknown", (
+        ("GetBuffer", HRESULT, (_PPVOID, _PUINT, POINTER(c_ulong), POINTER(ctypes.c_ulonglong),
+                                POINTER(ctypes.c_ulonglong))),
+        ("ReleaseBuffer", HRESULT, (c_uint,)),
+        ("GetNextPacketSize", HRESULT, (_PUINT,)),
+    )),
+    "IAudioSessionManager": ("IUnknown", (
+        ("GetAudioSessionControl", HRESULT, (_PGUID, c_ulong, _PPVOID)),
+        ("GetSimpleAudioVolume", HRESULT, (_PGUID, c_ulong, _PPVOID)),
+    )),
+    "IAudioSessionManager2": ("IAudioSessionManager", (
+        ("GetSessionEnumerator", HRESULT, (_PPVOID,)),
+        ("RegisterSessionNotification", HRESULT, (c_void_p,)),
+        ("UnregisterSessionNotification", HRESULT, (c_void_p,)),
+        ("RegisterDuckNotification", HRESULT, (c_wchar_p, c_void_p)),
+        ("UnregisterDuckNotification", HRESULT, (c_void_p,)),
+    )),
+    "IAudioSessionEnumerator": ("IUnknown", (
+        ("GetCount", HRESULT, (POINTER(c_int),)),
+        ("GetSession", HRESULT, (c_int, _PPVOID)),
+    )),
+    "IAudioSessionControl": ("IUnknown", (
+        ("GetState", HRESULT, (POINTER(c_int),)),
+        ("GetDisplayName", HRESULT, (POINTER(c_wchar_p),)),
+        ("SetDisplayName", HRESULT, (c_wchar_p, c_void_p)),
+        ("GetIconPath", HRESULT, (POINTER(c_wchar_p),)),
+        ("SetIconPath", HRESULT, (c_wchar_p, c_void_p)),
+        ("GetGroupingParam", HRESULT, (_PGUID,)),
+        ("SetGroupingParam", HRESULT, (_PGUID, c_void_p)),
+        ("RegisterAudioSessionNotification", HRESULT, (c_void_p,)),
+        ("UnregisterAudioSessionNotification", HRESULT, (c_void_p,)),
+    )),
+    "IAudioSessionControl2": ("IAudioSessionControl", (
+        ("GetSessionIdentifier", HRESULT, (POINTER(c_wchar_p),)),
+        ("GetSessionInstanceIdentifier", HRESULT, (POINTER(c_wchar_p),)),
+        ("GetProcessId", HRESULT, (POINTER(c_ulong),)),
+        ("IsSystemSoundsSession", HRESULT, ()),
+        ("SetDuckingPreference", HRESULT, (c_int,)),
+    )),
+    "ISimpleAudioVolume": ("IUnknown", (
+        ("SetMasterVolume", HRESULT, (ctypes.c_float, c_void_p)),
+        ("GetMasterVolume", HRESULT, (_PFLOAT,)),
+        ("SetMute", HRESULT, (c_int, c_void_p)),
+        ("GetMute", HRESULT, (POINTER(c_int),)),
+    )),
+    "IAudioSessionNotification": ("IUnknown", (
+        ("OnSessionCreated", HRESULT, (c_void_p,)),
+    )),
+    "IAudioSessionEvents": ("IUnknown", (
+        ("OnDisplayNameChanged", HRESULT, (c_wchar_p, c_void_p)),
+        ("OnIconPathChanged", HRESULT, (c_wchar_p, c_void_p)),
+        ("OnSimpleVolumeChanged", HRESULT, (ctypes.c_float, c_int, c_void_p)),
+        ("OnChannelVolumeChanged", HRESULT, (c_ulong, _PFLOAT, c_ulong, c_void_p)),
+        ("OnGroupingParamChanged", HRESULT, (c_void_p, c_void_p)),
+        ("OnStateChanged", HRESULT, (c_int,)),
+        ("OnSessionDisconnected", HRESULT, (c_int,)),
+    )),
+}
+
+@functools.lru_cache(maxsize=None)
+def vtable(name):
+    """Returns the vtable Structure of an INTERFACE_SPECS entry, including its base's slots."""
+    base, methods = INTERFACE_SPECS[name]
+    fields = list(vtable(base)._fields_) if base else []
+    fields += [(method, ctypes.WINFUNCTYPE(restype, c_void_p, *argtypes))
+               for method, restype, argtypes in methods]
+    return type(name + "Vtbl", (ctypes.Structure,), {"_fields_": fields})
+
+@functools.lru_cache(maxsize=None)
+def interface(name):
+    """Returns POINTER(<name>_Interface), the type interface pointers are cast to for calls."""
+    struct = type(name + "_Interface", (ctypes.Structure,), {"_fields_": [("lpVtbl", POINTER(vtable(name)))]})
+    return POINTER(struct)
+
+def __getattr__(name):
+    # The former eager module attributes (IID_*/CLSID_* GUIDs, *Vtbl / *VTable /
+    # *_Interface types, PKEY_Device_FriendlyName, ole32) resolve on first access.
+    if name in GUID_BYTES:
+        value = guid(name)
+    elif name == "PKEY_Device_FriendlyName":
+        value = _friendly_name_key()
+    elif name == "ole32":
+        value = _ole32()
+    elif name.endswith("_Interface") and name[:-10] in INTERFACE_SPECS:
+        value = interface(name[:-10])._type_
+    elif name.endswith("Vtbl") and name[:-4] in INTERFACE_SPECS:
+        value = vtable(name[:-4])
+    elif name.endswith("VTable") and name[:-6] in INTERFACE_SPECS:
+        value = vtable(name[:-6])
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+# ============================================================
+# COM Call Tracing (see com_trace.py)
+# ============================================================
+_com_tracer = None
+
+def set_com_tracer(tracer):
+    """
+    Installs a tracer (e.g. com_trace.TraceRecorder) that receives every
+    traced helper call; pass None to stop tracing.
+    """
+    global _com_tracer
+    _com_tracer = tracer
+
+def traced(interface, method):
+    """Decorator recording the helper as interface.method when a tracer is installed."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _com_tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            hresult = 0
+            result = None
+            start = time.perf_counter_ns()
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except OSError as e:
+                hresult = e.winerror if getattr(e, "winerror", None) else -1
+                raise
+            finally:
+                latency = time.perf_counter_ns() - start
+                tracer.record(interface, method, args + tuple(kwargs.values()), result,
+                              hresult, start, latency)
+        return wrapper
+    return decorate
+
+# ============================================================
+# Audit Journal (see audit_journal.py)
+# ============================================================
+_audit_journal = None
+
+def set_audit_journal(journal):
+    """
+    Installs an audit_journal.AuditJournal that receives one record per
+    successful volume, mute or default-device change; pass None to stop.
+    """
+    global _audit_journal
+    _audit_journal = journal
+
+def audit_change(op, device_id, new=UNKNOWN, context=None):
+    """Records a successful change in the installed audit journal, if any."""
+    journal = _audit_journal
+    if journal is not None:
+        journal.record(op, device_id, new, actor=(context or PROCESS_EVENT_CONTEXT).owner)
+
+# ============================================================
+# COM Initialization
+# ============================================================
+def init_com():
+    """Initialize the COM library."""
+    hr = _ole32().CoInitializeEx(None, COINIT_MULTITHREADED)
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    print("COM initialized successfully.")
+
+# ============================================================
+# Event Contexts (pguidEventContext Stamping of Our Own Writes)
+# ============================================================
+class EventContext:
+    """
+    A GUID passed as pguidEventContext on every write made by one controller
+    (the GUI, the control server, a volume group, ...). Notifications carry
+    it back, so a controller can drop its own echoes and tell other known
+    controllers' changes apart from external ones.
+    """
+    __slots__ = ("owner", "guid", "key")
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.guid = GUID.from_buffer_copy(os.urandom(16))  # random GUID; only uniqueness matters
+        self.key = bytes(self.guid)
+
+    def __repr__(self):
+        return f"EventContext({self.owner!r})"
+
+    @property
+    def address(self):
+        return ctypes.addressof(self.guid)
+
+# GUID bytes -> EventContext for every controller in this process
+_event_contexts = {}
+
+def new_event_context(owner):
+    """Creates and registers an EventContext for a controller instance."""
+    context = EventContext(owner)
+    _event_contexts[context.key] = context
+    return context
+
+def event_context_owner(guid_bytes):
+    """Returns the owner name of a registered context, or None for external changes."""
+    context = _event_contexts.get(guid_bytes)
+    return context.owner if context is not None else None
+
+# Used by the write helpers when the caller does not pass its own context.
+PROCESS_EVENT_CONTEXT = new_event_context("volume")
+
+def _context_address(context):
+    return (context or PROCESS_EVENT_CONTEXT).address
+
+# ============================================================
+# COM Callback Objects (Python Implementations of COM Interfaces)
+# ============================================================
+E_NOINTERFACE = -2147467262  # 0x80004002
+
+class _ComObject(ctypes.Structure):
+    _fields_ = [("lpVtbl", c_void_p)]
+
+class ComCallbackObject:
+    """
+    Base class for COM interfaces implemented in Python, such as notification
+    sinks. Subclasses set _interface_ (an INTERFACE_SPECS name whose IID is
+    GUID_BYTES["IID_" + name]) and define a method named after every
+    non-IUnknown vtable slot taking (this, *args). Pass `pointer` to COM. The object keeps
+    itself alive until COM and the owner (via close()) have released it.
+    """
+    _interface_ = None
+    _live = set()
+
+    def __init__(self):
+        self._refcount = 1
+        own = {"QueryInterface": self._query_interface, "AddRef": self._add_ref, "Release": self._release}
+        vtbl_type = vtable(self._interface_)
+        self._vtbl = vtbl_type(*[
+            prototype(own[name] if name in own else getattr(self, name))
+            for name, prototype in vtbl_type._fields_
+        ])
+        self._object = _ComObject(ctypes.cast(ctypes.pointer(self._vtbl), c_void_p))
+        self.pointer = ctypes.cast(ctypes.pointer(self._object), c_void_p)
+        self._accepted = {bytes(guid("IID_IUnknown")), bytes(guid("IID_" + self._interface_))}
+        ComCallbackObject._live.add(self)
+
+    def _query_interface(self, this, riid, ppv):
+        if bytes(riid.contents) in self._accepted:
+            ppv[0] = self.pointer.value
+            self._add_ref(this)
+            return 0
+        ppv[0] = None
+        return E_NOINTERFACE
+
+    def _add_ref(self, this):
+        self._refcount += 1
+        return self._refcount
+
+    def _release(self, this):
+        self._refcount -= 1
+        if self._refcount <= 0:
+            ComCallbackObject._live.discard(self)
+        return max(self._refcount, 0)
+
+    def close(self):
+        """Drops the owner's reference."""
+        self._release(None)
+
+def com_release(pointer):
+    """Calls IUnknown::Release on any interface pointer."""
+    if pointer:
+        iface = ctypes.cast(pointer, interface("IUnknown"))
+        iface.contents.lpVtbl.contents.Release(iface)
+
+def query_interface(pointer, iid):
+    """Calls IUnknown::QueryInterface and returns the new interface pointer."""
+    iface = ctypes.cast(pointer, interface("IUnknown"))
+    result = c_void_p()
+    hr = iface.contents.lpVtbl.contents.QueryInterface(iface, byref(iid), byref(result))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return result
@@ -0,0 +1,449 @@
+"""
+Endpoint discovery: the device enumerator, default endpoints, device IDs,
+data flows and friendly names, interface activation, the shared
+EndpointCache and IMMNotificationClient hot-plug notifications.
+"""
+import ctypes
+from ctypes import byref, c_void_p, c_ulong, c_int, c_wchar_p, c_uint
+
+from .core import (CHANGED, CLSCTX_ALL, DEVICE_STATE_ACTIVE, REMOVED, EDataFlow_eAll, EDataFlow_eCapture,
+                   EDataFlow_eRender, ERole_eConsole, PROPVARIANT, ComCallbackObject, _friendly_name_key, _ole32,
+                   com_release, guid, interface, traced)
+
+_volume_devices = {}   # IAudioEndpointVolume address -> endpoint ID, filled by EndpointCache
+
+# ============================================================
+# IMMDeviceEnumerator Creation
+# ============================================================
+def create_device_enumerator():
+    """Creates an instance of MMDeviceEnumerator and returns its pointer."""
+    pEnumerator = c_void_p()
+    hr = _ole32().CoCreateInstance(
+        byref(guid("CLSID_MMDeviceEnumerator")),
+        None,
+        CLSCTX_ALL,
+        byref(guid("IID_IMMDeviceEnumerator")),
+        byref(pEnumerator)
+    )
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    print("IMMDeviceEnumerator created successfully.")
+    return pEnumerator
+
+# ============================================================
+# IMMDeviceEnumerator Interface (Default Endpoint)
+# ============================================================
+@traced("IMMDeviceEnumerator", "GetDefaultAudioEndpoint")
+def get_default_endpoint(enumerator, data_flow=EDataFlow_eRender, role=ERole_eConsole):
+    """
+    Uses the IMMDeviceEnumerator interface to obtain the default audio endpoint
+    for the given data flow (render by default) and role.
+    """
+    enumerator_iface = ctypes.cast(enumerator, interface("IMMDeviceEnumerator"))
+    default_endpoint = c_void_p()
+    hr = enumerator_iface.contents.lpVtbl.contents.GetDefaultAudioEndpoint(
+        enumerator_iface,
+        data_flow,
+        role,
+        byref(default_endpoint)
+    )
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    print("Default audio endpoint obtained:", default_endpoint)
+    return default_endpoint
+
+# ============================================================
+# IMMDevice Interface (for Activate, OpenPropertyStore, and GetId)
+# ============================================================
+@traced("IMMDevice", "Activate")
+def activate_audio_endpoint_volume(endpoint):
+    """
+    Activates the IAudioEndpointVolume interface for the given endpoint.
+    """
+    endpoint_iface = ctypes.cast(endpoint, interface("IMMDevice"))
+    audio_endpoint_volume = c_void_p()
+    hr = endpoint_iface.contents.lpVtbl.contents.Activate(
+        endpoint_iface,
+        byref(guid("IID_IAudioEndpointVolume")),
+        CLSCTX_ALL,
+        None,
+        byref(audio_endpoint_volume)
+    )
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    print("IAudioEndpointVolume activated successfully:", audio_endpoint_volume)
+    return audio_endpoint_volume
+
+@traced("IMMDevice", "GetId")
+def get_device_id(device):
+    """
+    Uses the IMMDevice interface to get the device's ID (a string).
+    """
+    device_iface = ctypes.cast(device, interface("IMMDevice"))
+    pDeviceId = c_wchar_p()
+    hr = device_iface.contents.lpVtbl.contents.GetId(device_iface, byref(pDeviceId))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return pDeviceId.value
+
+@traced("IMMDevice", "GetState")
+def get_device_state(device):
+    """
+    Returns the DEVICE_STATE_* flags of the device.
+    """
+    device_iface = ctypes.cast(device, interface("IMMDevice"))
+    state = c_ulong()
+    hr = device_iface.contents.lpVtbl.contents.GetState(device_iface, byref(state))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return state.value
+
+@traced("IMMDeviceEnumerator", "GetDevice")
+def get_device(enumerator, device_id):
+    """
+    Looks up a single endpoint by its ID without enumerating.
+    """
+    enumerator_iface = ctypes.cast(enumerator, interface("IMMDeviceEnumerator"))
+    pDevice = c_void_p()
+    hr = enumerator_iface.contents.lpVtbl.contents.GetDevice(enumerator_iface, device_id, byref(pDevice))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return pDevice
+
+@traced("IMMDevice", "Activate")
+def activate_audio_meter_information(endpoint):
+    """
+    Activates the IAudioMeterInformation interface for the given endpoint.
+    """
+    endpoint_iface = ctypes.cast(endpoint, interface("IMMDevice"))
+    audio_meter = c_void_p()
+    hr = endpoint_iface.contents.lpVtbl.contents.Activate(
+        endpoint_iface,
+        byref(guid("IID_IAudioMeterInformation")),
+        CLSCTX_ALL,
+        None,
+        byref(audio_meter)
+    )
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    print("IAudioMeterInformation activated successfully:", audio_meter)
+    return audio_meter
+
+# ============================================================
+# IMMEndpoint Interface (for the Data Flow of a Device)
+# ============================================================
+@traced("IMMEndpoint", "GetDataFlow")
+def get_device_data_flow(device):
+    """
+    Queries the device for IMMEndpoint and returns its data flow
+    (EDataFlow_eRender or EDataFlow_eCapture).
+    """
+    device_iface = ctypes.cast(device, interface("IMMDevice"))
+    pEndpoint = c_void_p()
+    hr = device_iface.contents.lpVtbl.contents.QueryInterface(device_iface, byref(guid("IID_IMMEndpoint")), byref(pEndpoint))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    endpoint_iface = ctypes.cast(pEndpoint, interface("IMMEndpoint"))
+    data_flow = c_int()
+    hr = endpoint_iface.contents.lpVtbl.contents.GetDataFlow(endpoint_iface, byref(data_flow))
+    endpoint_iface.contents.lpVtbl.contents.Release(endpoint_iface)
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return data_flow.value
+
+# ============================================================
+# IPropertyStore Interface (for Friendly Names)
+# ============================================================
+@traced("IPropertyStore", "GetValue")
+def get_device_friendly_name(device):
+    """
+    Opens the property store for the device and retrieves the friendly name.
+    """
+    device_iface = ctypes.cast(device, interface("IMMDevice"))
+    pPropertyStore = c_void_p()
+    hr = device_iface.contents.lpVtbl.contents.OpenPropertyStore(device_iface, 0, byref(pPropertyStore))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    prop_store = ctypes.cast(pPropertyStore, interface("IPropertyStore"))
+    try:
+        propvar = PROPVARIANT()
+        hr = prop_store.contents.lpVtbl.contents.GetValue(prop_store, byref(_friendly_name_key()), byref(propvar))
+        if hr < 0:
+            raise ctypes.WinError(hr)
+        return propvar.pwszVal
+    finally:
+        com_release(pPropertyStore)
+
+# ============================================================
+# IMMDeviceCollection Interface (for Enumerating Devices)
+# ============================================================
+def iter_endpoint_collection(enumerator, data_flow=EDataFlow_eRender, state_mask=DEVICE_STATE_ACTIVE):
+    """
+    Runs a single EnumAudioEndpoints pass and yields the device pointers
+    of the resulting IMMDeviceCollection. The caller owns (and releases)
+    each device; the collection is released when iteration ends.
+    """
+    enumerator_iface = ctypes.cast(enumerator, interface("IMMDeviceEnumerator"))
+    pCollection = c_void_p()
+    hr = enumerator_iface.contents.lpVtbl.contents.EnumAudioEndpoints(
+        enumerator_iface,
+        data_flow,
+        state_mask,
+        byref(pCollection)
+    )
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    collection_iface = ctypes.cast(pCollection, interface("IMMDeviceCollection"))
+    try:
+        count = c_uint()
+        hr = collection_iface.contents.lpVtbl.contents.GetCount(collection_iface, byref(count))
+        if hr < 0:
+            raise ctypes.WinError(hr)
+        for i in range(count.value):
+            pDevice = c_void_p()
+            hr = collection_iface.contents.lpVtbl.contents.Item(collection_iface, i, byref(pDevice))
+            if hr < 0:
+                continue
+            yield pDevice
+    finally:
+        com_release(pCollection)
+
+@traced("IMMDeviceEnumerator", "EnumAudioEndpoints")
+def enumerate_audio_endpoints(enumerator, data_flow=EDataFlow_eRender):
+    """
+    Enumerates all active devices of the given data flow (render by default)
+    and returns a list of tuples:
+    (device pointer, friendly name)
+    """
+    devices = []
+    for pDevice in iter_endpoint_collection(enumerator, data_flow):
+        try:
+            name = get_device_friendly_name(pDevice)
+        except Exception as e:
+            name = "Unknown Device"
+        devices.append((pDevice, name))
+    return devices
+
+# ============================================================
+# Shared Endpoint Metadata Cache (Render and Capture)
+# ============================================================
+class EndpointInfo:
+    """Metadata for one active endpoint, as stored in the EndpointCache."""
+    __slots__ = ("device", "device_id", "name", "data_flow", "audio_volume", "audio_meter")
+
+    def __init__(self, device, device_id, name, data_flow):
+        self.device = device
+        self.device_id = device_id
+        self.name = name
+        self.data_flow = data_flow
+        # IAudioEndpointVolume / IAudioMeterInformation pointers, activated on first use.
+        self.audio_volume = None
+        self.audio_meter = None
+
+    def __repr__(self):
+        return f"EndpointInfo({self.device_id!r}, {self.name!r}, data_flow={self.data_flow})"
+
+class EndpointCache:
+    """
+    Enumerates render and capture endpoints in a single EnumAudioEndpoints(eAll)
+    pass, splits them by their IMMEndpoint data flow and keeps the results,
+    together with any activated IAudioEndpointVolume interfaces, keyed by
+    device ID. Volume and mute control for either flow then goes through
+    audio_volume() without another enumeration or activation.
+
+    When endpoint notifications are registered, set track_defaults so default
+    endpoint lookups are remembered, and feed the debounced notification
+    batches to apply_changes() instead of calling refresh().
+
+    The cache owns one IMMDevice reference per entry and releases it when
+    the entry is replaced or dropped. Activated interfaces of a dropped
+    entry are left alone: callbacks registered on them are unregistered
+    through them after the batch is applied.
+    """
+    def __init__(self, enumerator):
+        self.enumerator = enumerator
+        self.endpoints = {}
+        self.by_flow = {EDataFlow_eRender: [], EDataFlow_eCapture: []}
+        self.track_defaults = False
+        self.defaults = {}
+        self.refresh()
+
+    def _load(self, pDevice, device_id, data_flow):
+        try:
+            name = get_device_friendly_name(pDevice)
+        except Exception as e:
+            name = "Unknown Device"
+        return EndpointInfo(pDevice, device_id, name, data_flow)
+
+    def _index_flows(self):
+        by_flow = {EDataFlow_eRender: [], EDataFlow_eCapture: []}
+        for info in self.endpoints.values():
+            by_flow.setdefault(info.data_flow, []).append(info)
+        self.by_flow = by_flow
+
+    def refresh(self):
+        """Re-enumerates all active endpoints, keeping already activated volume interfaces."""
+        previous = self.endpoints
+        endpoints = {}
+        for pDevice in iter_endpoint_collection(self.enumerator, EDataFlow_eAll):
+            try:
+                device_id = get_device_id(pDevice)
+                data_flow = get_device_data_flow(pDevice)
+            except OSError as e:
+                print("Skipping endpoint that could not be queried:", e)
+                com_release(pDevice)
+                continue
+            info = self._load(pDevice, device_id, data_flow)
+            old = previous.get(device_id)
+            if old is not None and (old.audio_volume is not None or old.audio_meter is not None):
+                com_release(pDevice)
+                info.device = old.device
+                info.audio_volume = old.audio_volume
+                info.audio_meter = old.audio_meter
+            endpoints[device_id] = info
+        for device_id, old in previous.items():
+            info = endpoints.get(device_id)
+            if info is None or info.device is not old.device:
+                com_release(old.device)
+        self.endpoints = endpoints
+        self.defaults.clear()
+        self._index_flows()
+        print(f"Endpoint cache refreshed: {len(self.by_flow[EDataFlow_eRender])} render, "
+              f"{len(self.by_flow[EDataFlow_eCapture])} capture.")
+
+    def apply_changes(self, changes):
+        """
+        Applies one change_coalescer.EndpointChanges batch: each affected
+        endpoint is looked up once with GetDevice, removed ones are dropped,
+        and remembered defaults are replaced. Returns the set of device IDs
+        whose entries changed.
+        """
+        touched = set()
+        for device_id, outcome in changes.devices.items():
+            touched.add(device_id)
+            if outcome == REMOVED:
+                self._drop(device_id)
+                continue
+            pDevice = None
+            try:
+                pDevice = get_device(self.enumerator, device_id)
+                active = get_device_state(pDevice) & DEVICE_STATE_ACTIVE
+                data_flow = get_device_data_flow(pDevice) if active else None
+            except OSError as e:
+                print("Dropping endpoint that could not be queried:", e)
+                active = False
+            if not active:
+                com_release(pDevice)
+                self._drop(device_id)
+                continue
+            info = self._load(pDevice, device_id, data_flow)
+            old = self.endpoints.get(device_id)
+            if outcome == CHANGED and old is not None:
+                # Same device instance: its activated interfaces remain valid.
+                com_release(pDevice)
+                info.device = old.device
+                info.audio_volume = old.audio_volume
+                info.audio_meter = old.audio_meter
+            elif old is not None:
+                com_release(old.device)
+            self.endpoints[device_id] = info
+        for (data_flow, role), device_id in changes.defaults.items():
+            if self.track_defaults:
+                self.defaults[(data_flow, role)] = device_id
+        self._index_flows()
+        return touched
+
+    def _drop(self, device_id):
+        info = self.endpoints.pop(device_id, None)
+        if info is not None:
+            com_release(info.device)
+
+    def devices(self, data_flow=EDataFlow_eRender):
+        """Returns the cached EndpointInfo list for one data flow (or all for eAll)."""
+        if data_flow == EDataFlow_eAll:
+            return list(self.endpoints.values())
+        return list(self.by_flow.get(data_flow, ()))
+
+    def get(self, device_id):
+        return self.endpoints.get(device_id)
+
+    def audio_volume(self, device_id):
+        """
+        Returns the IAudioEndpointVolume interface for the device, activating it
+        only the first time it is requested.
+        """
+        info = self.endpoints[device_id]
+        if info.audio_volume is None:
+            info.audio_volume = activate_audio_endpoint_volume(info.device)
+            _volume_devices[info.audio_volume.value] = device_id
+        return info.audio_volume
+
+    def audio_meter(self, device_id):
+        """Returns the device's IAudioMeterInformation interface, activating it on first use."""
+        info = self.endpoints[device_id]
+        if info.audio_meter is None:
+            info.audio_meter = activate_audio_meter_information(info.device)
+        return info.audio_meter
+
+    def default_device_id(self, data_flow=EDataFlow_eRender, role=ERole_eConsole):
+        """Returns the ID of the default endpoint for the flow/role, or None if there is none."""
+        key = (data_flow, role)
+        if key in self.defaults:
+            return self.defaults[key]
+        try:
+            device_id = get_device_id(get_default_endpoint(self.enumerator, data_flow, role))
+        except OSError:
+            device_id = None
+        if self.track_defaults:
+            self.defaults[key] = device_id
+        return device_id
+
+# ============================================================
+# IMMNotificationClient (Endpoint Add/Remove/State/Default Changes)
+# ============================================================
+class EndpointNotificationClient(ComCallbackObject):
+    """
+    Forwards IMMNotificationClient callbacks to `submit(kind, device_id, ...)`,
+    normally EndpointChangeCoalescer.submit. Callbacks arrive on COM threads
+    and must return quickly, so nothing else happens here.
+    """
+    _interface_ = "IMMNotificationClient"
+
+    def __init__(self, submit):
+        super().__init__()
+        self.submit = submit
+
+    def OnDeviceStateChanged(self, this, device_id, state):
+        self.submit("state", device_id, state=state)
+        return 0
+
+    def OnDeviceAdded(self, this, device_id):
+        self.submit("added", device_id)
+        return 0
+
+    def OnDeviceRemoved(self, this, device_id):
+        self.submit("removed", device_id)
+        return 0
+
+    def OnDefaultDeviceChanged(self, this, data_flow, role, device_id):
+        self.submit("default", device_id, flow=data_flow, role=role)
+        return 0
+
+    def OnPropertyValueChanged(self, this, device_id, key):
+        self.submit("property", device_id)
+        return 0
+
+def register_endpoint_notification(enumerator, client):
+    enumerator_iface = ctypes.cast(enumerator, interface("IMMDeviceEnumerator"))
+    hr = enumerator_iface.contents.lpVtbl.contents.RegisterEndpointNotificationCallback(
+        enumerator_iface, client.pointer)
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    print("Endpoint notifications registered.")
+
+def unregister_endpoint_notification(enumerator, client):
+    enumerator_iface = ctypes.cast(enumerator, interface("IMMDeviceEnumerator"))
+    hr = enumerator_iface.contents.lpVtbl.contents.UnregisterEndpointNotificationCallback(
+        enumerator_iface, client.pointer)
+    if hr < 0:
+        raise ctypes.WinError(hr)
@@ -0,0 +1,658 @@
+"""
+Tkinter front end: device selection, volume and mute control, the master
+slider, a VU bar, per-application volume and default switching.
+
+The only submodule that imports Tk; `python -m volume` starts it.
+"""
+import functools
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from com_guard import ComTimeoutError
+from history import DEFAULT, LEVEL, MUTE, VolumeHistory
+from meter import PeakMeter
+from single_instance import CONTEXT as CLI_CONTEXT, InstanceEndpoint, instance_running
+from .core import (EDataFlow_eCapture, EDataFlow_eRender, init_com, new_event_context,
+                   set_audit_journal, set_com_tracer)
+from .endpoints import create_device_enumerator, get_default_endpoint, get_device_id
+from .policy import switch_default_device
+from .volume import (AudioSessionTracker, get_volume_range, make_peak_sampler, set_master_volume,
+                     set_master_volume_db, set_mute, volume_step_down, volume_step_up)
+
+# ============================================================
+# Tkinter GUI with Device Selection, Volume Control, Slider, and Default Switch
+# ============================================================
+def ui_action(method):
+    """Wraps a GUI handler so a COM timeout ends up in the status line instead of raising."""
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        try:
+            return method(self, *args)
+        except ComTimeoutError as e:
+            print("COM call timed out:", e)
+            self.request_redraw()
+    return wrapper
+
+class VolumeControlApp(tk.Tk):
+    FLOW_LABELS = (("Playback", EDataFlow_eRender), ("Recording", EDataFlow_eCapture))
+    FLOWS = {"render": EDataFlow_eRender, "capture": EDataFlow_eCapture}
+    METER_RATE_HZ = 30      # peak sampling rate (background thread)
+    TICK_MS = 40            # Tk-thread redraw interval (VU bar, session list)
+    VU_WIDTH = 200
+
+    def __init__(self, backend, default_endpoint):
+        super().__init__()
+        self.title("Volume Control Demo with Device Switching")
+        self.backend = backend
+
+        # The backend's endpoint cache, shared with the control server and the other features
+        self.cache = backend.cache
+        self.data_flow = EDataFlow_eRender
+        self.devices = self.cache.devices(self.data_flow)
+        if not self.devices:
+            raise Exception("No audio devices found.")
+
+        # Determine default selection index
+        self.default_index = self.find_device_index(get_device_id(default_endpoint))
+
+        # Playback / Recording selector
+        self.flow_var = tk.IntVar(value=self.data_flow)
+        flow_frame = ttk.Frame(self)
+        for label, data_flow in self.FLOW_LABELS:
+            ttk.Radiobutton(flow_frame, text=label, value=data_flow, variable=self.flow_var,
+                            command=self.on_flow_selected).pack(side=tk.LEFT, padx=5)
+        flow_frame.pack(pady=5)
+
+        # Device selection dropdown
+        self.device_var = tk.StringVar()
+        self.device_combo = ttk.Combobox(self, textvariable=self.device_var, state="readonly",
+                                         values=[info.name for info in self.devices])
+        self.device_combo.current(self.default_index)
+        self.device_combo.bind("<<ComboboxSelected>>", self.on_device_selected)
+        self.device_combo.pack(pady=5)
+
+        # Button to set selected device as default
+        self.btn_set_default = ttk.Button(self, text="Set as Default", command=self.set_as_default)
+        self.btn_set_default.pack(pady=5)
+
+        # Our writes carry this context so our own volume notifications can be dropped
+        self.context = new_event_context("gui")
+        self.external_change = None
+
+        # COM calls for the selected device run under a deadline on the backend's per-device workers
+        self.guard = backend.guard
+        self.guard.on_state_change = self.on_quarantine_changed
+        self.quarantine_dirty = False
+
+        # Level, mute and default lookups are served from the backend's state cache
+        self.state = backend.state
+
+        # Hot-plug and volume changes arrive as backend events; endpoint events wait for the Tk tick
+        self.pending_devices = {}    # endpoint ID -> last "device" change
+        self.pending_defaults = {}   # data flow -> new default endpoint ID
+        self.changes_lock = threading.Lock()
+        self.device_id = None
+        backend.add_listener(self.on_backend_event)
+        try:
+            backend.watch_endpoints()
+        except OSError as e:
+            print("Endpoint notifications unavailable:", e)
+
+        # Slider positions map to endpoint dB through per-device calibration tables
+        self.calibration = backend.calibration
+        self.table = None
+
+        # Activate volume control for the initially selected device
+        self.device_id = self.devices[self.default_index].device_id
+        self.audio_volume = self.com(self.cache.audio_volume, self.device_id)
+        self.watch_volume()
+        self.load_calibration()
+
+        # Cached view model of the selected device; redraw() paints from it
+        self.level = 0.0
+        self.muted = False
+        self.position = 0
+        self.position_level = None   # the level `position` was derived from
+        self.model_stale = True
+        self.redraw_pending = False
+        self.status_text = None
+
+        # Undo/redo of level, mute and default-device changes (Ctrl+Z / Ctrl+Y)
+        self.history = VolumeHistory()
+        self.known_defaults = {flow: self.state.default_device_id(flow) for _, flow in self.FLOW_LABELS}
+        self.bind_all("<Control-z>", lambda event: self.undo())
+        self.bind_all("<Control-y>", lambda event: self.redo())
+        self.bind_all("<Control-Z>", lambda event: self.redo())
+
+        # Buttons for volume control
+        self.btn_up = ttk.Button(self, text="Volume Up", command=self.volume_up)
+        self.btn_down = ttk.Button(self, text="Volume Down", command=self.volume_down)
+        self.btn_toggle = ttk.Button(self, text="Toggle Mute", command=self.toggle_mute)
+        self.lbl_status = ttk.Label(self, text="")
+
+        self.btn_up.pack(pady=5)
+        self.btn_down.pack(pady=5)
+        self.btn_toggle.pack(pady=5)
+        self.lbl_status.pack(pady=5)
+
+        # Volume slider (0 to 100)
+        self.volume_slider = tk.Scale(self, from_=0, to=100, orient=tk.HORIZONTAL,
+                                      label="Master Volume", command=self.on_volume_change)
+        self.volume_slider.pack(pady=5)
+
+        # VU bar fed by a peak meter that samples off the Tk thread
+        self.vu_canvas = tk.Canvas(self, width=self.VU_WIDTH, height=10, bg="black", highlightthickness=0)
+        self.vu_bar = self.vu_canvas.create_rectangle(0, 0, 0, 10, fill="#3c3", width=0)
+        self.vu_canvas.pack(pady=5)
+        self.vu_width = 0
+        self.meter = PeakMeter(rate=self.METER_RATE_HZ, thread_init=init_com)
+        self.meter_key = None
+        self.watch_meter(self.devices[self.default_index].device_id)
+        self.meter.start()
+
+        # Per-application (session) volume for the selected device
+        sessions_frame = ttk.LabelFrame(self, text="Applications")
+        self.session_combo = ttk.Combobox(sessions_frame, state="readonly")
+        self.session_combo.bind("<<ComboboxSelected>>", self.on_session_selected)
+        self.session_slider = tk.Scale(sessions_frame, from_=0, to=100, orient=tk.HORIZONTAL,
+                                       label="App Volume", command=self.on_session_volume_change)
+        self.btn_session_mute = ttk.Button(sessions_frame, text="Toggle App Mute", command=self.toggle_session_mute)
+        self.session_combo.pack(pady=5, padx=5)
+        self.session_slider.pack(pady=5, padx=5)
+        self.btn_session_mute.pack(pady=5, padx=5)
+        sessions_frame.pack(pady=5, padx=5, fill=tk.X)
+        self.session_tracker = None
+        self.sessions = []
+        self.sessions_dirty = False
+        self.watch_sessions(self.devices[self.default_index])
+
+        self.after(self.TICK_MS, self.on_tick)
+
+        # Initialize slider position and status
+        self.request_redraw(reread=True)
+
+    def find_device_index(self, device_id):
+        for idx, info in enumerate(self.devices):
+            if info.device_id == device_id:
+                return idx
+        return 0
+
+    def on_flow_selected(self):
+        # Switch between render and capture devices using the cached enumeration
+        data_flow = self.flow_var.get()
+        devices = self.cache.devices(data_flow)
+        if not devices:
+            self.flow_var.set(self.data_flow)
+            self.status_text = "Status: No devices for this direction."
+            self.lbl_status.config(text=self.status_text)
+            return
+        self.data_flow = data_flow
+        self.devices = devices
+        self.device_combo.config(values=[info.name for info in self.devices])
+        self.device_combo.current(self.find_device_index(self.state.default_device_id(data_flow)))
+        self.on_device_selected(None)
+
+    def com(self, func, *args):
+        # Run a COM call for the selected device; a hung driver raises ComTimeoutError
+        return self.guard.call(self.device_id, func, *args)
+
+    def on_backend_event(self, event):
+        # Called on backend threads, after the backend has updated the shared caches
+        kind = event.get("event")
+        if kind == "volume":
+            if event["device"] == self.device_id and event["source"] != self.context.owner:
+                self.on_external_volume_change(event["device"], event["level"], event["muted"])
+            return
+        with self.changes_lock:
+            if kind == "device":
+                self.pending_devices[event["device"]] = event["change"]
+            elif kind == "default" and event.get("flow") in self.FLOWS:
+                self.pending_defaults[self.FLOWS[event["flow"]]] = event["device"]
+
+    @ui_action
+    def apply_endpoint_changes(self, devices, defaults):
+        for data_flow, device_id in defaults.items():
+            # Our own switches were recorded when they were made
+            old = self.known_defaults.get(data_flow)
+            if device_id != old:
+                self.history.record(DEFAULT, data_flow, old, device_id, external=True)
+                self.known_defaults[data_flow] = device_id
+        devices = self.cache.devices(self.data_flow)
+        if not devices:
+            return
+        self.devices = devices
+        self.device_combo.config(values=[info.name for info in self.devices])
+        index = self.find_device_index(self.device_id)
+        self.device_combo.current(index)
+        # Re-activate if the selected device went away or was re-added (its interfaces are stale);
+        # a "changed" event only renames it, which the combo values above already show
+        if self.devices[index].device_id != self.device_id or devices.get(self.device_id) == "added":
+            self.on_device_selected(None)
+
+    def on_quarantine_changed(self, device_id, quarantined):
+        # Called on guard threads: the Tk tick picks the change up
+        self.quarantine_dirty = True
+
+    @ui_action
+    def on_device_selected(self, event):
+        selection = self.device_combo.current()
+        info = self.devices[selection]
+        self.device_id = info.device_id
+        # A change reported for the previous device must not be recorded against this one
+        self.external_change = None
+        self.audio_volume = None
+        self.model_stale = True
+        # Reuse the cached IAudioEndpointVolume interface for the selected device
+        self.audio_volume = self.com(self.cache.audio_volume, info.device_id)
+        self.watch_volume()
+        self.load_calibration()
+        self.watch_meter(info.device_id)
+        self.watch_sessions(info)
+        self.request_redraw(reread=True)
+
+    def watch_volume(self):
+        # Follow volume/mute changes made by other programs on the selected device; the backend
+        # keeps one callback per endpoint and reports through on_backend_event
+        self.backend.watch_volume(self.device_id)
+
+    def load_calibration(self):
+        # The table is compiled (or loaded from the calibration file) once per device
+        self.position_level = None
+        self.table = self.calibration.get(self.device_id)
+        if self.table is None:
+            try:
+                volume_range = self.com(get_volume_range, self.audio_volume)
+                self.table = self.calibration.table(self.device_id, volume_range)
+            except (OSError, ValueError) as e:
+                print("Calibration unavailable, the slider is linear:", e)
+
+    def on_external_volume_change(self, device_id, level, muted):
+        # Called on COM threads; the backend has already put the new values in the state cache
+        self.external_change = (device_id, level, muted)
+
+    def watch_meter(self, device_id):
+        # Meter only the selected device
+        if self.meter_key is not None:
+            self.meter.remove_source(self.meter_key)
+            self.meter_key = None
+        try:
+            sampler = make_peak_sampler(self.cache.audio_meter(device_id))
+        except OSError as e:
+            print("Peak meter unavailable for this device:", e)
+            return
+        self.meter.add_source(device_id, sampler)
+        self.meter_key = device_id
+
+    def watch_sessions(self, info):
+        # Track the sessions of the selected device; changes arrive through session notifications
+        if self.session_tracker is not None:
+            self.session_tracker.close()
+            self.session_tracker = None
+        try:
+            self.session_tracker = self.com(AudioSessionTracker, info.device, self.on_session_changed)
+        except OSError as e:
+            print("Audio sessions unavailable for this device:", e)
+        self.refresh_sessions()
+
+    def on_session_changed(self, session, kind):
+        # Called on COM threads: only flag the list, the Tk tick redraws it
+        self.sessions_dirty = True
+
+    def on_tick(self):
+        # VU bar: only reads the ring buffer; the COM sampling happens on the meter thread
+        ring = self.meter.ring(self.meter_key) if self.meter_key is not None else None
+        level = ring.max_recent(3) if ring is not None else 0.0
+        width = int(min(1.0, level) * self.VU_WIDTH)
+        if width != self.vu_width:
+            self.vu_width = width
+            self.vu_canvas.coords(self.vu_bar, 0, 0, width, 10)
+        if self.sessions_dirty:
+            self.refresh_sessions()
+        if self.quarantine_dirty:
+            self.quarantine_dirty = False
+            self.request_redraw(reread=True)
+        if self.external_change is not None:
+            (device_id, level, muted), self.external_change = self.external_change, None
+            # Dropped if the selection moved on since: the reread on selection shows the new device
+            if device_id == self.device_id:
+                self.history.record(LEVEL, device_id, self.level, level, external=True, coalesce=True)
+                self.history.record(MUTE, device_id, self.muted, muted, external=True)
+                self.level, self.muted = level, muted
+                self.request_redraw()
+        if self.pending_devices or self.pending_defaults:
+            with self.changes_lock:
+                devices, self.pending_devices = self.pending_devices, {}
+                defaults, self.pending_defaults = self.pending_defaults, {}
+            self.apply_endpoint_changes(devices, defaults)
+        self.after(self.TICK_MS, self.on_tick)
+
+    def refresh_sessions(self):
+        self.sessions_dirty = False
+        selected = self.selected_session()
+        self.sessions = self.session_tracker.list() if self.session_tracker is not None else []
+        self.session_combo.config(values=[session.name for session in self.sessions])
+        keys = [session.key for session in self.sessions]
+        if not self.sessions:
+            self.session_combo.set("")
+        elif selected is not None and selected.key in keys:
+            self.session_combo.current(keys.index(selected.key))
+        else:
+            self.session_combo.current(0)
+        self.on_session_selected(None)
+
+    def selected_session(self):
+        index = self.session_combo.current()
+        if 0 <= index < len(self.sessions):
+            return self.sessions[index]
+        return None
+
+    def on_session_selected(self, event):
+        session = self.selected_session()
+        if session is not None:
+            self.session_slider.set(int(round(session.level * 100)))
+
+    @ui_action
+    def on_session_volume_change(self, value):
+        session = self.selected_session()
+        # Ignore the callback caused by moving the slider to the cached level
+        if session is None or int(round(session.level * 100)) == int(value):
+            return
+        self.com(self.session_tracker.set_volume, session.key, float(value) / 100.0, self.context)
+
+    @ui_action
+    def toggle_session_mute(self):
+        session = self.selected_session()
+        if session is not None:
+            self.com(self.session_tracker.set_mute, session.key, not session.muted, self.context)
+
+    @ui_action
+    def set_as_default(self):
+        info = self.devices[self.device_combo.current()]
+        self.com(switch_default_device, info.device, self.context)
+        old = self.known_defaults.get(self.data_flow)
+        self.history.record(DEFAULT, self.data_flow, old, info.device_id)
+        self.known_defaults[self.data_flow] = info.device_id
+
+    @ui_action
+    def volume_up(self):
+        self.com(volume_step_up, self.audio_volume, self.context)
+        self.after_step()
+
+    @ui_action
+    def volume_down(self):
+        self.com(volume_step_down, self.audio_volume, self.context)
+        self.after_step()
+
+    def after_step(self):
+        # The new level is only known to the device; read it once for the model and history
+        self.state.invalidate(self.device_id)
+        level = self.state.level(self.device_id)
+        self.history.record(LEVEL, self.device_id, self.level, level)
+        self.level = level
+        self.request_redraw()
+
+    @ui_action
+    def toggle_mute(self):
+        muted = not self.muted
+        self.com(set_mute, self.audio_volume, muted, self.context)
+        self.state.invalidate(self.device_id)
+        self.history.record(MUTE, self.device_id, self.muted, muted)
+        self.muted = muted
+        self.request_redraw()
+
+    @ui_action
+    def on_volume_change(self, value):
+        # Slider callback (value is a string). Moving the slider to the model level,
+        # as redraw() does, fires this too: skip it instead of writing the level back.
+        position = int(float(value))
+        if position == self.slider_position():
+            return
+        if self.table is not None:
+            # One table lookup; the scalar level that results is read back for the model and history
+            self.com(set_master_volume_db, self.audio_volume, self.table.to_db(position), self.context)
+            self.state.invalidate(self.device_id)
+            vol = self.state.level(self.device_id)
+            self.position, self.position_level = position, vol
+        else:
+            vol = position / 100.0
+            self.com(set_master_volume, self.audio_volume, vol, self.context)
+            self.state.invalidate(self.device_id)
+        # A drag fires this many times; it becomes one history entry
+        self.history.record(LEVEL, self.device_id, self.level, vol, coalesce=True)
+        self.level = vol
+        self.request_redraw()
+
+    @ui_action
+    def undo(self):
+        self.apply_history(self.history.undo(), "Undo")
+
+    @ui_action
+    def redo(self):
+        self.apply_history(self.history.redo(), "Redo")
+
+    def apply_history(self, entry, label):
+        if entry is None:
+            return
+        kind, device, value = entry
+        if kind == DEFAULT:
+            info = self.cache.get(value) if value is not None else None
+            if info is None:
+                print(f"{label}: previous default device is no longer present.")
+                return
+            self.guard.call(value, switch_default_device, info.device, self.context)
+            self.known_defaults[device] = value
+            return
+        if self.cache.get(device) is None:
+            print(f"{label}: device is no longer present.")
+            return
+        audio_volume = self.guard.call(device, self.cache.audio_volume, device)
+        if kind == LEVEL:
+            self.guard.call(device, set_master_volume, audio_volume, value, self.context)
+        else:
+            self.guard.call(device, set_mute, audio_volume, value, self.context)
+        self.state.invalidate(device)
+        if device == self.device_id:
+            if kind == LEVEL:
+                self.level = value
+            else:
+                self.muted = value
+            self.request_redraw()
+
+    def slider_position(self):
+        if self.table is not None:
+            return self.position
+        return int(round(self.level * 100))
+
+    def request_redraw(self, reread=False):
+        # Mark the view dirty; bursts of events are folded into one redraw per idle cycle
+        if reread:
+            self.model_stale = True
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.after_idle(self.redraw)
+
+    def redraw(self):
+        self.redraw_pending = False
+        if self.guard.is_quarantined(self.device_id) or self.audio_volume is None:
+            status = "Status: Device not responding (quarantined)"
+        else:
+            try:
+                if self.model_stale:
+                    self.level, self.muted = self.state.volume(self.device_id)
+                    self.model_stale = False
+                if self.table is not None and self.position_level != self.level:
+                    # The level moved some other way: map its dB back to a position
+                    self.position = self.table.to_position(self.state.volume_db(self.device_id), self.position)
+                    self.position_level = self.level
+            except ComTimeoutError as e:
+                print("COM call timed out:", e)
+            position = self.slider_position()
+            if int(self.volume_slider.get()) != position:
+                self.volume_slider.set(position)
+            status = f"Status: {'Muted' if self.muted else 'Unmuted'}, Volume: {position}%"
+            if self.model_stale:
+                status = "Status: Device not responding (quarantined)"
+        if status != self.status_text:
+            self.status_text = status
+            self.lbl_status.config(text=status)
+
+# ============================================================
+# Main Function: Execute Steps and Launch GUI
+# ============================================================
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Windows audio control demo")
+    parser.add_argument("--serve", metavar="ADDRESS",
+                        help="also run the local JSON-RPC control server (tcp:HOST:PORT or unix:PATH)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record every traced COM call to FILE (replay with com_trace.py)")
+    parser.add_argument("--groups", metavar="FILE",
+                        help="keep the linked volume groups defined in FILE (JSON) in step")
+    parser.add_argument("--rules", metavar="FILE",
+                        help="run the time, device and session automation rules defined in FILE (JSON)")
+    parser.add_argument("--ducking", metavar="FILE",
+                        help="duck other audio during calls, configured by FILE (JSON)")
+    parser.add_argument("--autogain", metavar="FILE",
+                        help="level the default endpoint by the loudness of what it plays, configured by FILE (JSON)")
+    parser.add_argument("--memory", metavar="FILE", nargs="?", const="",
+                        help="remember each device's level, mute and balance and restore them when it reconnects "
+                             "(FILE defaults to the per-user volume_memory.json)")
+    parser.add_argument("--osc", metavar="FILE",
+                        help="accept OSC control surface input using the mapping in FILE (JSON)")
+    parser.add_argument("--audit", metavar="FILE",
+                        help="append every volume, mute and default-device change to an audit journal")
+    parser.add_argument("--ws", metavar="HOST:PORT",
+                        help="push live volume and device state to WebSocket dashboards")
+    args = parser.parse_args()
+
+    # Only one instance runs; later `python -m volume COMMAND` calls are forwarded to it.
+    if instance_running():
+        print("Volume control is already running; use `python -m volume COMMAND` to control it.")
+        return
+
+    recorder = None
+    if args.trace:
+        from com_trace import TraceRecorder
+        recorder = TraceRecorder(args.trace)
+        set_com_tracer(recorder)
+
+    journal = None
+    if args.audit:
+        from audit_journal import AuditJournal
+        journal = AuditJournal(args.audit)
+        set_audit_journal(journal)
+
+    # Step 1: Initialize COM
+    init_com()
+    
+    # Step 2: Create the IMMDeviceEnumerator object
+    enumerator = create_device_enumerator()
+    
+    # Step 3: Get the default audio endpoint
+    default_endpoint = get_default_endpoint(enumerator)
+
+    # One backend serves every feature below; writes are told apart by their context name
+    from audio_backend import ComAudioBackend
+    backend = ComAudioBackend(enumerator)
+
+    # Accept commands forwarded by later invocations. These keep their own backend so that
+    # every change they make, default switches included, is attributed to the command line.
+    instance = InstanceEndpoint(lambda: ComAudioBackend(context_name=CLI_CONTEXT)).start()
+
+    # Publish device state to shared memory for other local tools (see state_board.py)
+    board = None
+    try:
+        from state_board import StateBoardPublisher
+        backend.watch_endpoints()
+        board = StateBoardPublisher(backend).start()
+    except OSError as e:
+        print("State board unavailable:", e)
+
+    # Optional: serve the volume operations to other local processes
+    if args.serve:
+        from control_server import ControlServer
+        server = ControlServer(lambda: backend, args.serve)
+        server.start_in_thread()
+
+    # Optional: linked volume groups, following changes from any source
+    groups = None
+    if args.groups:
+        from volume_groups import VolumeGroupManager, load_groups
+        groups = VolumeGroupManager(backend, load_groups(args.groups)).start()
+
+    # Optional: automation rules, triggered by time, device and session events
+    rules = None
+    if args.rules:
+        from automation import RuleEngine, load_rules
+        backend.watch_endpoints()
+        backend.watch_sessions()
+        rules = RuleEngine(backend, load_rules(args.rules)).start()
+
+    # Optional: ducking while the communications endpoint is active
+    ducking = None
+    if args.ducking:
+        from ducking import load_config, start_ducking
+        ducking = start_ducking(backend, load_config(args.ducking))
+
+    # Optional: auto-gain from loopback loudness analysis (needs NumPy)
+    autogain = None
+    if args.autogain:
+        try:
+            from loudness import load_config as load_autogain_config, start_autogain
+        except ImportError as e:
+            print("Auto-gain needs NumPy:", e)
+        else:
+            autogain = start_autogain(backend, load_autogain_config(args.autogain))
+
+    # Optional: per-device volume memory, restored on reconnect
+    memory = None
+    if args.memory is not None:
+        from volume_memory import start_memory
+        memory = start_memory(backend, args.memory or None)
+
+    # Optional: OSC control surfaces
+    if args.osc:
+        from osc_input import OscInput, load_mapping
+        listen, controls = load_mapping(args.osc)
+        OscInput(lambda: backend, controls, listen).start_in_thread()
+
+    # Optional: live state for dashboards
+    if args.ws:
+        from ws_push import WebSocketPushServer
+        backend.watch_endpoints()
+        WebSocketPushServer(lambda: backend, args.ws).start_in_thread()
+    
+    # Launch the Tkinter GUI with device selection, volume control, slider, and default switch
+    app = VolumeControlApp(backend, default_endpoint)
+    try:
+        app.mainloop()
+    finally:
+        instance.close()
+        if board is not None:
+            board.close()
+        if rules is not None:
+            rules.close()
+        if ducking is not None:
+            engine, duck_meter = ducking
+            if duck_meter is not None:
+                duck_meter.stop()
+            engine.close()
+        if autogain is not None:
+            pipeline, gain = autogain
+            pipeline.stop()
+            gain.close()
+        if memory is not None:
+            memory.close()
+        if groups is not None:
+            groups.close()
+        if journal is not None:
+            set_audit_journal(None)
+            journal.close()
+        if recorder is not None:
+            set_com_tracer(None)
+            recorder.close()
+            print(f"Recorded {recorder.calls} COM calls to {args.trace}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Default endpoint switching through the undocumented IPolicyConfig interface.
+"""
+import ctypes
+from ctypes import byref, c_void_p
+
+from .core import (CLSCTX_ALL, ERole_eCommunications, ERole_eConsole, ERole_eMultimedia, OP_SET_DEFAULT, _ole32,
+                   audit_change, guid, interface, traced)
+from .endpoints import get_device_id
+
+# ============================================================
+# IPolicyConfig Interface (Undocumented, for switching default device)
+# ============================================================
+@traced("IPolicyConfig", "SetDefaultEndpoint")
+def switch_default_device(device, context=None):
+    """
+    Switches the default audio endpoint to the given device.
+    Uses the reverse‑engineered IPolicyConfigVista interface.
+    Attempts to set the default endpoint for eConsole, eMultimedia, and eCommunications roles.
+    If a call fails with "The tag is invalid" (error -2147023163), it logs a warning and continues.
+    IPolicyConfig has no event context; `context` only attributes the change in the audit journal.
+    """
+    device_id = get_device_id(device)
+    print("Switching default device to ID:", device_id)
+
+    # Create an instance of IPolicyConfigVista
+    pPolicyConfig = c_void_p()
+    hr = _ole32().CoCreateInstance(
+         byref(guid("CLSID_CPolicyConfigVistaClient")),
+         None,
+         CLSCTX_ALL,
+         byref(guid("IID_IPolicyConfigVista")),
+         byref(pPolicyConfig)
+    )
+    if hr < 0:
+         raise ctypes.WinError(hr)
+    print("IPolicyConfigVista activated successfully:", pPolicyConfig)
+
+    # Cast to our IPolicyConfig interface (the methods are the same as in our previous definition)
+    policy_config = ctypes.cast(pPolicyConfig, interface("IPolicyConfig"))
+    # Try to set the default endpoint for multiple roles.
+    roles = [ERole_eConsole, ERole_eMultimedia, ERole_eCommunications]
+    for role in roles:
+        hr = policy_config.contents.lpVtbl.contents.SetDefaultEndpoint(policy_config, device_id, role)
+        if hr < 0:
+            # If error is "The tag is invalid" (-2147023163), log a warning and continue.
+            if hr == -2147023163:
+                print(f"SetDefaultEndpoint for role {role} failed with ERROR_INVALID_TAG, skipping.")
+            else:
+                raise ctypes.WinError(hr)
+    audit_change(OP_SET_DEFAULT, device_id, context=context)
+    print("Default device switched to:", device_id)
@@ -0,0 +1,160 @@
+"""
+Read-through cache of endpoint state: master level, mute, friendly name and
+default endpoints, in front of an EndpointCache.
+
+A device's level and mute (and, when asked for, its level in dB) are read
+from COM once and then served from
+memory. While a volume notification client feeds update() for the device
+(set_watched(device_id, True)), the entry stays valid until the next
+notification; otherwise it expires after `ttl` seconds and the next read
+goes back to COM. Endpoint notification batches passed to apply_changes()
+drop the entries of every touched device. Writers call invalidate() after
+a change whose result they do not know (a step), so the read that follows
+sees the device's value rather than a notification still in flight.
+
+Friendly names are already kept by the EndpointCache; default endpoints
+are remembered there while endpoint notifications are registered and are
+otherwise cached here under the same TTL.
+"""
+import threading
+import time
+
+from .core import EDataFlow_eRender, ERole_eConsole
+from .volume import get_master_volume, get_master_volume_db, get_mute
+
+
+def _direct_call(key, func, *args):
+    return func(*args)
+
+
+class VolumeStateCache:
+    """
+    `call(key, func, *args)` runs each COM read, keyed by device ID (or
+    com_guard.GLOBAL_KEY for default lookups); pass ComCallGuard.call to
+    keep hung-driver isolation. Reads may come from any thread that may
+    make the calls; update() may come from COM notification threads.
+    """
+    def __init__(self, endpoints, ttl=2.0, call=None, global_key=None, clock=time.monotonic):
+        self.endpoints = endpoints
+        self.ttl = ttl
+        self.call = call or _direct_call
+        self.global_key = global_key
+        self.clock = clock
+        self.entries = {}      # device ID -> [level, muted, read at]
+        self.db_entries = {}   # device ID -> (level in dB, read at); notifications only carry the scalar
+        self.watched = set()   # device IDs whose entries are kept current by notifications
+        self.defaults = {}     # (data flow, role) -> (device ID, read at)
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "updates": 0, "invalidations": 0}
+
+    def _fresh(self, read_at, watched):
+        return watched or self.clock() - read_at < self.ttl
+
+    # -------------------------------
+    # Reads
+    # -------------------------------
+    def volume(self, device_id):
+        """Returns (level, muted) for the device."""
+        with self.lock:
+            entry = self.entries.get(device_id)
+            if entry is not None:
+                if self._fresh(entry[2], device_id in self.watched):
+                    self.stats["hits"] += 1
+                    return entry[0], entry[1]
+                self.stats["stale"] += 1
+            else:
+                self.stats["misses"] += 1
+        audio_volume = self.call(device_id, self.endpoints.audio_volume, device_id)
+        level = self.call(device_id, get_master_volume, audio_volume)
+        muted = self.call(device_id, get_mute, audio_volume)
+        with self.lock:
+            self.entries[device_id] = [level, muted, self.clock()]
+        return level, muted
+
+    def level(self, device_id):
+        return self.volume(device_id)[0]
+
+    def muted(self, device_id):
+        return self.volume(device_id)[1]
+
+    def volume_db(self, device_id):
+        """Returns the device's master level in dB."""
+        with self.lock:
+            entry = self.db_entries.get(device_id)
+            if entry is not None:
+                if self._fresh(entry[1], device_id in self.watched):
+                    self.stats["hits"] += 1
+                    return entry[0]
+                self.stats["stale"] += 1
+            else:
+                self.stats["misses"] += 1
+        audio_volume = self.call(device_id, self.endpoints.audio_volume, device_id)
+        db = self.call(device_id, get_master_volume_db, audio_volume)
+        with self.lock:
+            self.db_entries[device_id] = (db, self.clock())
+        return db
+
+    def name(self, device_id):
+        info = self.endpoints.get(device_id)
+        return info.name if info is not None else None
+
+    def default_device_id(self, data_flow=EDataFlow_eRender, role=ERole_eConsole):
+        if self.endpoints.track_defaults:
+            # Kept current by endpoint notifications.
+            return self.call(self.global_key, self.endpoints.default_device_id, data_flow, role)
+        key = (data_flow, role)
+        with self.lock:
+            cached = self.defaults.get(key)
+            if cached is not None and self._fresh(cached[1], False):
+                self.stats["hits"] += 1
+                return cached[0]
+            self.stats["stale" if cached is not None else "misses"] += 1
+        device_id = self.call(self.global_key, self.endpoints.default_device_id, data_flow, role)
+        with self.lock:
+            self.defaults[key] = (device_id, self.clock())
+        return device_id
+
+    # -------------------------------
+    # Invalidation
+    # -------------------------------
+    def update(self, device_id, level, muted):
+        """Stores the values carried by a volume notification (any thread)."""
+        with self.lock:
+            self.entries[device_id] = [level, muted, self.clock()]
+            self.db_entries.pop(device_id, None)
+            self.stats["updates"] += 1
+
+    def set_watched(self, device_id, watched):
+        with self.lock:
+            if watched:
+                self.watched.add(device_id)
+            else:
+                self.watched.discard(device_id)
+
+    def invalidate(self, device_id=None):
+        """Drops one device's entry, or everything (including defaults) for None."""
+        with self.lock:
+            self.stats["invalidations"] += 1
+            if device_id is None:
+                self.entries.clear()
+                self.db_entries.clear()
+                self.defaults.clear()
+            else:
+                self.entries.pop(device_id, None)
+                self.db_entries.pop(device_id, None)
+
+    def apply_changes(self, changes):
+        """Drops the entries touched by one change_coalescer.EndpointChanges batch."""
+        with self.lock:
+            for device_id in changes.devices:
+                self.entries.pop(device_id, None)
+                self.db_entries.pop(device_id, None)
+            if changes.defaults:
+                self.defaults.clear()
+            self.stats["invalidations"] += 1
+
+    def metrics(self):
+        with self.lock:
+            reads = self.stats["hits"] + self.stats["misses"] + self.stats["stale"]
+            return dict(self.stats, entries=len(self.entries), watched=len(self.watched),
+                        hit_rate=self.stats["hits"] / reads if reads else None)
@@ -0,0 +1,566 @@
+"""
+Volume control: master level, dB, channel and mute helpers for IAudioEndpointVolume,
+volume change notifications, peak metering and per-application (session)
+volume.
+"""
+import ctypes
+import threading
+from ctypes import byref, c_void_p, c_ulong, c_int, c_wchar_p, c_uint
+
+from .core import (CLSCTX_ALL, OP_SET_CHANNEL_VOLUME, OP_SET_MUTE, OP_SET_VOLUME, OP_SET_VOLUME_DB, OP_STEP_DOWN,
+                   OP_STEP_UP, UNKNOWN, ComCallbackObject, _context_address, audit_change, com_release,
+                   event_context_owner, guid, interface, query_interface, traced)
+from .endpoints import _volume_devices
+
+def _audit(op, audio_volume, new=UNKNOWN, context=None):
+    audit_change(op, _volume_devices.get(getattr(audio_volume, "value", audio_volume)), new, context)
+
+# ============================================================
+# Volume Control Helper Functions
+# ============================================================
+@traced("IAudioEndpointVolume", "VolumeStepUp")
+def volume_step_up(audio_volume, context=None):
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    hr = volume_iface.contents.lpVtbl.contents.VolumeStepUp(volume_iface, _context_address(context))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    _audit(OP_STEP_UP, audio_volume, context=context)
+    print("Volume stepped up.")
+
+@traced("IAudioEndpointVolume", "VolumeStepDown")
+def volume_step_down(audio_volume, context=None):
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    hr = volume_iface.contents.lpVtbl.contents.VolumeStepDown(volume_iface, _context_address(context))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    _audit(OP_STEP_DOWN, audio_volume, context=context)
+    print("Volume stepped down.")
+
+@traced("IAudioEndpointVolume", "SetMute")
+def set_mute(audio_volume, mute, context=None):
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    hr = volume_iface.contents.lpVtbl.contents.SetMute(volume_iface, int(mute), _context_address(context))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    _audit(OP_SET_MUTE, audio_volume, float(bool(mute)), context)
+    print("Mute set to", mute)
+
+@traced("IAudioEndpointVolume", "GetMute")
+def get_mute(audio_volume):
+    mute_val = c_int()
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    hr = volume_iface.contents.lpVtbl.contents.GetMute(volume_iface, byref(mute_val))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return bool(mute_val.value)
+
+@traced("IAudioEndpointVolume", "GetMasterVolumeLevelScalar")
+def get_master_volume(audio_volume):
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    level = ctypes.c_float()
+    hr = volume_iface.contents.lpVtbl.contents.GetMasterVolumeLevelScalar(volume_iface, byref(level))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return level.value
+
+@traced("IAudioEndpointVolume", "SetMasterVolumeLevelScalar")
+def set_master_volume(audio_volume, value, context=None):
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    hr = volume_iface.contents.lpVtbl.contents.SetMasterVolumeLevelScalar(
+        volume_iface, ctypes.c_float(value), _context_address(context))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    _audit(OP_SET_VOLUME, audio_volume, value, context)
+    print("Master volume set to", value)
+
+@traced("IAudioEndpointVolume", "GetMasterVolumeLevel")
+def get_master_volume_db(audio_volume):
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    level = ctypes.c_float()
+    hr = volume_iface.contents.lpVtbl.contents.GetMasterVolumeLevel(volume_iface, byref(level))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return level.value
+
+@traced("IAudioEndpointVolume", "SetMasterVolumeLevel")
+def set_master_volume_db(audio_volume, value, context=None):
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    hr = volume_iface.contents.lpVtbl.contents.SetMasterVolumeLevel(
+        volume_iface, ctypes.c_float(value), _context_address(context))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    _audit(OP_SET_VOLUME_DB, audio_volume, value, context)
+    print("Master volume set to", value, "dB")
+
+@traced("IAudioEndpointVolume", "GetVolumeRange")
+def get_volume_range(audio_volume):
+    """Returns (min_db, max_db, increment_db) for the endpoint."""
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    min_db, max_db, increment = ctypes.c_float(), ctypes.c_float(), ctypes.c_float()
+    hr = volume_iface.contents.lpVtbl.contents.GetVolumeRange(
+        volume_iface, byref(min_db), byref(max_db), byref(increment))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return min_db.value, max_db.value, increment.value
+
+@traced("IAudioEndpointVolume", "GetChannelCount")
+def get_channel_count(audio_volume):
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    count = c_uint()
+    hr = volume_iface.contents.lpVtbl.contents.GetChannelCount(volume_iface, byref(count))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return count.value
+
+@traced("IAudioEndpointVolume", "GetChannelVolumeLevelScalar")
+def get_channel_volume(audio_volume, channel):
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    level = ctypes.c_float()
+    hr = volume_iface.contents.lpVtbl.contents.GetChannelVolumeLevelScalar(volume_iface, channel, byref(level))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return level.value
+
+def get_channel_volumes(audio_volume):
+    """Returns the scalar level of every channel; the master level is the loudest of them."""
+    return [get_channel_volume(audio_volume, channel) for channel in range(get_channel_count(audio_volume))]
+
+@traced("IAudioEndpointVolume", "SetChannelVolumeLevelScalar")
+def set_channel_volume(audio_volume, channel, value, context=None):
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    hr = volume_iface.contents.lpVtbl.contents.SetChannelVolumeLevelScalar(
+        volume_iface, channel, ctypes.c_float(value), _context_address(context))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    _audit(OP_SET_CHANNEL_VOLUME, audio_volume, value, context)
+    print(f"Channel {channel} volume set to", value)
+
+# ============================================================
+# IAudioMeterInformation Interface (Peak Metering)
+# ============================================================
+@traced("IAudioMeterInformation", "GetPeakValue")
+def get_peak_value(audio_meter):
+    meter_iface = ctypes.cast(audio_meter, interface("IAudioMeterInformation"))
+    peak = ctypes.c_float()
+    hr = meter_iface.contents.lpVtbl.contents.GetPeakValue(meter_iface, byref(peak))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return peak.value
+
+@traced("IAudioMeterInformation", "GetMeteringChannelCount")
+def get_metering_channel_count(audio_meter):
+    meter_iface = ctypes.cast(audio_meter, interface("IAudioMeterInformation"))
+    count = c_uint()
+    hr = meter_iface.contents.lpVtbl.contents.GetMeteringChannelCount(meter_iface, byref(count))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return count.value
+
+def get_channels_peak_values(audio_meter, channel_count):
+    meter_iface = ctypes.cast(audio_meter, interface("IAudioMeterInformation"))
+    peaks = (ctypes.c_float * channel_count)()
+    hr = meter_iface.contents.lpVtbl.contents.GetChannelsPeakValues(meter_iface, channel_count, peaks)
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return list(peaks)
+
+def make_peak_sampler(audio_meter, channel_count=0):
+    """
+    Returns a sampler for meter.PeakMeter that reads the master peak and,
+    if channel_count is non-zero, the per-channel peaks into preallocated
+    buffers. Call it only from a COM-initialized thread. Samples are not
+    traced (see com_trace.py).
+    """
+    meter_iface = ctypes.cast(audio_meter, interface("IAudioMeterInformation"))
+    vtbl = meter_iface.contents.lpVtbl.contents
+    get_peak = vtbl.GetPeakValue
+    get_channels = vtbl.GetChannelsPeakValues
+    peak = ctypes.c_float()
+    peak_ref = byref(peak)
+    channels = (ctypes.c_float * channel_count)()
+
+    def sample():
+        hr = get_peak(meter_iface, peak_ref)
+        if hr < 0:
+            raise ctypes.WinError(hr)
+        if channel_count:
+            hr = get_channels(meter_iface, channel_count, channels)
+            if hr < 0:
+                raise ctypes.WinError(hr)
+            return peak.value, channels
+        return peak.value, None
+    return sample
+
+# ============================================================
+# IAudioEndpointVolumeCallback (Volume/Mute Change Notifications)
+# ============================================================
+class VolumeNotificationClient(ComCallbackObject):
+    """
+    IAudioEndpointVolumeCallback sink. Notifications stamped with one of the
+    `ignore` contexts (our own writes) are dropped after a 16-byte compare;
+    everything else is passed to on_change(level, muted, source) on the COM
+    thread, where source is the owner of a known EventContext or None for
+    changes made outside this process.
+    """
+    _interface_ = "IAudioEndpointVolumeCallback"
+
+    def __init__(self, on_change, ignore=()):
+        super().__init__()
+        self.on_change = on_change
+        self.ignore = frozenset(context.key for context in ignore)
+        self.stats = {"delivered": 0, "suppressed": 0}
+
+    def OnNotify(self, this, data):
+        notification = data.contents
+        key = bytes(notification.guidEventContext)
+        if key in self.ignore:
+            self.stats["suppressed"] += 1
+            return 0
+        self.stats["delivered"] += 1
+        try:
+            self.on_change(notification.fMasterVolume, bool(notification.bMuted), event_context_owner(key))
+        except Exception as e:
+            print("Volume change handler failed:", e)
+        return 0
+
+def register_volume_notification(audio_volume, client):
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    hr = volume_iface.contents.lpVtbl.contents.RegisterControlChangeNotify(volume_iface, client.pointer)
+    if hr < 0:
+        raise ctypes.WinError(hr)
+
+def unregister_volume_notification(audio_volume, client):
+    volume_iface = ctypes.cast(audio_volume, interface("IAudioEndpointVolume"))
+    hr = volume_iface.contents.lpVtbl.contents.UnregisterControlChangeNotify(volume_iface, client.pointer)
+    if hr < 0:
+        raise ctypes.WinError(hr)
+
+# ============================================================
+# Audio Session Interfaces (Per-Application Volume)
+# ============================================================
+# AudioSessionState (from audiosessiontypes.h)
+AudioSessionStateInactive = 0
+AudioSessionStateActive   = 1
+AudioSessionStateExpired  = 2
+
+@traced("IMMDevice", "Activate")
+def activate_audio_session_manager(endpoint):
+    """
+    Activates the IAudioSessionManager2 interface for the given endpoint.
+    """
+    endpoint_iface = ctypes.cast(endpoint, interface("IMMDevice"))
+    session_manager = c_void_p()
+    hr = endpoint_iface.contents.lpVtbl.contents.Activate(
+        endpoint_iface,
+        byref(guid("IID_IAudioSessionManager2")),
+        CLSCTX_ALL,
+        None,
+        byref(session_manager)
+    )
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    print("IAudioSessionManager2 activated successfully:", session_manager)
+    return session_manager
+
+def iter_audio_sessions(session_manager):
+    """Yields the IAudioSessionControl pointer of every session on the endpoint."""
+    manager_iface = ctypes.cast(session_manager, interface("IAudioSessionManager2"))
+    pEnumerator = c_void_p()
+    hr = manager_iface.contents.lpVtbl.contents.GetSessionEnumerator(manager_iface, byref(pEnumerator))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    enumerator_iface = ctypes.cast(pEnumerator, interface("IAudioSessionEnumerator"))
+    count = c_int()
+    hr = enumerator_iface.contents.lpVtbl.contents.GetCount(enumerator_iface, byref(count))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    for i in range(count.value):
+        pControl = c_void_p()
+        hr = enumerator_iface.contents.lpVtbl.contents.GetSession(enumerator_iface, i, byref(pControl))
+        if hr < 0:
+            continue
+        yield pControl
+    enumerator_iface.contents.lpVtbl.contents.Release(enumerator_iface)
+
+@traced("ISimpleAudioVolume", "GetMasterVolume")
+def get_session_volume(simple_volume):
+    volume_iface = ctypes.cast(simple_volume, interface("ISimpleAudioVolume"))
+    level = ctypes.c_float()
+    hr = volume_iface.contents.lpVtbl.contents.GetMasterVolume(volume_iface, byref(level))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return level.value
+
+@traced("ISimpleAudioVolume", "SetMasterVolume")
+def set_session_volume(simple_volume, value, context=None):
+    volume_iface = ctypes.cast(simple_volume, interface("ISimpleAudioVolume"))
+    hr = volume_iface.contents.lpVtbl.contents.SetMasterVolume(
+        volume_iface, ctypes.c_float(value), _context_address(context))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+
+@traced("ISimpleAudioVolume", "GetMute")
+def get_session_mute(simple_volume):
+    mute_val = c_int()
+    volume_iface = ctypes.cast(simple_volume, interface("ISimpleAudioVolume"))
+    hr = volume_iface.contents.lpVtbl.contents.GetMute(volume_iface, byref(mute_val))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+    return bool(mute_val.value)
+
+@traced("ISimpleAudioVolume", "SetMute")
+def set_session_mute(simple_volume, mute, context=None):
+    volume_iface = ctypes.cast(simple_volume, interface("ISimpleAudioVolume"))
+    hr = volume_iface.contents.lpVtbl.contents.SetMute(volume_iface, int(mute), _context_address(context))
+    if hr < 0:
+        raise ctypes.WinError(hr)
+
+def get_process_name(pid):
+    """Returns the executable name for a process ID, or None if it cannot be opened."""
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        return None
+    try:
+        buffer = ctypes.create_unicode_buffer(1024)
+        size = c_ulong(len(buffer))
+        if not kernel32.QueryFullProcessImageNameW(handle, 0, buffer, byref(size)):
+            return None
+        return buffer.value.rsplit("\\", 1)[-1]
+    finally:
+        kernel32.CloseHandle(handle)
+
+# ============================================================
+# Incremental Session Index
+# ============================================================
+class AudioSession:
+    """One tracked audio session. level/muted mirror ISimpleAudioVolume via session events."""
+    __slots__ = ("key", "pid", "identifier", "instance_id", "display_name", "process_name",
+                 "state", "level", "muted", "source", "control", "simple_volume", "events")
+
+    def __repr__(self):
+        return f"AudioSession(pid={self.pid}, name={self.name!r}, level={self.level:.2f}, muted={self.muted})"
+
+    @property
+    def name(self):
+        if self.pid == 0:
+            return "System Sounds"
+        return self.display_name or self.process_name or f"PID {self.pid}"
+
+class _SessionCreatedSink(ComCallbackObject):
+    _interface_ = "IAudioSessionNotification"
+
+    def __init__(self, tracker):
+        super().__init__()
+        self.tracker = tracker
+
+    def OnSessionCreated(self, this, new_session):
+        try:
+            self.tracker._add(new_session)
+        except OSError as e:
+            print("Could not track new audio session:", e)
+        return 0
+
+class _SessionEventsSink(ComCallbackObject):
+    _interface_ = "IAudioSessionEvents"
+
+    def __init__(self, tracker, key):
+        super().__init__()
+        self.tracker = tracker
+        self.key = key
+
+    def OnDisplayNameChanged(self, this, name, context):
+        self.tracker._update(self.key, display_name=name)
+        return 0
+
+    def OnIconPathChanged(self, this, path, context):
+        return 0
+
+    def OnSimpleVolumeChanged(self, this, level, muted, context):
+        source = event_context_owner(ctypes.string_at(context, 16)) if context else None
+        self.tracker._update(self.key, level=level, muted=bool(muted), source=source)
+        return 0
+
+    def OnChannelVolumeChanged(self, this, count, volumes, changed_channel, context):
+        return 0
+
+    def OnGroupingParamChanged(self, this, grouping, context):
+        return 0
+
+    def OnStateChanged(self, this, state):
+        if state == AudioSessionStateExpired:
+            self.tracker._remove(self.key)
+        else:
+            self.tracker._update(self.key, state=state)
+        return 0
+
+    def OnSessionDisconnected(self, this, reason):
+        self.tracker._remove(self.key)
+        return 0
+
+class AudioSessionTracker:
+    """
+    Keeps an index of an endpoint's audio sessions keyed by
+    (process ID, session instance identifier), plus a process ID lookup.
+    The sessions are enumerated once; afterwards IAudioSessionNotification
+    adds new ones and per-session IAudioSessionEvents keep level, mute and
+    state current and drop expired sessions, so reads and writes never
+    rescan the endpoint. `on_change(session, kind)` is called from COM
+    threads with kind in ("added", "updated", "removed").
+    """
+    def __init__(self, endpoint, on_change=None):
+        self._lock = threading.RLock()
+        self.on_change = on_change
+        self.sessions = {}
+        self.by_pid = {}
+        # Sessions removed inside a session callback, which must not unregister
+        # itself there; released on the next call from the owning thread.
+        self._pending_release = []
+        self.manager = activate_audio_session_manager(endpoint)
+        self._manager_iface = ctypes.cast(self.manager, interface("IAudioSessionManager2"))
+        self._created_sink = _SessionCreatedSink(self)
+        hr = self._manager_iface.contents.lpVtbl.contents.RegisterSessionNotification(
+            self._manager_iface, self._created_sink.pointer)
+        if hr < 0:
+            raise ctypes.WinError(hr)
+        # The initial enumeration is also what arms OnSessionCreated delivery.
+        for pControl in iter_audio_sessions(self.manager):
+            try:
+                self._add(pControl)
+            except OSError as e:
+                print("Could not track audio session:", e)
+            com_release(pControl)
+
+    def _add(self, session_control):
+        control = query_interface(session_control, guid("IID_IAudioSessionControl2"))
+        control_iface = ctypes.cast(control, interface("IAudioSessionControl2"))
+        vtbl = control_iface.contents.lpVtbl.contents
+        pid = c_ulong()
+        vtbl.GetProcessId(control_iface, byref(pid))  # fails harmlessly for cross-process sessions
+        identifier = c_wchar_p()
+        instance_id = c_wchar_p()
+        display_name = c_wchar_p()
+        state = c_int()
+        vtbl.GetSessionIdentifier(control_iface, byref(identifier))
+        hr = vtbl.GetSessionInstanceIdentifier(control_iface, byref(instance_id))
+        if hr < 0:
+            com_release(control)
+            raise ctypes.WinError(hr)
+        vtbl.GetDisplayName(control_iface, byref(display_name))
+        vtbl.GetState(control_iface, byref(state))
+        if state.value == AudioSessionStateExpired:
+            com_release(control)
+            return None
+
+        key = (pid.value, instance_id.value)
+        with self._lock:
+            if key in self.sessions:
+                com_release(control)
+                return self.sessions[key]
+            session = AudioSession()
+            session.key = key
+            session.pid = pid.value
+            session.identifier = identifier.value
+            session.instance_id = instance_id.value
+            session.display_name = display_name.value or ""
+            session.process_name = get_process_name(pid.value) if pid.value else None
+            session.state = state.value
+            session.control = control
+            session.simple_volume = query_interface(control, guid("IID_ISimpleAudioVolume"))
+            session.level = get_session_volume(session.simple_volume)
+            session.muted = get_session_mute(session.simple_volume)
+            session.source = None  # owner of the EventContext behind the last change, if ours
+            session.events = _SessionEventsSink(self, key)
+            hr = vtbl.RegisterAudioSessionNotification(control_iface, session.events.pointer)
+            if hr < 0:
+                print("Session events unavailable, values may go stale:", ctypes.WinError(hr))
+            self.sessions[key] = session
+            self.by_pid.setdefault(session.pid, set()).add(key)
+        self._notify(session, "added")
+        return session
+
+    def _update(self, key, **values):
+        with self._lock:
+            session = self.sessions.get(key)
+            if session is None:
+                return
+            for name, value in values.items():
+                setattr(session, name, value)
+        self._notify(session, "updated")
+
+    def _remove(self, key):
+        with self._lock:
+            session = self.sessions.pop(key, None)
+            if session is None:
+                return
+            keys = self.by_pid.get(session.pid)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_pid[session.pid]
+            self._pending_release.append(session)
+        self._notify(session, "removed")
+
+    def _release_pending(self):
+        with self._lock:
+            pending, self._pending_release = self._pending_release, []
+        for session in pending:
+            self._release_session(session)
+
+    def _release_session(self, session):
+        control_iface = ctypes.cast(session.control, interface("IAudioSessionControl2"))
+        control_iface.contents.lpVtbl.contents.UnregisterAudioSessionNotification(
+            control_iface, session.events.pointer)
+        session.events.close()
+        com_release(session.simple_volume)
+        com_release(session.control)
+
+    def _notify(self, session, kind):
+        if self.on_change is not None:
+            try:
+                self.on_change(session, kind)
+            except Exception as e:
+                print("Session change handler failed:", e)
+
+    def list(self):
+        self._release_pending()
+        with self._lock:
+            return list(self.sessions.values())
+
+    def get(self, key):
+        return self.sessions.get(key)
+
+    def for_pid(self, pid):
+        with self._lock:
+            return [self.sessions[key] for key in self.by_pid.get(pid, ())]
+
+    def set_volume(self, key, level, context=None):
+        """Sets one session's volume. The cached level is updated by OnSimpleVolumeChanged."""
+        self._release_pending()
+        set_session_volume(self.sessions[key].simple_volume, min(1.0, max(0.0, level)), context)
+
+    def set_mute(self, key, mute, context=None):
+        set_session_mute(self.sessions[key].simple_volume, mute, context)
+
+    def set_process_volume(self, pid, level, context=None):
+        for session in self.for_pid(pid):
+            self.set_volume(session.key, level, context)
+
+    def set_process_mute(self, pid, mute, context=None):
+        for session in self.for_pid(pid):
+            self.set_mute(session.key, mute, context)
+
+    def close(self):
+        """Unregisters every notification sink and releases the sessions."""
+        self._manager_iface.contents.lpVtbl.contents.UnregisterSessionNotification(
+            self._manager_iface, self._created_sink.pointer)
+        self._created_sink.close()
+        self._release_pending()
+        with self._lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+            self.by_pid.clear()
+        for session in sessions:
+            self._release_session(session)
+        com_release(self.manager)
@@ -0,0 +1,219 @@
+"""
+Linked volume groups across endpoints.
+
+A VolumeGroup is a set of endpoint IDs with relative offsets, either on the
+0..1 scalar scale or in dB. When any member's volume or mute changes, from
+the GUI, a remote client or another application, VolumeGroupManager moves
+every other member to keep the offsets, writing all of them concurrently in
+one batch.
+
+Writes made by the manager are stamped with its own context name, and the
+volume events they produce come back with that "source", so propagation
+never re-triggers itself. Propagation is rate limited per group: during a
+fast slider drag on one member only the latest leader state is written at
+most `max_rate` times per second, with a trailing write for the final
+position.
+
+Groups are read from JSON:
+
+    {"groups": [{"name": "front", "mode": "db",
+                 "members": {"{0.0.0.00000000}.{...}": 0.0, "{0.0.0.00000000}.{...}": -3.0}}]}
+
+Any backend from audio_backend.py can be used, so groups can be exercised
+with SimulatedAudioBackend (see benchmarks/group_drag.py).
+"""
+import concurrent.futures
+import json
+import threading
+import time
+
+from audio_backend import clamp_level
+
+SCALAR = "scalar"
+DB = "db"
+
+
+class VolumeGroup:
+    """`members` maps endpoint ID -> offset (scalar or dB, per `mode`)."""
+
+    def __init__(self, name, members, mode=SCALAR):
+        if mode not in (SCALAR, DB):
+            raise ValueError(f"Unknown group mode: {mode!r}")
+        if len(members) < 2:
+            raise ValueError(f"Group {name!r} needs at least two members")
+        self.name = name
+        self.members = dict(members)
+        self.mode = mode
+
+    def __repr__(self):
+        return f"VolumeGroup({self.name!r}, {self.members!r}, mode={self.mode!r})"
+
+    def targets(self, leader, value):
+        """Values for the other members when `leader` is at `value`."""
+        base = value - self.members[leader]
+        return {device_id: base + offset
+                for device_id, offset in self.members.items() if device_id != leader}
+
+
+def load_groups(path):
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    return [VolumeGroup(entry["name"], entry["members"], entry.get("mode", SCALAR))
+            for entry in config.get("groups", [])]
+
+
+class _PendingChange:
+    __slots__ = ("leader", "level", "muted")
+
+    def __init__(self, leader, level, muted):
+        self.leader = leader
+        self.level = level
+        self.muted = muted
+
+
+class VolumeGroupManager:
+    """
+    Listens to `backend` volume events and keeps each group's members in
+    step. An endpoint may belong to only one group. Call start() to read
+    the members' current state (which also activates their notifications)
+    and close() to stop.
+    """
+    def __init__(self, backend, groups, max_rate=20.0, context_name="volume-groups", max_workers=8):
+        self.backend = backend
+        self.groups = {}
+        self.group_of = {}
+        for group in groups:
+            for device_id in group.members:
+                if device_id in self.group_of:
+                    raise ValueError(f"{device_id} is in both {self.group_of[device_id].name!r} "
+                                     f"and {group.name!r}")
+                self.group_of[device_id] = group
+            self.groups[group.name] = group
+        self.interval = 1.0 / max_rate if max_rate else 0.0
+        self.context_name = context_name
+        self.known = {}   # device ID -> (level, muted) last seen
+        self.stats = {"events": 0, "echoes": 0, "propagations": 0, "writes": 0,
+                      "skipped_writes": 0, "errors": 0}
+        self._pending = {}     # group name -> _PendingChange
+        self._last_flush = {}  # group name -> monotonic time
+        self._cond = threading.Condition()
+        self._closed = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="group-write")
+        self._thread = threading.Thread(target=self._run, name="volume-groups", daemon=True)
+
+    def start(self):
+        for device_id in self.group_of:
+            try:
+                state = self.backend.get_volume(device_id)
+            except Exception as e:
+                print(f"Volume group member {device_id} unavailable:", e)
+                continue
+            self.known[device_id] = (state["level"], state["muted"])
+        self.backend.add_listener(self.on_event)
+        self._thread.start()
+        return self
+
+    # -------------------------------
+    # Event intake (backend thread)
+    # -------------------------------
+    def on_event(self, event):
+        if event.get("event") != "volume":
+            return
+        device_id = event["device"]
+        group = self.group_of.get(device_id)
+        if group is None:
+            return
+        state = (event["level"], event["muted"])
+        previous = self.known.get(device_id)
+        self.known[device_id] = state
+        if event.get("source") == self.context_name:
+            self.stats["echoes"] += 1
+            return
+        if state == previous:
+            return
+        self.stats["events"] += 1
+        with self._cond:
+            pending = self._pending.get(group.name)
+            if pending is None:
+                self._pending[group.name] = _PendingChange(device_id, *state)
+                self._cond.notify()
+            else:
+                # Only the latest state is written; the rate limit still applies.
+                pending.leader, pending.level, pending.muted = device_id, state[0], state[1]
+
+    # -------------------------------
+    # Propagation (manager thread)
+    # -------------------------------
+    def _due(self, name):
+        return self._last_flush.get(name, float("-inf")) + self.interval
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._pending:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                now = time.monotonic()
+                ready = [name for name in self._pending if self._due(name) <= now]
+                if not ready:
+                    self._cond.wait(min(self._due(name) for name in self._pending) - now)
+                    continue
+                batch = [(self.groups[name], self._pending.pop(name)) for name in ready]
+                for name in ready:
+                    self._last_flush[name] = now
+            for group, change in batch:
+                self._propagate(group, change)
+
+    def _propagate(self, group, change):
+        self.stats["propagations"] += 1
+        if group.mode == DB:
+            try:
+                value = self.backend.get_volume_db(change.leader)["db"]
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Reading {change.leader} for group {group.name!r} failed:", e)
+                return
+        else:
+            value = change.level
+        writes = [self._executor.submit(self._write, group.mode, device_id, target, change.muted)
+                  for device_id, target in group.targets(change.leader, value).items()]
+        for future in concurrent.futures.as_completed(writes):
+            try:
+                future.result()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Volume group {group.name!r} write failed:", e)
+
+    def _write(self, mode, device_id, target, muted):
+        level, current_muted = self.known.get(device_id, (None, None))
+        if mode == SCALAR:
+            target = clamp_level(target)
+            if level is None or abs(level - target) > 1e-4:
+                self.backend.set_volume(target, device_id, context=self.context_name)
+                self.stats["writes"] += 1
+            else:
+                self.stats["skipped_writes"] += 1
+        else:
+            self.backend.set_volume_db(target, device_id, context=self.context_name)
+            self.stats["writes"] += 1
+        if muted != current_muted:
+            self.backend.set_mute(muted, device_id, context=self.context_name)
+            self.stats["writes"] += 1
+
+    def flush(self):
+        """Propagates pending changes now, ignoring the rate limit."""
+        with self._cond:
+            batch = [(self.groups[name], change) for name, change in self._pending.items()]
+            self._pending.clear()
+        for group, change in batch:
+            self._propagate(group, change)
+
+    def close(self):
+        self.backend.remove_listener(self.on_event)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._executor.shutdown()
@@ -0,0 +1,286 @@
+"""
+Per-device volume memory: the last known level, mute state and channel
+balance of every endpoint, restored when the endpoint comes back.
+
+VolumeMemoryStore keeps one compact entry per endpoint ID in a JSON file:
+
+    {"version": 1, "devices": {ID: [last seen (unix s), level, muted, [channel levels] or null]}}
+
+The file is read the first time an entry is needed, not at startup.
+record() only merges the change into a pending dict. flush() folds the
+pending changes in and replaces the file atomically, so a drag that
+produces a hundred volume events costs one write. Only the `max_devices`
+most recently seen endpoints are kept, which bounds the file at a few
+hundred KB however many headsets have come and gone.
+
+VolumeMemory follows a backend's events. Volume events update the device's
+entry, and its channel levels are read back before the next flush. When an
+endpoint is added (plugged in, or re-enabled), its saved state is compared
+with what the device reports now. Only the difference is written: the
+channel levels if the balance or level changed, or only the mute state.
+Volume events for an endpoint that has been removed are ignored until it
+has been restored, so the level Windows applies on reconnect is not taken
+for the user's.
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+from audio_backend import BackendError
+
+MAX_DEVICES = 4096
+FORMAT_VERSION = 1
+
+
+def default_path():
+    path = os.environ.get("VOLUME_MEMORY_FILE")
+    if path:
+        return path
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.environ.get("LOCALAPPDATA") or "."
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "volume-control", "volume_memory.json")
+
+
+def _rounded(level):
+    return round(float(level), 4)
+
+
+# ============================================================
+# Persistent Store
+# ============================================================
+class VolumeMemoryStore:
+    """
+    Last known state per endpoint ID, written behind to `path` (None keeps
+    it in memory). record() and recall() may be called from any thread.
+    """
+    def __init__(self, path=None, max_devices=MAX_DEVICES):
+        self.path = path
+        self.max_devices = max_devices
+        self._entries = None   # endpoint ID -> [seen, level, muted, channels], once loaded
+        self._pending = {}     # endpoint ID -> {field: value} recorded since the last flush
+        self._lock = threading.Lock()
+        self.stats = {"records": 0, "flushes": 0, "evicted": 0, "loaded": 0}
+
+    def _load(self):
+        # Called with the lock held.
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        if self.path is not None and os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported volume memory file version in {self.path}: {data.get('version')!r}")
+            self._entries = data.get("devices", {})
+            self.stats["loaded"] = len(self._entries)
+        return self._entries
+
+    def record(self, device_id, level=None, muted=None, channels=None):
+        """Notes the device's current state; fields left None are kept as they were."""
+        change = {"seen": int(time.time())}
+        if level is not None:
+            change["level"] = _rounded(level)
+        if muted is not None:
+            change["muted"] = bool(muted)
+        if channels is not None:
+            change["channels"] = [_rounded(channel) for channel in channels] if len(channels) > 1 else None
+        with self._lock:
+            self._pending.setdefault(device_id, {}).update(change)
+            self.stats["records"] += 1
+
+    def recall(self, device_id):
+        """Returns {"seen", "level", "muted", "channels"} for the device, or None if it was never recorded."""
+        with self._lock:
+            entry = self._load().get(device_id)
+            pending = self._pending.get(device_id)
+        if entry is None and pending is None:
+            return None
+        state = dict(zip(("seen", "level", "muted", "channels"), entry or (None, None, None, None)))
+        state.update(pending or {})
+        return state
+
+    def flush(self):
+        """Folds the pending changes in and rewrites the file, if anything changed."""
+        with self._lock:
+            if not self._pending:
+                return False
+            entries = self._load()
+            pending, self._pending = self._pending, {}
+            for device_id, change in pending.items():
+                entry = entries.get(device_id) or [0, None, None, None]
+                entries[device_id] = [change.get("seen", entry[0]), change.get("level", entry[1]),
+                                      change.get("muted", entry[2]), change.get("channels", entry[3])]
+            if len(entries) > self.max_devices:
+                by_age = sorted(entries, key=lambda device_id: entries[device_id][0])
+                for device_id in by_age[:len(entries) - self.max_devices]:
+                    del entries[device_id]
+                    self.stats["evicted"] += 1
+            data = json.dumps({"version": FORMAT_VERSION, "devices": entries}, separators=(",", ":"))
+            self.stats["flushes"] += 1
+        if self.path is not None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp = f"{self.path}.{os.getpid()}"
+            with open(temp, "w", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.path)
+        return True
+
+    def __len__(self):
+        with self._lock:
+            return len(set(self._load()) | set(self._pending))
+
+
+# ============================================================
+# Following a Backend
+# ============================================================
+def start_memory(backend, path=None):
+    """Starts a VolumeMemory on a ComAudioBackend, stored at `path` (default_path() if None)."""
+    backend.watch_endpoints()
+    return VolumeMemory(backend, VolumeMemoryStore(path or default_path())).start()
+
+
+class VolumeMemory:
+    """
+    Records `backend` volume events into `store` and restores saved state
+    when an endpoint is added. The devices present at start() are recorded
+    as they are. Restores, channel reads and file writes all happen on one
+    background thread; the file is written at most every `flush_interval`
+    seconds. Call close() to stop and write what is pending.
+    """
+    def __init__(self, backend, store, flush_interval=2.0, context_name="memory", tolerance=0.001):
+        self.backend = backend
+        self.store = store
+        self.flush_interval = flush_interval
+        self.context_name = context_name
+        self.tolerance = tolerance
+        self.absent = set()      # endpoint IDs removed and not yet restored
+        self._restore = []       # endpoint IDs added, in order
+        self._capture = set()    # endpoint IDs whose state (or channel levels) must be read back
+        self.stats = {"restores": 0, "writes": 0, "unchanged": 0, "captures": 0, "ignored": 0, "errors": 0}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="volume-memory", daemon=True)
+
+    def start(self):
+        with self._cond:
+            self._capture.update(device["id"] for device in self.backend.list_devices("all"))
+        self.backend.add_listener(self.on_event)
+        self._thread.start()
+        return self
+
+    def on_event(self, event):
+        kind = event.get("event")
+        device_id = event.get("device")
+        with self._cond:
+            if kind == "volume":
+                if device_id in self.absent:
+                    self.stats["ignored"] += 1
+                    return
+                self.store.record(device_id, event["level"], event["muted"])
+                self._capture.add(device_id)
+            elif kind == "device" and event["change"] == "added":
+                self.absent.add(device_id)
+                if device_id not in self._restore:
+                    self._restore.append(device_id)
+                self._cond.notify()
+            elif kind == "device" and event["change"] == "removed":
+                self.absent.add(device_id)
+                self._capture.discard(device_id)
+                if device_id in self._restore:
+                    self._restore.remove(device_id)
+
+    # -------------------------------
+    # Background thread
+    # -------------------------------
+    def _run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            with self._cond:
+                while not self._closed and not self._restore and time.monotonic() < next_flush:
+                    self._cond.wait(max(0.0, next_flush - time.monotonic()))
+                if self._closed:
+                    return
+                restore, self._restore = self._restore, []
+            for device_id in restore:
+                self._guarded(self.restore, device_id)
+            if time.monotonic() >= next_flush:
+                self._flush()
+                next_flush = time.monotonic() + self.flush_interval
+
+    def _guarded(self, func, *args):
+        try:
+            return func(*args)
+        except (BackendError, OSError) as e:
+            self.stats["errors"] += 1
+            print("Volume memory:", e)
+
+    def _flush(self):
+        with self._cond:
+            capture, self._capture = self._capture, set()
+        for device_id in capture:
+            self._guarded(self.capture, device_id)
+        try:
+            self.store.flush()
+        except (OSError, ValueError) as e:
+            self.stats["errors"] += 1
+            print("Could not save volume memory:", e)
+
+    def capture(self, device_id):
+        """Records the device's current level, mute state and channel levels."""
+        state = self.backend.get_volume(device_id)
+        channels = self.backend.get_channels(device_id)["channels"]
+        self.store.record(device_id, state["level"], state["muted"], channels)
+        self.stats["captures"] += 1
+
+    def restore(self, device_id):
+        """
+        Writes back the saved state of an endpoint that was just added, as
+        one diff against what it reports now. Returns the writes made.
+        """
+        saved = self.store.recall(device_id)
+        try:
+            if saved is None or saved["level"] is None:
+                self.capture(device_id)
+                return []
+            writes = self.diff(saved, self.backend.get_volume(device_id),
+                               self.backend.get_channels(device_id)["channels"] if saved["channels"] else None)
+            for method, value in writes:
+                getattr(self.backend, method)(value, device_id, context=self.context_name)
+        finally:
+            with self._cond:
+                self.absent.discard(device_id)
+        self.stats["restores"] += 1
+        self.stats["writes"] += len(writes)
+        if not writes:
+            self.stats["unchanged"] += 1
+        return writes
+
+    def diff(self, saved, current, channels=None):
+        """
+        The (backend method, value) writes that take `current` (a
+        get_volume result, plus the channel levels) to `saved`.
+        """
+        writes = []
+        if saved["channels"] and channels is not None and len(channels) == len(saved["channels"]):
+            if any(abs(a - b) > self.tolerance for a, b in zip(saved["channels"], channels)):
+                writes.append(("set_channels", saved["channels"]))
+        elif abs(saved["level"] - current["level"]) > self.tolerance:
+            writes.append(("set_volume", saved["level"]))
+        if saved["muted"] is not None and saved["muted"] != current["muted"]:
+            writes.append(("set_mute", saved["muted"]))
+        return writes
+
+    def close(self):
+        self.backend.remove_listener(self.on_event)
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._flush()
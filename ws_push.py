@@ -0,0 +1,405 @@
+"""
+WebSocket push of live volume and device state to dashboards.
+
+Browsers connect to ws://HOST:PORT/ and receive a JSON snapshot of every
+endpoint followed by deltas as they happen:
+
+    {"type": "snapshot", "seq": 12, "devices": {"<id>": {"name", "flow", "level", "muted", "default"}}}
+    {"type": "delta", "seq": 13, "time": 1700000000.123, "device": "<id>", "changes": {"level": 0.42}}
+    {"type": "delta", "seq": 14, ..., "changes": {"removed": true}}
+
+The state is read from the backend once at startup (and once per newly
+added endpoint) and afterwards kept up to date from backend change events, so a thousand dashboards cost no
+extra COM reads. Each delta is encoded and framed once and shared by all
+subscribers. Every subscriber has a bounded outbound queue that drops its
+oldest messages when full; a subscriber that lost messages is sent a fresh
+snapshot instead of the stale deltas, so a slow browser catches up without
+stalling the others.
+
+Only the subset of RFC 6455 a push channel needs is implemented: the
+opening handshake, unfragmented text frames out, and close/ping/pong in.
+
+Usage:
+    python ws_push.py --simulate --listen 127.0.0.1:8767
+    python -m volume --ws 127.0.0.1:8767
+"""
+import argparse
+import asyncio
+import base64
+import collections
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import socket
+import struct
+import threading
+import time
+
+DEFAULT_LISTEN = "127.0.0.1:8767"
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MAX_CLIENT_PAYLOAD = 1 << 16
+MAX_HEADERS = 64
+MAX_HEADER_BYTES = 1 << 14
+
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+class WebSocketError(Exception):
+    """A protocol violation by the peer."""
+
+
+# ============================================================
+# RFC 6455 framing
+# ============================================================
+def accept_key(key):
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode("ascii")).digest()).decode("ascii")
+
+
+def encode_frame(payload, opcode=OPCODE_TEXT, mask=None):
+    """Encodes one final frame. Servers send unmasked frames; clients pass a 4-byte `mask`."""
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, mask_bit | length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, mask_bit | 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, mask_bit | 127, length)
+    if not mask:
+        return header + payload
+    return header + mask + _apply_mask(payload, mask)
+
+
+def _apply_mask(payload, mask):
+    # XOR with the repeated 4-byte key as one big integer operation.
+    key = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, "little") ^ int.from_bytes(key, "little")).to_bytes(len(payload), "little")
+
+
+async def read_frame(reader, max_payload=MAX_CLIENT_PAYLOAD):
+    """Reads one frame and returns (opcode, unmasked payload)."""
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    if length > max_payload:
+        raise WebSocketError(f"Frame of {length} bytes exceeds {max_payload}")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length) if length else b""
+    if mask:
+        payload = _apply_mask(payload, mask)
+    return opcode, payload
+
+
+async def _read_http_headers(reader):
+    """
+    Reads the request line and headers. A line longer than the stream limit
+    makes readline() raise ValueError; more than MAX_HEADERS lines or
+    MAX_HEADER_BYTES in all raise WebSocketError.
+    """
+    line = await reader.readline()
+    total = len(line)
+    request_line = line.decode("latin-1").strip()
+    headers = {}
+    for count in itertools.count(1):
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        total += len(line)
+        if count > MAX_HEADERS or total > MAX_HEADER_BYTES:
+            raise WebSocketError("Request headers too large")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return request_line, headers
+
+
+# ============================================================
+# Cached dashboard state
+# ============================================================
+class DashboardState:
+    """Endpoint state kept current from backend events; apply() turns an event into a delta."""
+
+    def __init__(self):
+        self.devices = {}
+        self.seq = 0
+
+    def load(self, backend):
+        """Reads every endpoint once (called on the backend worker thread)."""
+        for info in backend.list_devices("all"):
+            state = backend.get_volume(info["id"])
+            self.devices[info["id"]] = {"name": info["name"], "flow": info["flow"], "level": state["level"],
+                                        "muted": state["muted"], "default": info["default"]}
+
+    def snapshot(self):
+        return {"type": "snapshot", "seq": self.seq, "devices": self.devices}
+
+    def _delta(self, device_id, changes):
+        self.seq += 1
+        return {"type": "delta", "seq": self.seq, "time": time.time(), "device": device_id, "changes": changes}
+
+    def apply(self, event):
+        """Returns the list of deltas an event causes (empty when nothing changed)."""
+        kind = event.get("event")
+        device_id = event.get("device")
+        if kind == "volume":
+            entry = self.devices.get(device_id)
+            if entry is None:
+                return []
+            changes = {key: event[key] for key in ("level", "muted") if entry[key] != event[key]}
+            if not changes:
+                return []
+            entry.update(changes)
+            return [self._delta(device_id, changes)]
+        if kind == "default":
+            deltas = []
+            for other_id, entry in self.devices.items():
+                is_default = other_id == device_id
+                if entry["flow"] == event.get("flow") and entry["default"] != is_default:
+                    entry["default"] = is_default
+                    deltas.append(self._delta(other_id, {"default": is_default}))
+            return deltas
+        if kind == "device" and event.get("change") == "added":
+            entry = {"name": event.get("name"), "flow": event.get("flow"), "level": event.get("level"),
+                     "muted": event.get("muted"), "default": False}
+            self.devices[device_id] = entry
+            return [self._delta(device_id, dict(entry, added=True))]
+        if kind == "device" and event.get("change") == "removed":
+            if self.devices.pop(device_id, None) is None:
+                return []
+            return [self._delta(device_id, {"removed": True})]
+        return []
+
+
+# ============================================================
+# Server
+# ============================================================
+class _Subscriber:
+    __slots__ = ("writer", "queue", "wakeup", "dropped", "sent", "resyncs")
+
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue = collections.deque(maxlen=queue_size)
+        self.wakeup = asyncio.Event()
+        self.dropped = 0
+        self.sent = 0
+        self.resyncs = 0
+
+    def push(self, frame):
+        """Queues a frame, returning True when the oldest queued frame was dropped for it."""
+        full = len(self.queue) == self.queue.maxlen
+        if full:
+            self.dropped += 1
+        self.queue.append(frame)
+        self.wakeup.set()
+        return full
+
+
+class WebSocketPushServer:
+    """
+    Serves the push channel on `listen` ("HOST:PORT"). `backend_factory` is
+    called on a dedicated worker thread, as in the control server. The only
+    backend calls are the initial state load and one read per added endpoint.
+
+    `send_buffer` caps the kernel and transport buffering per subscriber, so
+    a stalled browser hits the drop-oldest queue instead of accumulating
+    megabytes of stale deltas in socket buffers.
+    """
+    def __init__(self, backend_factory, listen=DEFAULT_LISTEN, queue_size=64, send_buffer=32768):
+        self.backend_factory = backend_factory
+        self.listen = listen
+        self.queue_size = queue_size
+        self.send_buffer = send_buffer
+        self.backend = None
+        self.state = DashboardState()
+        self.subscribers = set()
+        self.loop = None
+        self.server = None
+        self.port = None
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="ws-push-worker")
+        self.stats = {"connections": 0, "events": 0, "deltas": 0, "dropped": 0, "resyncs": 0}
+
+    def _create_backend(self):
+        backend = self.backend_factory()
+        self.state.load(backend)
+        backend.add_listener(self._on_backend_event)
+        return backend
+
+    def _on_backend_event(self, event):
+        # Backend or notification thread: hand over to the event loop.
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._publish, event)
+
+    # -------------------------------
+    # Event loop
+    # -------------------------------
+    def _publish(self, event):
+        self.stats["events"] += 1
+        if event.get("event") == "device" and event.get("change") == "added":
+            # The one backend read after startup: a new endpoint's level and mute.
+            asyncio.ensure_future(self._load_added(event["device"]))
+        for delta in self.state.apply(event):
+            self.stats["deltas"] += 1
+            frame = encode_frame(json.dumps(delta, separators=(",", ":")).encode())
+            for subscriber in self.subscribers:
+                if subscriber.push(frame):
+                    self.stats["dropped"] += 1
+
+    async def _send_loop(self, subscriber):
+        writer = subscriber.writer
+        reported = 0
+        while not writer.is_closing():
+            await subscriber.wakeup.wait()
+            subscriber.wakeup.clear()
+            if subscriber.dropped != reported:
+                # Deltas were lost: replace the backlog with the current state.
+                self.stats["resyncs"] += 1
+                reported = subscriber.dropped
+                subscriber.resyncs += 1
+                subscriber.queue.clear()
+                writer.write(self._snapshot_frame())
+                subscriber.sent += 1
+            if subscriber.queue:
+                # One write (and usually one send syscall) for the whole backlog.
+                subscriber.sent += len(subscriber.queue)
+                writer.write(b"".join(subscriber.queue))
+                subscriber.queue.clear()
+            await writer.drain()
+
+    async def _load_added(self, device_id):
+        try:
+            state = await self.loop.run_in_executor(self.executor, self.backend.get_volume, device_id)
+        except Exception as e:
+            print(f"Reading new endpoint {device_id} failed:", e)
+            return
+        self._publish(dict(state, event="volume"))
+
+    def _snapshot_frame(self):
+        return encode_frame(json.dumps(self.state.snapshot(), separators=(",", ":")).encode())
+
+    async def _handshake(self, reader, writer):
+        request_line, headers = await _read_http_headers(reader)
+        key = headers.get("sec-websocket-key")
+        if not request_line.startswith("GET ") or "websocket" not in headers.get("upgrade", "").lower() or not key:
+            writer.write(b"HTTP/1.1 426 Upgrade Required\r\nUpgrade: websocket\r\n"
+                         b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+            return False
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n").encode("ascii"))
+        return True
+
+    async def _handle_connection(self, reader, writer):
+        self.stats["connections"] += 1
+        subscriber = None
+        sender = None
+        try:
+            if not await self._handshake(reader, writer):
+                return
+            if self.send_buffer:
+                sock = writer.get_extra_info("socket")
+                if sock is not None:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer)
+                writer.transport.set_write_buffer_limits(self.send_buffer)
+            writer.write(self._snapshot_frame())
+            subscriber = _Subscriber(writer, self.queue_size)
+            self.subscribers.add(subscriber)
+            sender = asyncio.ensure_future(self._send_loop(subscriber))
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == OPCODE_CLOSE:
+                    writer.write(encode_frame(payload[:2], OPCODE_CLOSE))
+                    break
+                if opcode == OPCODE_PING:
+                    writer.write(encode_frame(payload, OPCODE_PONG))
+                # Text from dashboards is ignored: the channel is push-only.
+        except (ConnectionError, asyncio.IncompleteReadError, WebSocketError, ValueError):
+            # ValueError: a header line longer than the stream limit
+            pass
+        finally:
+            if subscriber is not None:
+                self.subscribers.discard(subscriber)
+            if sender is not None:
+                sender.cancel()
+            writer.close()
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.backend = await self.loop.run_in_executor(self.executor, self._create_backend)
+        host, _, port = self.listen.rpartition(":")
+        self.server = await asyncio.start_server(self._handle_connection, host, int(port))
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"WebSocket push listening on ws://{self.listen}/")
+        async with self.server:
+            await self.server.serve_forever()
+
+    def metrics(self):
+        return dict(self.stats, subscribers=len(self.subscribers))
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        if self.backend is not None:
+            self.backend.remove_listener(self._on_backend_event)
+        self.executor.shutdown(wait=False)
+
+    def start_in_thread(self):
+        """Runs the server on a daemon thread with its own event loop (used by the GUI)."""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except Exception as e:
+                errors.append(e)
+                return
+            finally:
+                started.set()
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, name="ws-push", daemon=True)
+        thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket push of live volume state")
+    parser.add_argument("--listen", default=DEFAULT_LISTEN)
+    parser.add_argument("--queue-size", type=int, default=64, help="per-subscriber outbound queue length")
+    parser.add_argument("--simulate", action="store_true", help="use the in-memory simulated backend")
+    args = parser.parse_args()
+
+    if args.simulate:
+        from audio_backend import SimulatedAudioBackend
+        factory = SimulatedAudioBackend
+    else:
+        from audio_backend import ComAudioBackend
+
+        def factory():
+            backend = ComAudioBackend()
+            backend.watch_endpoints()
+            return backend
+    try:
+        asyncio.run(WebSocketPushServer(factory, args.listen, args.queue_size).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()